@@ -8,14 +8,17 @@ from __future__ import annotations
 import sys
 import logging
 import copy
+import asyncio
 import re
 import inspect
 import dataclasses
 import time
+from collections import deque
 from enum import Enum, Flag, auto
 from abc import ABCMeta, abstractmethod
 from .utils import Sentinel
 from .utils import json_wrapper as jsonw
+from .utils import msgpack_wrapper as msgpackw
 from .utils.exceptions import ServerError, AgentError
 
 # Annotation imports
@@ -33,7 +36,10 @@ from typing import (
     Awaitable,
     ClassVar,
     Tuple,
-    Generic
+    Generic,
+    Deque,
+    Set,
+    AsyncGenerator
 )
 
 if TYPE_CHECKING:
@@ -43,7 +49,7 @@ if TYPE_CHECKING:
     from .components.history import History
     from .components.database import DBProviderWrapper
     from .utils import IPAddress
-    from asyncio import Future
+    from asyncio import Future, TimerHandle
     _C = TypeVar("_C", str, bool, float, int)
     _F = TypeVar("_F", bound="ExtendedFlag")
     ConvType = Union[str, bool, float, int]
@@ -53,6 +59,17 @@ if TYPE_CHECKING:
 
 _T = TypeVar("_T")
 ENDPOINT_PREFIXES = ["printer", "server", "machine", "access", "api", "debug"]
+MAX_BATCH_CONCURRENCY = 8
+# Notifications that are periodic snapshots or output streams.  These may
+# be dropped when a connection's queue is full, as no later notification
+# depends on them.  All other notifications report state changes and are
+# always queued.
+DROPPABLE_NOTIFICATIONS = {
+    "notify_proc_stat_update",
+    "notify_gcode_response",
+    "notify_gcode_response_batch",
+    "notify_zip_progress"
+}
 
 class ExtendedFlag(Flag):
     @classmethod
@@ -196,6 +213,16 @@ class UserInfo:
     def as_dict(self) -> Dict[str, Any]:
         return dataclasses.asdict(self)
 
+@dataclasses.dataclass(frozen=True)
+class StreamingResponse:
+    """
+    An endpoint result that is written to an HTTP response as it is
+    produced.  Only valid for endpoints registered with the HTTP transport.
+    """
+    content: AsyncGenerator[bytes, None]
+    content_type: str = "application/octet-stream"
+    filename: Optional[str] = None
+
 @dataclasses.dataclass(frozen=True)
 class APIDefinition:
     endpoint: str
@@ -205,8 +232,20 @@ class APIDefinition:
     transports: TransportType
     callback: Callable[[WebRequest], Coroutine]
     auth_required: bool
+    _transport_mask: int = dataclasses.field(init=False, repr=False, compare=False)
+    _request_mask: int = dataclasses.field(init=False, repr=False, compare=False)
+    _object_parser: bool = dataclasses.field(init=False, repr=False, compare=False)
     _cache: ClassVar[Dict[str, APIDefinition]] = {}
 
+    def __post_init__(self) -> None:
+        # Resolve values checked on every request once at registration,
+        # Flag membership tests are relatively expensive.
+        object.__setattr__(self, "_transport_mask", self.transports._value_)
+        object.__setattr__(self, "_request_mask", self.request_types._value_)
+        object.__setattr__(
+            self, "_object_parser", self.endpoint.startswith("objects/")
+        )
+
     def __str__(self) -> str:
         tprt_str = "|".join([tprt.name for tprt in self.transports if tprt.name])
         val: str = f"(Transports: {tprt_str})"
@@ -233,7 +272,13 @@ class APIDefinition:
 
     @property
     def need_object_parser(self) -> bool:
-        return self.endpoint.startswith("objects/")
+        return self._object_parser
+
+    def supports_transport(self, transport_type: TransportType) -> bool:
+        return bool(transport_type._value_ & self._transport_mask)
+
+    def supports_request_type(self, request_type: RequestType) -> bool:
+        return bool(request_type._value_ & self._request_mask)
 
     def rpc_items(self) -> zip[Tuple[RequestType, str]]:
         return zip(self.request_types, self.rpc_methods)
@@ -341,7 +386,13 @@ class BaseRemoteConnection(APITransport):
         self.is_closed: bool = False
         self.queue_busy: bool = False
         self.pending_responses: Dict[int, Future] = {}
-        self.message_buf: List[Union[bytes, str]] = []
+        self.message_buf: Deque[Union[bytes, str]] = deque()
+        self._overflow_status: Dict[str, Dict[str, Any]] = {}
+        self._overflow_status_time: float = 0.
+        self._queue_full_time: Optional[float] = None
+        self._stall_handle: Optional[TimerHandle] = None
+        self.dropped_messages: int = 0
+        self.coalesced_updates: int = 0
         self._connected_time: float = 0.
         self._identified: bool = False
         self._client_data: Dict[str, str] = {
@@ -352,6 +403,15 @@ class BaseRemoteConnection(APITransport):
         }
         self._need_auth: bool = False
         self._user_info: Optional[UserInfo] = None
+        self._capabilities: Set[str] = set()
+        self._status_interval: float = 0.
+        self._status_cache: Dict[str, Dict[str, Any]] = {}
+        self._last_status_time: float = 0.
+        self._last_status_sent: float = 0.
+        self._status_flush_handle: Optional[TimerHandle] = None
+        self._message_format: str = "json"
+        self._notify_include: Optional[Set[str]] = None
+        self._notify_exclude: Set[str] = set()
 
     @property
     def user_info(self) -> Optional[UserInfo]:
@@ -395,12 +455,82 @@ class BaseRemoteConnection(APITransport):
     def transport_type(self) -> TransportType:
         return TransportType.WEBSOCKET
 
+    @property
+    def capabilities(self) -> Set[str]:
+        return self._capabilities
+
+    @capabilities.setter
+    def capabilities(self, caps: Set[str]) -> None:
+        self._capabilities = caps
+
+    @property
+    def status_interval(self) -> float:
+        return self._status_interval
+
+    @property
+    def message_format(self) -> str:
+        return self._message_format
+
+    def set_notification_filter(
+        self, include: Optional[Set[str]], exclude: Set[str]
+    ) -> None:
+        self._notify_include = include
+        self._notify_exclude = exclude
+
+    def get_notification_filter(self) -> Dict[str, Any]:
+        include = self._notify_include
+        return {
+            "include": sorted(include) if include is not None else None,
+            "exclude": sorted(self._notify_exclude)
+        }
+
+    def accepts_notification(self, name: str, family: str) -> bool:
+        # Filters may contain notification names or notification families
+        include = self._notify_include
+        if include is not None and name not in include and family not in include:
+            return False
+        exclude = self._notify_exclude
+        return not exclude or (name not in exclude and family not in exclude)
+
+    def encode_message(self, message: Any) -> bytes:
+        if self._message_format == "msgpack":
+            return msgpackw.dumps(message)
+        return jsonw.dumps(message)
+
+    def decode_message(self, data: Union[str, bytes]) -> Any:
+        # Text frames are always decoded as JSON
+        if self._message_format == "msgpack" and not isinstance(data, str):
+            return msgpackw.loads(data)
+        return jsonw.loads(data)
+
+    def queue_shared_message(
+        self, message: Dict[str, Any], cache: Dict[str, bytes]
+    ) -> None:
+        # Queue a message sent to multiple connections.  The encoded
+        # message is stored in the cache so that it is only encoded
+        # once for each message format.
+        encoded = cache.get(self._message_format)
+        if encoded is None:
+            encoded = self.encode_message(message)
+            cache[self._message_format] = encoded
+        droppable = message.get("method") in DROPPABLE_NOTIFICATIONS
+        self.queue_message(encoded, droppable)
+
+    def set_max_status_rate(self, rate: float) -> None:
+        if rate < 0.:
+            raise self.server.error(
+                f"Invalid status update rate: {rate}, must be positive"
+            )
+        self._status_interval = 1. / rate if rate else 0.
+        if not self._status_interval:
+            self._flush_status_cache()
+
     def screen_rpc_request(
         self, api_def: APIDefinition, req_type: RequestType, args: Dict[str, Any]
     ) -> None:
         self.check_authenticated(api_def)
 
-    async def _process_message(self, message: str) -> None:
+    async def _process_message(self, message: Union[str, bytes]) -> None:
         try:
             response = await self.rpc.dispatch(message, self)
             if response is not None:
@@ -408,15 +538,104 @@ class BaseRemoteConnection(APITransport):
         except Exception:
             logging.exception("Websocket Command Error")
 
-    def queue_message(self, message: Union[bytes, str, Dict[str, Any]]):
+    def queue_message(
+        self,
+        message: Union[bytes, str, Dict[str, Any]],
+        droppable: bool = False
+    ) -> None:
+        # Only notifications in DROPPABLE_NOTIFICATIONS may be dropped when
+        # the queue is full.  Replies, requests expecting a reply and state
+        # notifications are always queued.
+        if droppable and self._queue_full_time is not None:
+            self.dropped_messages += 1
+            return
         self.message_buf.append(
-            jsonw.dumps(message) if isinstance(message, dict) else message
+            self.encode_message(message) if isinstance(message, dict) else message
         )
+        # Arm the stall check as soon as the queue fills
+        self._check_queue_full()
+        self._start_writer()
+
+    def queue_status(
+        self,
+        status: Dict[str, Any],
+        eventtime: float,
+        encoded: Optional[Dict[str, bytes]] = None
+    ) -> None:
+        if self._overflow_status or self._check_queue_full():
+            # The client is not keeping up, merge the update with
+            # pending updates rather than growing the queue
+            for obj, fields in status.items():
+                self._overflow_status.setdefault(obj, {}).update(fields)
+            self._overflow_status_time = eventtime
+            self.coalesced_updates += 1
+            self._start_writer()
+            return
+        msg: Optional[bytes] = None
+        if encoded is not None:
+            msg = encoded.get(self._message_format)
+        if msg is None:
+            msg = self.encode_message({
+                'jsonrpc': "2.0",
+                'method': "notify_status_update",
+                'params': [status, eventtime]
+            })
+            if encoded is not None:
+                encoded[self._message_format] = msg
+        self.message_buf.append(msg)
+        self._check_queue_full()
+        self._start_writer()
+
+    def _start_writer(self) -> None:
         if self.queue_busy:
             return
         self.queue_busy = True
         self.eventloop.register_callback(self._write_messages)
 
+    def _check_queue_full(self) -> bool:
+        if len(self.message_buf) < self.wsm.max_queue_size:
+            return False
+        if self._queue_full_time is None:
+            self._queue_full_time = self.eventloop.get_loop_time()
+            logging.info(
+                f"Outbound queue full for connection {self.uid}, "
+                f"{len(self.message_buf)} messages pending"
+            )
+            if self.wsm.stall_timeout:
+                self._stall_handle = self.eventloop.delay_callback(
+                    self.wsm.stall_timeout, self._check_queue_stalled
+                )
+        return True
+
+    def _check_queue_stalled(self) -> None:
+        # The queue has not dropped below its limit since it filled
+        self._stall_handle = None
+        if self._queue_full_time is None or self.is_closed:
+            return
+        logging.info(
+            f"Connection {self.uid} outbound queue stalled for more than "
+            f"{self.wsm.stall_timeout:.1f} seconds, closing"
+        )
+        self._queue_full_time = None
+        self.close_socket(1008, "Outbound Queue Stalled")
+
+    def _reset_queue_full(self) -> None:
+        self._queue_full_time = None
+        if self._stall_handle is not None:
+            self._stall_handle.cancel()
+            self._stall_handle = None
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self.message_buf) + (1 if self._overflow_status else 0)
+
+    def get_queue_stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue_depth,
+            "dropped_messages": self.dropped_messages,
+            "coalesced_updates": self.coalesced_updates
+        }
+
     def authenticate(
         self,
         token: Optional[str] = None,
@@ -451,11 +670,26 @@ class BaseRemoteConnection(APITransport):
 
     async def _write_messages(self):
         if self.is_closed:
-            self.message_buf = []
+            self.message_buf.clear()
+            self._overflow_status = {}
+            self._reset_queue_full()
             self.queue_busy = False
             return
-        while self.message_buf:
-            msg = self.message_buf.pop(0)
+        while self.message_buf or self._overflow_status:
+            if self.message_buf:
+                msg = self.message_buf.popleft()
+                if (
+                    self._queue_full_time is not None and
+                    len(self.message_buf) < self.wsm.max_queue_size
+                ):
+                    self._reset_queue_full()
+            else:
+                msg = self.encode_message({
+                    'jsonrpc': "2.0",
+                    'method': "notify_status_update",
+                    'params': [self._overflow_status, self._overflow_status_time]
+                })
+                self._overflow_status = {}
             await self.write_to_socket(msg)
         self.queue_busy = False
 
@@ -468,10 +702,30 @@ class BaseRemoteConnection(APITransport):
                     ) -> None:
         if not status:
             return
-        self.queue_message({
-            'jsonrpc': "2.0",
-            'method': "notify_status_update",
-            'params': [status, eventtime]})
+        if self._status_interval:
+            # Coalesce updates, sending at most one per interval
+            for obj, fields in status.items():
+                self._status_cache.setdefault(obj, {}).update(fields)
+            self._last_status_time = eventtime
+            if self._status_flush_handle is None:
+                flush_time = self._last_status_sent + self._status_interval
+                self._status_flush_handle = self.eventloop.call_at(
+                    max(flush_time, self.eventloop.get_loop_time()),
+                    self._flush_status_cache
+                )
+            return
+        self.queue_status(status, eventtime)
+
+    def _flush_status_cache(self) -> None:
+        if self._status_flush_handle is not None:
+            self._status_flush_handle.cancel()
+            self._status_flush_handle = None
+        status = self._status_cache
+        self._status_cache = {}
+        if not status or self.is_closed:
+            return
+        self._last_status_sent = self.eventloop.get_loop_time()
+        self.queue_status(status, self._last_status_time)
 
     def call_method_with_response(
         self,
@@ -501,7 +755,7 @@ class BaseRemoteConnection(APITransport):
         }
         if params:
             msg["params"] = params
-        self.queue_message(msg)
+        self.queue_message(msg, method in DROPPABLE_NOTIFICATIONS)
 
     def send_notification(self, name: str, data: List) -> None:
         self.wsm.notify_clients(name, data, [self._uid])
@@ -522,6 +776,20 @@ class BaseRemoteConnection(APITransport):
         raise NotImplementedError("Children must implement close_socket()")
 
 
+def _convert_bool(val: Any) -> bool:
+    if isinstance(val, str):
+        val = val.lower()
+        if val in ["true", "false"]:
+            return val == "true"
+    elif isinstance(val, bool):
+        return val
+    raise TypeError
+
+
+_ARG_CONVERTERS: Dict[type, Callable[[Any], Any]] = {
+    bool: _convert_bool
+}
+
 class WebRequest:
     def __init__(
         self,
@@ -575,17 +843,11 @@ class WebRequest:
                 raise ServerError(f"No data for argument: {key}")
             return default
         val = self.args[key]
+        if type(val) is dtype:
+            # JSON-RPC arguments generally arrive with the correct type
+            return val
         try:
-            if dtype is not bool:
-                return dtype(val)
-            else:
-                if isinstance(val, str):
-                    val = val.lower()
-                    if val in ["true", "false"]:
-                        return True if val == "true" else False  # type: ignore
-                elif isinstance(val, bool):
-                    return val  # type: ignore
-                raise TypeError
+            return _ARG_CONVERTERS.get(dtype, dtype)(val)
         except Exception:
             raise ServerError(
                 f"Unable to convert argument [{key}] to {dtype}: "
@@ -679,13 +941,12 @@ class WebRequest:
 class JsonRPC:
     def __init__(self, server: Server) -> None:
         self.methods: Dict[str, Tuple[RequestType, APIDefinition]] = {}
-        self.sanitize_response = False
         self.verbose = server.is_verbose_enabled()
 
-    def _log_request(self, rpc_obj: Dict[str, Any], trtype: TransportType) -> None:
+    def _log_request(self, rpc_obj: Dict[str, Any], trtype: TransportType) -> bool:
         if not self.verbose:
-            return
-        self.sanitize_response = False
+            return False
+        sanitize_response = False
         output = rpc_obj
         method: Optional[str] = rpc_obj.get("method")
         params: Dict[str, Any] = rpc_obj.get("params", {})
@@ -694,7 +955,7 @@ class JsonRPC:
                 method.startswith("access.") or
                 method == "machine.sudo.password"
             ):
-                self.sanitize_response = True
+                sanitize_response = True
                 if params and isinstance(params, dict):
                     output = copy.deepcopy(rpc_obj)
                     output["params"] = {key: "<sanitized>" for key in params}
@@ -704,19 +965,22 @@ class JsonRPC:
                     if field in params:
                         output["params"][field] = "<sanitized>"
         logging.debug(f"{trtype} Received::{jsonw.dumps(output).decode()}")
+        return sanitize_response
 
     def _log_response(
-        self, resp_obj: Optional[Dict[str, Any]], trtype: TransportType
+        self,
+        resp_obj: Optional[Dict[str, Any]],
+        trtype: TransportType,
+        sanitize: bool = False
     ) -> None:
         if not self.verbose:
             return
         if resp_obj is None:
             return
         output = resp_obj
-        if self.sanitize_response and "result" in resp_obj:
+        if sanitize and "result" in resp_obj:
             output = copy.deepcopy(resp_obj)
             output["result"] = "<sanitized>"
-        self.sanitize_response = False
         logging.debug(f"{trtype} Response::{jsonw.dumps(output).decode()}")
 
     def register_method(
@@ -738,34 +1002,73 @@ class JsonRPC:
         data: Union[str, bytes],
         transport: APITransport
     ) -> Optional[bytes]:
-        transport_type = transport.transport_type
+        loads: Callable[[Union[str, bytes]], Any] = jsonw.loads
+        dumps: Callable[[Any], bytes] = jsonw.dumps
+        msg_format = "json"
+        if isinstance(transport, BaseRemoteConnection):
+            loads = transport.decode_message
+            dumps = transport.encode_message
+            msg_format = transport.message_format
         try:
-            obj: Union[Dict[str, Any], List[dict]] = jsonw.loads(data)
+            obj: Union[Dict[str, Any], List[dict]] = loads(data)
         except Exception:
             if isinstance(data, bytes):
-                data = data.decode()
-            msg = f"{transport_type} data not valid json: {data}"
+                data = data.decode(errors="replace")
+            msg = f"{transport.transport_type} data not valid {msg_format}: {data}"
             logging.exception(msg)
             err = self.build_error(-32700, "Parse error")
-            return jsonw.dumps(err)
+            return dumps(err)
         if isinstance(obj, list):
-            responses: List[Dict[str, Any]] = []
-            for item in obj:
-                self._log_request(item, transport_type)
-                resp = await self.process_object(item, transport)
-                if resp is not None:
-                    self._log_response(resp, transport_type)
-                    responses.append(resp)
+            responses = [
+                resp for resp in await self.process_batch(obj, transport)
+                if resp is not None
+            ]
             if responses:
-                return jsonw.dumps(responses)
+                return dumps(responses)
         else:
-            self._log_request(obj, transport_type)
-            response = await self.process_object(obj, transport)
+            if self.verbose:
+                response = await self._process_logged(obj, transport)
+            else:
+                response = await self.process_object(obj, transport)
             if response is not None:
-                self._log_response(response, transport_type)
-                return jsonw.dumps(response)
+                return dumps(response)
         return None
 
+    async def process_batch(
+        self,
+        batch: List[Dict[str, Any]],
+        transport: APITransport
+    ) -> List[Optional[Dict[str, Any]]]:
+        # Batch items are executed concurrently unless the client requests
+        # ordered execution by adding `"ordered": true` to any item.
+        ordered = any(
+            isinstance(item, dict) and item.get("ordered", False) is True
+            for item in batch
+        )
+        if ordered or len(batch) < 2:
+            return [await self._process_logged(item, transport) for item in batch]
+        sem = asyncio.Semaphore(MAX_BATCH_CONCURRENCY)
+
+        async def _process_item(
+            item: Dict[str, Any]
+        ) -> Optional[Dict[str, Any]]:
+            async with sem:
+                return await self._process_logged(item, transport)
+        return await asyncio.gather(*[_process_item(item) for item in batch])
+
+    async def _process_logged(
+        self,
+        obj: Dict[str, Any],
+        transport: APITransport
+    ) -> Optional[Dict[str, Any]]:
+        if not self.verbose:
+            return await self.process_object(obj, transport)
+        transport_type = transport.transport_type
+        sanitize = self._log_request(obj, transport_type)
+        response = await self.process_object(obj, transport)
+        self._log_response(response, transport_type, sanitize)
+        return response
+
     async def process_object(
         self,
         obj: Dict[str, Any],
@@ -790,7 +1093,7 @@ class JsonRPC:
             )
         request_type, api_definition = method_info
         transport_type = transport.transport_type
-        if transport_type not in api_definition.transports:
+        if not api_definition.supports_transport(transport_type):
             return self.build_error(
                 -32601, f"Method not found for transport {transport_type.name}",
                 req_id, method_name=method_name
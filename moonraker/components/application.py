@@ -6,17 +6,22 @@
 
 from __future__ import annotations
 import os
+import sys
+import asyncio
 import mimetypes
 import logging
 import traceback
 import ssl
 import pathlib
 import urllib.parse
+import hashlib
+import zlib
+import contextlib
 import tornado
 import tornado.iostream
 import tornado.httputil
 import tornado.web
-from asyncio import Lock
+from asyncio import Task
 from inspect import isclass
 from tornado.escape import url_unescape, url_escape
 from tornado.routing import Rule, PathMatches, RuleRouter
@@ -31,11 +36,12 @@ from ..common import (
     APITransport,
     TransportType,
     RequestType,
-    KlippyState
+    KlippyState,
+    StreamingResponse
 )
 from ..utils import json_wrapper as jsonw
 from streaming_form_data import StreamingFormDataParser, ParseFailedException
-from streaming_form_data.targets import FileTarget, ValueTarget, SHA256Target
+from streaming_form_data.targets import BaseTarget, ValueTarget
 
 # Annotation imports
 from typing import (
@@ -44,13 +50,18 @@ from typing import (
     Optional,
     Callable,
     Coroutine,
+    Awaitable,
     Union,
     Dict,
     List,
     AsyncGenerator,
-    Type
+    Type,
+    Tuple,
+    Iterator,
+    BinaryIO
 )
 if TYPE_CHECKING:
+    import socket
     from tornado.websocket import WebSocketHandler
     from tornado.httputil import HTTPMessageDelegate, HTTPServerRequest
     from ..server import Server
@@ -60,7 +71,7 @@ if TYPE_CHECKING:
     from .klippy_connection import KlippyConnection as Klippy
     from ..utils import IPAddress
     from .websockets import WebsocketManager, WebSocket
-    from .file_manager.file_manager import FileManager
+    from .file_manager.file_manager import FileManager, UploadSession
     from .announcements import Announcements
     from .machine import Machine
     from io import BufferedReader
@@ -72,11 +83,40 @@ if TYPE_CHECKING:
 
 # mypy: disable-error-code="attr-defined,name-defined"
 
+ZSTD_MODULE: Optional[str] = None
+with contextlib.suppress(ImportError):
+    from compression import zstd  # type: ignore
+    ZSTD_MODULE = "compression.zstd"
+if ZSTD_MODULE is None:
+    with contextlib.suppress(ImportError):
+        import zstandard  # type: ignore
+        ZSTD_MODULE = "zstandard"
+
 # 50 MiB Max Standard Body Size
 MAX_BODY_SIZE = 50 * 1024 * 1024
 MAX_WS_CONNS_DEFAULT = 50
 EXCLUDED_ARGS = ["_", "token", "access_token", "connection_id"]
 AUTHORIZED_EXTS = [".png", ".jpg"]
+SENDFILE_SUPPORTED = (
+    hasattr(os, "sendfile") and
+    sys.platform.startswith("linux") and
+    (6, 2) <= tornado.version_info < (7,)
+)
+SENDFILE_MAX_SIZE = 16 * 1024 * 1024
+SENDFILE_TIMEOUT = 60.
+MIN_READ_CHUNK_SIZE = 64 * 1024
+MAX_READ_CHUNK_SIZE = 1024 * 1024
+UPLOAD_BUFFER_SIZE = 1024 * 1024
+UPLOAD_MAX_PENDING = 4 * 1024 * 1024
+# Must match READ_SIZE in file_manager/metadata.py
+UPLOAD_WINDOW_SIZE = 1024 * 1024
+UPLOAD_ENCODING_EXTS = {".gz": "gzip", ".zst": "zstd"}
+DECODABLE_GCODE_EXTS = (".gcode", ".g", ".gco", ".nc")
+DECODE_CHUNK_SIZE = 256 * 1024
+# A zstd block decodes to at most 128 KiB and requires at least 4 bytes
+# of input, so feeding 64 bytes at a time bounds the output of a single
+# call to roughly 2 MiB
+ZSTD_FEED_SIZE = 64
 DEFAULT_KLIPPY_LOG_PATH = "/tmp/klippy.log"
 
 class MutableRouter(RuleRouter):
@@ -184,7 +224,7 @@ class InternalTransport(APITransport):
         if method_info is None:
             raise self.server.error(f"No method {method_name} available")
         req_type, api_definition = method_info
-        if TransportType.INTERNAL not in api_definition.transports:
+        if not api_definition.supports_transport(TransportType.INTERNAL):
             raise self.server.error(f"No method {method_name} available")
         args = request_arguments or kwargs
         return await api_definition.request(args, req_type, self)
@@ -248,6 +288,10 @@ class MoonrakerApp:
         self.register_static_file_handler(
             "klippy.log", DEFAULT_KLIPPY_LOG_PATH, force=True)
         self.register_upload_handler("/server/files/upload")
+        self.mutable_router.add_handler(
+            f"{self._route_prefix}/server/files/upload/chunk", UploadChunkHandler,
+            {'max_upload_size': self.max_upload_size}
+        )
 
         # Register Server Components
         self.server.register_component("jsonrpc", self.json_rpc)
@@ -460,6 +504,15 @@ class MoonrakerApp:
         self.template_cache[asset_name] = asset_tmpl
         return asset_tmpl
 
+def _format_attachment(basename: str) -> str:
+    ascii_basename = basename.encode("ascii", "replace").decode()
+    ascii_basename = ascii_basename.replace('"', '\\"')
+    utf8_basename = urllib.parse.quote(basename, encoding="utf-8")
+    return (
+        f"attachment; filename=\"{ascii_basename}\"; "
+        f"filename*=UTF-8''{utf8_basename}"
+    )
+
 def _set_cors_headers(req_hdlr: tornado.web.RequestHandler) -> None:
     request = req_hdlr.request
     origin: Optional[str] = request.headers.get("Origin")
@@ -690,7 +743,7 @@ class DynamicRequestHandler(AuthorizedRequestHandler):
         await self._process_http_request(RequestType.DELETE)
 
     async def _process_http_request(self, req_type: RequestType) -> None:
-        if req_type not in self.api_defintion.request_types:
+        if not self.api_defintion.supports_request_type(req_type):
             raise tornado.web.HTTPError(405)
         args = self.parse_args()
         transport = self.get_associated_websocket()
@@ -706,6 +759,9 @@ class DynamicRequestHandler(AuthorizedRequestHandler):
                 logging.exception("API Request Failure")
             raise tornado.web.HTTPError(
                 e.status_code, reason=str(e)) from e
+        if isinstance(result, StreamingResponse):
+            await self._write_stream(result)
+            return
         if self.wrap_result:
             result = {'result': result}
         self._log_debug(f"HTTP Response::{req}", result)
@@ -718,6 +774,37 @@ class DynamicRequestHandler(AuthorizedRequestHandler):
             self.set_header("Content-Type", self.content_type)
         self.finish(result)
 
+    async def _write_stream(self, response: StreamingResponse) -> None:
+        content = response.content
+        try:
+            self.set_header("Content-Type", response.content_type)
+            if response.filename is not None:
+                self.set_header(
+                    "Content-Disposition", _format_attachment(response.filename)
+                )
+            async for chunk in content:
+                self.write(chunk)
+                await self.flush()
+        except tornado.iostream.StreamClosedError:
+            logging.info(f"Client disconnected during stream: {self.request.path}")
+            return
+        except Exception as e:
+            if not self._headers_written:
+                if isinstance(e, ServerError):
+                    raise tornado.web.HTTPError(
+                        e.status_code, reason=str(e)) from e
+                raise
+            # The response is incomplete, close the connection rather than
+            # terminate the body normally
+            logging.exception(f"Error writing stream: {self.request.path}")
+            conn = self.request.connection
+            if isinstance(conn, HTTP1Connection):
+                conn.close()
+            return
+        finally:
+            await content.aclose()
+        self.finish()
+
 class RPCHandler(AuthorizedRequestHandler, APITransport):
     def initialize(self) -> None:
         super(RPCHandler, self).initialize()
@@ -762,6 +849,48 @@ class RPCHandler(AuthorizedRequestHandler, APITransport):
             self.set_header("Content-Type", "application/json; charset=UTF-8")
         self.finish(result)
 
+async def _sendfile_range(
+    evt_loop: EventLoop, sock_fd: int, file_fd: int, offset: int, count: int
+) -> int:
+    # The socket is non-blocking, each call to sendfile() sends at most
+    # what fits in the socket's send buffer.  Wait on the event loop for
+    # the socket to become writable when the buffer is full.
+    sent = 0
+    while sent < count:
+        size = min(count - sent, SENDFILE_MAX_SIZE)
+        try:
+            ret = os.sendfile(sock_fd, file_fd, offset + sent, size)
+        except BlockingIOError:
+            await _wait_writable(evt_loop, sock_fd)
+            continue
+        if not ret:
+            break
+        sent += ret
+    return sent
+
+async def _wait_writable(evt_loop: EventLoop, fd: int) -> None:
+    fut = evt_loop.create_future()
+
+    def _on_writable() -> None:
+        if not fut.done():
+            fut.set_result(None)
+    evt_loop.add_writer(fd, _on_writable)
+    try:
+        await asyncio.wait_for(fut, SENDFILE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise TimeoutError("Timed out waiting for socket") from None
+    finally:
+        evt_loop.remove_writer(fd)
+
+def _consume_content_length(conn: HTTP1Connection, count: int) -> None:
+    # Tornado checks the bytes written against the Content-Length using
+    # private connection state.  Account for a body sent outside of the
+    # stream.  SENDFILE_SUPPORTED limits sendfile to tornado versions
+    # known to track the remaining length this way.
+    remaining: Optional[int] = getattr(conn, "_expected_content_remaining", None)
+    if remaining is not None:
+        conn._expected_content_remaining = remaining - count
+
 class FileRequestHandler(AuthorizedFileHandler):
     def set_extra_headers(self, path: str) -> None:
         # The call below should never return an empty string,
@@ -769,12 +898,7 @@ class FileRequestHandler(AuthorizedFileHandler):
         # a file
         assert isinstance(self.absolute_path, str)
         basename = os.path.basename(self.absolute_path)
-        ascii_basename = self._escape_filename_to_ascii(basename)
-        utf8_basename = self._escape_filename_to_utf8(basename)
-        self.set_header(
-            "Content-Disposition",
-            f"attachment; filename=\"{ascii_basename}\"; "
-            f"filename*=UTF-8\'\'{utf8_basename}")
+        self.set_header("Content-Disposition", _format_attachment(basename))
 
     async def delete(self, path: str) -> None:
         app: MoonrakerApp = self.server.lookup_component("application")
@@ -873,23 +997,80 @@ class FileRequestHandler(AuthorizedFileHandler):
 
         if include_body:
             evt_loop = self.server.get_event_loop()
+            if self._get_sendfile_socket() is not None:
+                await self._sendfile(
+                    evt_loop, self.absolute_path, start or 0, content_length
+                )
+                return
             content = self.get_content_nonblock(
                 evt_loop, self.absolute_path, start, end)
-            async for chunk in content:
-                try:
+            try:
+                async for chunk in content:
                     self.write(chunk)
                     await self.flush()
-                except tornado.iostream.StreamClosedError:
-                    return
+            except tornado.iostream.StreamClosedError:
+                return
+            finally:
+                await content.aclose()
         else:
             assert self.request.method == "HEAD"
 
-    def _escape_filename_to_ascii(self, basename: str) -> str:
-        ret = basename.encode("ascii", "replace").decode()
-        return ret.replace('"', '\\"')
+    def _get_sendfile_socket(self) -> Optional[socket.socket]:
+        # Sendfile is only available on connections without TLS, the
+        # data must be encrypted by the ssl module
+        if not SENDFILE_SUPPORTED:
+            return None
+        conn = self.request.connection
+        if not isinstance(conn, HTTP1Connection):
+            return None
+        stream = conn.stream
+        if (
+            isinstance(stream, tornado.iostream.SSLIOStream) or
+            not isinstance(stream, tornado.iostream.IOStream)
+        ):
+            return None
+        return stream.socket
 
-    def _escape_filename_to_utf8(self, basename: str) -> str:
-        return urllib.parse.quote(basename, encoding="utf-8")
+    async def _sendfile(
+        self, evt_loop: EventLoop, abspath: str, offset: int, count: int
+    ) -> None:
+        # Write the headers, the body is sent directly to the socket
+        try:
+            await self.flush()
+        except tornado.iostream.StreamClosedError:
+            return
+        sock = self._get_sendfile_socket()
+        conn = self.request.connection
+        assert isinstance(conn, HTTP1Connection)
+        if sock is None or conn.stream.closed():
+            return
+        # Tornado closes the socket if it detects a disconnect, send using
+        # a duplicate descriptor so it cannot be reused during a transfer
+        sock_fd = os.dup(sock.fileno())
+        sent = 0
+        try:
+            file: BufferedReader = await evt_loop.run_in_thread(open, abspath, "rb")
+            try:
+                while sent < count and not conn.stream.closed():
+                    size = min(count - sent, SENDFILE_MAX_SIZE)
+                    ret = await _sendfile_range(
+                        evt_loop, sock_fd, file.fileno(), offset + sent, size
+                    )
+                    sent += ret
+                    if ret < size:
+                        # The file was truncated during the transfer
+                        break
+            finally:
+                await evt_loop.run_in_thread(file.close)
+        except (OSError, TimeoutError) as e:
+            logging.debug(f"Sendfile failed for {abspath}: {e}")
+        finally:
+            os.close(sock_fd)
+        if sent < count:
+            # The promised Content-Length cannot be fulfilled
+            conn.stream.close()
+            return
+        _consume_content_length(conn, sent)
 
     @classmethod
     async def get_content_nonblock(
@@ -900,6 +1081,7 @@ class FileRequestHandler(AuthorizedFileHandler):
         end: Optional[int] = None
     ) -> AsyncGenerator[bytes, None]:
         file: BufferedReader = await evt_loop.run_in_thread(open, abspath, "rb")
+        read_fut: Optional[Awaitable[bytes]] = None
         try:
             if start is not None:
                 file.seek(start)
@@ -907,20 +1089,32 @@ class FileRequestHandler(AuthorizedFileHandler):
                 remaining = end - (start or 0)  # type: Optional[int]
             else:
                 remaining = None
+            # Chunk size grows with each read, limiting the number of thread
+            # hops for large files.  The next chunk is read while the current
+            # chunk is written.
+            chunk_size = MIN_READ_CHUNK_SIZE
+            read_size = chunk_size
+            if remaining is not None:
+                read_size = min(remaining, chunk_size)
+            read_fut = evt_loop.run_in_thread(file.read, read_size)
             while True:
-                chunk_size = 64 * 1024
-                if remaining is not None and remaining < chunk_size:
-                    chunk_size = remaining
-                chunk = await evt_loop.run_in_thread(file.read, chunk_size)
-                if chunk:
-                    if remaining is not None:
-                        remaining -= len(chunk)
-                    yield chunk
-                else:
+                chunk = await read_fut
+                read_fut = None
+                if not chunk:
                     if remaining is not None:
                         assert remaining == 0
                     return
+                if remaining is not None:
+                    remaining -= len(chunk)
+                chunk_size = min(chunk_size * 2, MAX_READ_CHUNK_SIZE)
+                read_size = chunk_size
+                if remaining is not None:
+                    read_size = min(remaining, chunk_size)
+                read_fut = evt_loop.run_in_thread(file.read, read_size)
+                yield chunk
         finally:
+            if read_fut is not None:
+                await read_fut
             await evt_loop.run_in_thread(file.close)
 
     @classmethod
@@ -938,8 +1132,12 @@ class FileUploadHandler(AuthorizedRequestHandler):
         self.file_manager: FileManager = self.server.lookup_component(
             'file_manager')
         self.max_upload_size = max_upload_size
-        self.parse_lock = Lock()
         self.parse_failed: bool = False
+        self.parse_error: Optional[ServerError] = None
+        self._body_decoder: Optional[UploadDecoder] = None
+        self._pending_chunks: List[bytes] = []
+        self._pending_size: int = 0
+        self._parse_task: Optional[Task] = None
 
     async def prepare(self) -> None:
         ret = super(FileUploadHandler, self).prepare()
@@ -955,6 +1153,14 @@ class FileUploadHandler(AuthorizedRequestHandler):
         if self.request.method == "POST":
             assert isinstance(self.request.connection, HTTP1Connection)
             self.request.connection.set_max_body_size(self.max_upload_size)
+            encoding = self.request.headers.get("Content-Encoding", "identity")
+            encoding = encoding.strip().lower()
+            if encoding != "identity":
+                if not UploadDecoder.is_supported(encoding):
+                    raise tornado.web.HTTPError(
+                        415, f"Unsupported Content-Encoding: {encoding}"
+                    )
+                self._body_decoder = UploadDecoder(encoding, self.max_upload_size)
             tmpname = self.file_manager.gen_temp_upload_path()
             self._targets = {
                 'root': ValueTarget(),
@@ -962,35 +1168,79 @@ class FileUploadHandler(AuthorizedRequestHandler):
                 'path': ValueTarget(),
                 'checksum': ValueTarget(),
             }
-            self._file = FileTarget(tmpname)
-            self._sha256_target = SHA256Target()
+            self._file = UploadTarget(tmpname, self.max_upload_size)
             self._parser = StreamingFormDataParser(self.request.headers)
             self._parser.register('file', self._file)
-            self._parser.register('file', self._sha256_target)
             for name, target in self._targets.items():
                 self._parser.register(name, target)
 
     async def data_received(self, chunk: bytes) -> None:
-        if self.request.method == "POST" and not self.parse_failed:
-            async with self.parse_lock:
-                evt_loop = self.server.get_event_loop()
-                try:
-                    await evt_loop.run_in_thread(self._parser.data_received, chunk)
-                except ParseFailedException:
-                    logging.exception("Chunk Parsing Error")
-                    self.parse_failed = True
+        if self.request.method != "POST" or self.parse_failed:
+            return
+        # Chunks received while the parser is busy are queued and handed
+        # to the next parser call together.  Only wait for the parser when
+        # the backlog grows too large.
+        self._pending_chunks.append(chunk)
+        self._pending_size += len(chunk)
+        if self._parse_task is None or self._parse_task.done():
+            evt_loop = self.server.get_event_loop()
+            self._parse_task = evt_loop.create_task(self._parse_pending())
+        if self._pending_size >= UPLOAD_MAX_PENDING:
+            await self._parse_task
+
+    async def _parse_pending(self) -> None:
+        evt_loop = self.server.get_event_loop()
+        while self._pending_chunks and not self.parse_failed:
+            data = b"".join(self._pending_chunks)
+            self._pending_chunks.clear()
+            self._pending_size = 0
+            try:
+                await evt_loop.run_in_thread(self._parse_data, data)
+            except ParseFailedException:
+                logging.exception("Chunk Parsing Error")
+                self.parse_failed = True
+            except ServerError as e:
+                logging.info(f"Upload Error: {e}")
+                self.parse_error = e
+                self.parse_failed = True
+        self._pending_chunks.clear()
+        self._pending_size = 0
+
+    def _parse_data(self, data: bytes) -> None:
+        if self._body_decoder is None:
+            self._parser.data_received(data)
+            return
+        for piece in self._body_decoder.decompress(data):
+            self._parser.data_received(piece)
 
     async def post(self) -> None:
+        if self._parse_task is not None:
+            await self._parse_task
+        if not self.parse_failed:
+            try:
+                if self._body_decoder is not None:
+                    self._body_decoder.check_complete()
+                self._file.check_complete()
+            except ServerError as e:
+                self.parse_error = e
+                self.parse_failed = True
         if self.parse_failed:
             self._file.on_finish()
             self._remove_temp_file()
+            if self.parse_error is not None:
+                raise tornado.web.HTTPError(
+                    self.parse_error.status_code, str(self.parse_error)
+                )
             raise tornado.web.HTTPError(500, "File Upload Parsing Failed")
         form_args = {}
         chk_target = self._targets.pop('checksum')
-        calc_chksum = self._sha256_target.value.lower()
+        calc_chksum = self._file.value.lower()
         if chk_target.value:
-            # Validate checksum
+            # Validate checksum.  Compressed uploads may provide the checksum
+            # of either the compressed or decompressed file.
             recd_cksum = chk_target.value.decode().lower()
+            if recd_cksum == self._file.encoded_value:
+                calc_chksum = recd_cksum
             if calc_chksum != recd_cksum:
                 self._remove_temp_file()
                 raise tornado.web.HTTPError(
@@ -998,7 +1248,7 @@ class FileUploadHandler(AuthorizedRequestHandler):
                     f"File checksum mismatch: expected {recd_cksum}, "
                     f"calculated {calc_chksum}"
                 )
-        mp_fname: Optional[str] = self._file.multipart_filename
+        mp_fname: Optional[str] = self._file.upload_filename
         if mp_fname is None or not mp_fname.strip():
             self._remove_temp_file()
             raise tornado.web.HTTPError(400, "Multipart filename omitted")
@@ -1007,8 +1257,11 @@ class FileUploadHandler(AuthorizedRequestHandler):
                 form_args[name] = target.value.decode()
         form_args['filename'] = mp_fname
         form_args['tmp_file_path'] = self._file.filename
+        form_args['upload_windows'] = self._file.get_windows()
         debug_msg = "\nFile Upload Arguments:"
         for name, value in form_args.items():
+            if name == "upload_windows":
+                continue
             debug_msg += f"\n{name}: {value}"
         debug_msg += f"\nChecksum: {calc_chksum}"
         form_args["current_user"] = self.current_user
@@ -1047,6 +1300,297 @@ class FileUploadHandler(AuthorizedRequestHandler):
         except Exception:
             pass
 
+@tornado.web.stream_request_body
+class UploadChunkHandler(AuthorizedRequestHandler):
+    def initialize(self, max_upload_size: int = MAX_BODY_SIZE) -> None:
+        super(UploadChunkHandler, self).initialize()
+        self.file_manager: FileManager = self.server.lookup_component(
+            'file_manager')
+        self.max_upload_size = max_upload_size
+        self._session: Optional[UploadSession] = None
+        self._hasher: Optional[hashlib._Hash] = None
+        self._offset: int = 0
+        self._received: int = 0
+        self._pending_chunks: List[bytes] = []
+        self._pending_size: int = 0
+
+    async def prepare(self) -> None:
+        ret = super(UploadChunkHandler, self).prepare()
+        if ret is not None:
+            await ret
+        if self.request.method != "POST":
+            return
+        try:
+            session = self.file_manager.get_upload_session(
+                self.get_argument("session_id", "")
+            )
+            offset = int(self.get_argument("offset", "0"))
+            length = int(self.request.headers.get("Content-Length", -1))
+        except ServerError as e:
+            raise tornado.web.HTTPError(e.status_code, str(e)) from e
+        except ValueError as e:
+            raise tornado.web.HTTPError(400, "Invalid chunk offset or length") from e
+        if session.finalizing:
+            raise tornado.web.HTTPError(409, "Upload session is being finalized")
+        if length < 0:
+            raise tornado.web.HTTPError(411, "Chunk Content-Length required")
+        if offset < 0 or offset + length > session.size:
+            raise tornado.web.HTTPError(
+                416, f"Chunk exceeds upload size of {session.size} bytes"
+            )
+        assert isinstance(self.request.connection, HTTP1Connection)
+        self.request.connection.set_max_body_size(self.max_upload_size)
+        session.touch()
+        session.active_writers += 1
+        self._session = session
+        self._offset = offset
+        self._hasher = session.claim_hash(offset)
+
+    async def data_received(self, chunk: bytes) -> None:
+        if self._session is None:
+            return
+        self._pending_chunks.append(chunk)
+        self._pending_size += len(chunk)
+        if self._pending_size >= UPLOAD_BUFFER_SIZE:
+            await self._write_pending()
+
+    async def _write_pending(self) -> None:
+        session = self._session
+        assert session is not None
+        data = b"".join(self._pending_chunks)
+        self._pending_chunks.clear()
+        self._pending_size = 0
+        if not data:
+            return
+        evt_loop = self.server.get_event_loop()
+        await evt_loop.run_in_thread(
+            self._write_data, session, self._hasher, data
+        )
+        session.touch()
+
+    def _write_data(
+        self, session: UploadSession, hasher: Optional[hashlib._Hash], data: bytes
+    ) -> None:
+        session.write(self._offset + self._received, data)
+        if hasher is not None:
+            hasher.update(data)
+        self._received += len(data)
+
+    async def post(self) -> None:
+        session = self._session
+        assert session is not None
+        try:
+            await self._write_pending()
+        except Exception as e:
+            logging.exception("Upload Chunk Write Error")
+            raise tornado.web.HTTPError(500, "Unable to write chunk") from e
+        if self._session is None:
+            # Connection closed
+            return
+        hasher = self._hasher
+        self._hasher = None
+        end = self._offset + self._received
+        session.release_hash(hasher, end)
+        session.add_range(self._offset, end)
+        self.set_header("Content-Type", "application/json; charset=UTF-8")
+        self.finish(jsonw.dumps({'result': session.get_status()}))
+
+    def on_finish(self) -> None:
+        self._release_session()
+
+    def on_connection_close(self) -> None:
+        self._release_session()
+
+    def _release_session(self) -> None:
+        session = self._session
+        if session is None:
+            return
+        self._session = None
+        session.active_writers -= 1
+        if self._hasher is not None:
+            # The chunk was not completed
+            session.release_hash()
+            self._hasher = None
+
+class UploadTarget(BaseTarget):
+    """
+    Writes the uploaded file using a large buffer, calculating its
+    SHA256 checksum and retaining the header and footer windows read
+    by the metadata parser as the data passes through.
+    """
+    def __init__(self, filename: str, max_size: Optional[int] = None) -> None:
+        super().__init__()
+        self.filename = filename
+        self.max_size = max_size
+        self.size: int = 0
+        self._fd: Optional[BinaryIO] = None
+        self._hash = hashlib.sha256()
+        self._header = bytearray()
+        self._footer = bytearray()
+        self._decoder: Optional[UploadDecoder] = None
+        self._encoded_hash: Optional[hashlib._Hash] = None
+
+    @property
+    def upload_filename(self) -> Optional[str]:
+        # The name of the file written, less any compression extension
+        fname = self.multipart_filename
+        if fname is None or self._decoder is None:
+            return fname
+        return os.path.splitext(fname)[0]
+
+    def on_start(self) -> None:
+        fname = self.multipart_filename or ""
+        base, ext = os.path.splitext(fname.strip())
+        encoding = UPLOAD_ENCODING_EXTS.get(ext.lower())
+        if (
+            encoding is not None and
+            os.path.splitext(base)[1].lower() in DECODABLE_GCODE_EXTS
+        ):
+            if not UploadDecoder.is_supported(encoding):
+                raise ServerError(
+                    f"Unable to decode file '{fname}', {encoding} support "
+                    "is not available", 415
+                )
+            self._decoder = UploadDecoder(encoding, self.max_size)
+            self._encoded_hash = hashlib.sha256()
+        self._fd = open(self.filename, "wb", buffering=UPLOAD_BUFFER_SIZE)
+
+    def on_data_received(self, chunk: bytes) -> None:
+        if self._decoder is None:
+            self._write_data(chunk)
+            return
+        assert self._encoded_hash is not None
+        self._encoded_hash.update(chunk)
+        for piece in self._decoder.decompress(chunk):
+            self._write_data(piece)
+
+    def _write_data(self, chunk: bytes) -> None:
+        if self._fd is not None:
+            self._fd.write(chunk)
+        self._hash.update(chunk)
+        self.size += len(chunk)
+        header_remaining = UPLOAD_WINDOW_SIZE - len(self._header)
+        if header_remaining > 0:
+            self._header += chunk[:header_remaining]
+        self._footer += chunk
+        if len(self._footer) > 2 * UPLOAD_WINDOW_SIZE:
+            del self._footer[:-UPLOAD_WINDOW_SIZE]
+
+    def on_finish(self) -> None:
+        if self._fd is not None:
+            self._fd.close()
+            self._fd = None
+
+    @property
+    def value(self) -> str:
+        return self._hash.hexdigest()
+
+    @property
+    def encoded_value(self) -> Optional[str]:
+        if self._encoded_hash is None:
+            return None
+        return self._encoded_hash.hexdigest()
+
+    def check_complete(self) -> None:
+        if self._decoder is not None:
+            self._decoder.check_complete()
+
+    def get_windows(self) -> Tuple[bytes, bytes]:
+        # The footer window excludes data contained in the header window
+        tail_size = min(UPLOAD_WINDOW_SIZE, max(0, self.size - UPLOAD_WINDOW_SIZE))
+        tail = self._footer[len(self._footer) - tail_size:]
+        return bytes(self._header), bytes(tail)
+
+class UploadDecoder:
+    """
+    Incrementally decompresses a gzip or zstd stream, limiting the
+    size of the decompressed output.
+    """
+    def __init__(self, encoding: str, max_size: Optional[int] = None) -> None:
+        self.encoding = encoding
+        self.max_size = max_size
+        self.size: int = 0
+        self._dobj = self._create_decompressor()
+
+    @staticmethod
+    def is_supported(encoding: str) -> bool:
+        if encoding == "zstd":
+            return ZSTD_MODULE is not None
+        return encoding in ("gzip", "x-gzip")
+
+    def _create_decompressor(self) -> Any:
+        if self.encoding == "zstd":
+            if ZSTD_MODULE == "compression.zstd":
+                return zstd.ZstdDecompressor()
+            return zstandard.ZstdDecompressor().decompressobj()
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def decompress(self, data: bytes) -> Iterator[bytes]:
+        """
+        Yields the decompressed output of "data" in pieces no larger
+        than DECODE_CHUNK_SIZE.  The size limit is checked before each
+        piece is yielded, so a highly compressed payload is rejected
+        without expanding it in memory.
+        """
+        if self._dobj.eof and data:
+            # The previous gzip member or zstd frame ended at the end of
+            # the last chunk, a finished decompressor cannot be reused
+            self._dobj = self._create_decompressor()
+        pending: Union[bytes, memoryview] = data
+        has_more = True
+        while has_more:
+            try:
+                ret, pending, has_more = self._decompress_piece(pending)
+            except Exception as e:
+                raise ServerError(
+                    f"Error decoding {self.encoding} data: {e}", 400
+                )
+            for offset in range(0, len(ret), DECODE_CHUNK_SIZE):
+                piece = ret[offset:offset + DECODE_CHUNK_SIZE]
+                self.size += len(piece)
+                if self.max_size is not None and self.size > self.max_size:
+                    raise ServerError(
+                        "Decompressed upload exceeds maximum size", 413
+                    )
+                yield piece
+
+    def _decompress_piece(
+        self, data: Union[bytes, memoryview]
+    ) -> Tuple[bytes, Union[bytes, memoryview], bool]:
+        # Returns the output, the remaining input, and a flag indicating
+        # that more output may be available
+        dobj = self._dobj
+        if self.encoding != "zstd":
+            ret: bytes = dobj.decompress(data, DECODE_CHUNK_SIZE)
+            if dobj.eof:
+                pending: Union[bytes, memoryview] = dobj.unused_data
+                has_more = bool(pending)
+            else:
+                pending = dobj.unconsumed_tail
+                has_more = bool(pending) or len(ret) == DECODE_CHUNK_SIZE
+        elif ZSTD_MODULE == "compression.zstd":
+            ret = dobj.decompress(data, DECODE_CHUNK_SIZE)
+            pending = dobj.unused_data if dobj.eof else b""
+            has_more = bool(pending) or not (dobj.eof or dobj.needs_input)
+        else:
+            # The "zstandard" decompression object does not accept an
+            # output limit.  Bound the output by feeding the input in
+            # small pieces, the result is split by decompress().
+            view = memoryview(data)
+            ret = dobj.decompress(view[:ZSTD_FEED_SIZE])
+            pending = view[ZSTD_FEED_SIZE:]
+            if dobj.eof:
+                pending = dobj.unused_data + pending
+            has_more = bool(pending)
+        if dobj.eof and pending:
+            # Handle concatenated gzip members and zstd frames
+            self._dobj = self._create_decompressor()
+        return ret, pending, has_more
+
+    def check_complete(self) -> None:
+        if not self._dobj.eof:
+            raise ServerError(f"Incomplete {self.encoding} data received", 400)
+
 # Default Handler for unregistered endpoints
 class AuthorizedErrorHandler(AuthorizedRequestHandler):
     async def prepare(self) -> None:
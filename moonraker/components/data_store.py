@@ -51,7 +51,7 @@ class DataStore:
             self._update_temperature_store)
 
         self.server.register_event_handler(
-            "server:gcode_response", self._update_gcode_store)
+            "server:gcode_response_batch", self._update_gcode_store)
         self.server.register_event_handler(
             "server:klippy_ready", self._init_sensors)
         self.server.register_event_handler(
@@ -148,10 +148,12 @@ class DataStore:
     async def close(self) -> None:
         self.temp_update_timer.stop()
 
-    def _update_gcode_store(self, response: str) -> None:
+    def _update_gcode_store(self, responses: List[str]) -> None:
         curtime = time.time()
-        self.gcode_queue.append(
-            {'message': response, 'time': curtime, 'type': "response"})
+        self.gcode_queue.extend(
+            [{'message': resp, 'time': curtime, 'type': "response"}
+             for resp in responses]
+        )
 
     def _store_gcode_command(self, script: str) -> None:
         curtime = time.time()
@@ -231,7 +231,7 @@ class UnixSocketClient(BaseRemoteConnection):
                 await self.writer.wait_closed()
             except Exception:
                 pass
-        self.message_buf = []
+        self.message_buf.clear()
         for resp in self.pending_responses.values():
             resp.set_exception(
                 self.server.error("Client Socket Disconnected", 500)
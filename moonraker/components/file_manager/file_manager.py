@@ -15,14 +15,19 @@ import asyncio
 import zipfile
 import time
 import math
-import shlex
 import contextlib
+import threading
+import hashlib
+import uuid
+import base64
+import bisect
 from copy import deepcopy
+from dataclasses import dataclass
 from inotify_simple import INotify
 from inotify_simple import flags as iFlags
 from ...utils import source_info
 from ...utils import json_wrapper as jsonw
-from ...common import RequestType, TransportType
+from ...common import RequestType, TransportType, StreamingResponse
 
 # Annotation imports
 from typing import (
@@ -39,20 +44,23 @@ from typing import (
     Callable,
     TypeVar,
     Type,
+    AsyncGenerator,
+    IO,
     cast,
 )
 
 if TYPE_CHECKING:
     from inotify_simple import Event as InotifyEvent
     from ...confighelper import ConfigHelper
-    from ...common import WebRequest, UserInfo
+    from ...common import WebRequest, UserInfo, BaseRemoteConnection
     from ..klippy_connection import KlippyConnection
     from ..job_queue import JobQueue
     from ..job_state import JobState
     from ..secrets import Secrets
     from ..klippy_apis import KlippyAPI as APIComp
     from ..database import MoonrakerDatabase as DBComp
-    from ..shell_command import ShellCommandFactory as SCMDComp
+    from ...server import Server
+    from ..application import MoonrakerApp
     StrOrPath = Union[str, pathlib.Path]
     _T = TypeVar("_T")
 
@@ -61,7 +69,7 @@ METADATA_SCRIPT = os.path.abspath(os.path.join(
     os.path.dirname(__file__), "metadata.py"))
 WATCH_FLAGS = iFlags.CREATE | iFlags.DELETE | iFlags.MODIFY \
     | iFlags.MOVED_TO | iFlags.MOVED_FROM | iFlags.ONLYDIR \
-    | iFlags.CLOSE_WRITE
+    | iFlags.CLOSE_WRITE | iFlags.ATTRIB
 
 class FileManager:
     def __init__(self, config: ConfigHelper) -> None:
@@ -104,15 +112,30 @@ class FileManager:
         self.scheduled_notifications: Dict[str, asyncio.TimerHandle] = {}
         self.fixed_path_args: Dict[str, Any] = {}
         self.queue_gcodes: bool = config.getboolean('queue_gcode_uploads', False)
+        self.upload_session_timeout = config.getfloat(
+            "upload_session_timeout", 3600., above=60.
+        )
+        self.upload_sessions: Dict[str, UploadSession] = {}
+        self.session_gc_timer = self.event_loop.register_timer(
+            self._prune_upload_sessions
+        )
+        self.file_list_indexes: Dict[str, FileListIndex] = {}
         self.check_klipper_path = config.getboolean("check_klipper_config_path", True)
 
         # Register file management endpoints
         self.server.register_endpoint(
             "/server/files/list", RequestType.GET, self._handle_filelist_request
         )
+        self.server.register_endpoint(
+            "/server/files/query", RequestType.GET, self._handle_file_query
+        )
         self.server.register_endpoint(
             "/server/files/metadata", RequestType.GET, self._handle_metadata_request
         )
+        self.server.register_endpoint(
+            "/server/files/metadata/batch", RequestType.POST,
+            self._handle_metadata_batch_request
+        )
         self.server.register_endpoint(
             "/server/files/metascan", RequestType.POST, self._handle_metascan_request
         )
@@ -135,12 +158,28 @@ class FileManager:
         self.server.register_endpoint(
             "/server/files/zip", RequestType.POST, self._handle_zip_files
         )
+        self.server.register_endpoint(
+            "/server/files/zip/download", RequestType.GET | RequestType.POST,
+            self._handle_zip_download, transports=TransportType.HTTP
+        )
+        self.server.register_endpoint(
+            "/server/files/upload/session",
+            RequestType.GET | RequestType.POST | RequestType.DELETE,
+            self._handle_upload_session
+        )
+        self.server.register_endpoint(
+            "/server/files/upload/session/finalize", RequestType.POST,
+            self._handle_upload_session_finalize
+        )
         self.server.register_endpoint(
             "/server/files/delete_file", RequestType.DELETE, self._handle_file_delete,
             transports=TransportType.WEBSOCKET
         )
         # register client notifications
         self.server.register_notification("file_manager:filelist_changed")
+        self.server.register_event_handler(
+            "file_manager:filelist_changed", self._on_filelist_changed
+        )
 
         self.server.register_event_handler(
             "server:klippy_identified", self._update_fixed_paths)
@@ -261,6 +300,7 @@ class FileManager:
 
     def disable_write_access(self):
         self.full_access_roots.clear()
+        self._invalidate_file_index()
 
     def check_write_enabled(self):
         if not self.full_access_roots:
@@ -299,7 +339,9 @@ class FileManager:
                 not os.access(path, os.W_OK, effective_ids=True)
             ):
                 missing_perms.append("WRITE")
-            self.full_access_roots.add(root)
+            if root not in self.full_access_roots:
+                self.full_access_roots.add(root)
+                self._invalidate_file_index(root)
         if missing_perms:
             mpstr = " | ".join(missing_perms)
             self.server.add_log_rollover_item(
@@ -357,8 +399,20 @@ class FileManager:
             res_path = pathlib.Path(res_path)
         res_path = res_path.expanduser().resolve()
         self.reserved_paths[name] = (res_path, read_access)
+        if self.file_paths:
+            # Indexed listings may contain items beneath the new path
+            self.fs_observer.on_reserved_path_added(res_path)
+            self.file_list_indexes.clear()
         return True
 
+    def _invalidate_file_index(self, root: Optional[str] = None) -> None:
+        # Indexed listings store the permissions of each item
+        self.fs_observer.invalidate_index(root)
+        if root is None:
+            self.file_list_indexes.clear()
+        else:
+            self.file_list_indexes.pop(root, None)
+
     def get_directory(self, root: str = "gcodes") -> str:
         return self.file_paths.get(root, "")
 
@@ -420,6 +474,99 @@ class FileManager:
         flist = self.get_file_list(root, list_format=True)
         return cast(List[Dict[str, Any]], flist)
 
+    async def _handle_file_query(
+        self, web_request: WebRequest
+    ) -> Dict[str, Any]:
+        root = web_request.get_str("root", "gcodes")
+        limit = web_request.get_int("limit", FILE_QUERY_DEFAULT_LIMIT)
+        if not 0 < limit <= FILE_QUERY_MAX_LIMIT:
+            raise self.server.error(
+                f"Invalid limit {limit}, must be between 1 and "
+                f"{FILE_QUERY_MAX_LIMIT}"
+            )
+        sort_by = web_request.get_str("sort_by", "name")
+        if sort_by not in FILE_QUERY_SORT_FIELDS:
+            raise self.server.error(f"Invalid sort_by value '{sort_by}'")
+        order = web_request.get_str("order", "asc").lower()
+        if order not in ("asc", "desc"):
+            raise self.server.error(f"Invalid order value '{order}'")
+        cursor = web_request.get_str("cursor", None)
+        is_extended = web_request.get_boolean("extended", False)
+        exts: Optional[List[str]] = web_request.get_list("extensions", None)
+        if exts is not None:
+            exts = [
+                ext.lower() if ext.startswith(".") else f".{ext.lower()}"
+                for ext in exts if ext
+            ]
+        slicer = web_request.get_str("slicer", None)
+        filament_type = web_request.get_str("filament_type", None)
+        name = web_request.get_str("name", None)
+        if root not in self.file_paths:
+            raise self.server.error(f"Invalid root '{root}'", 404)
+        descending = order == "desc"
+        last_key: Optional[Tuple[Any, ...]] = None
+        if cursor is not None:
+            last_key = self._decode_query_cursor(cursor, sort_by, descending)
+        index = self._get_file_list_index(root)
+        file_filter = FileQueryFilter(exts, slicer, filament_type, name)
+        try:
+            paths, next_key = index.query(
+                sort_by, descending, last_key, limit, file_filter
+            )
+        except TypeError:
+            raise self.server.error("Invalid cursor") from None
+        next_cursor: Optional[str] = None
+        if next_key is not None:
+            next_cursor = self._encode_query_cursor(next_key, sort_by, descending)
+        items: List[Dict[str, Any]] = []
+        for path in paths:
+            item: Dict[str, Any] = {"path": path}
+            item.update(index.files[path])
+            if root == "gcodes" and is_extended:
+                item.update(self.gcode_metadata.get(path, {}))
+            items.append(item)
+        return {"items": items, "next_cursor": next_cursor}
+
+    def _encode_query_cursor(
+        self, key: Tuple[Any, ...], sort_by: str, descending: bool
+    ) -> str:
+        data = jsonw.dumps([sort_by, descending, list(key)])
+        return base64.urlsafe_b64encode(data).decode()
+
+    def _decode_query_cursor(
+        self, cursor: str, sort_by: str, descending: bool
+    ) -> Tuple[Any, ...]:
+        try:
+            data = jsonw.loads(base64.urlsafe_b64decode(cursor.encode()))
+            cursor_sort, cursor_desc, key = data
+        except Exception:
+            raise self.server.error("Invalid cursor") from None
+        if not isinstance(key, list):
+            raise self.server.error("Invalid cursor")
+        if cursor_sort != sort_by or cursor_desc != descending:
+            raise self.server.error(
+                "Cursor does not match the requested sort order"
+            )
+        return tuple(key)
+
+    def _get_file_list_index(self, root: str) -> FileListIndex:
+        index = self.file_list_indexes.get(root)
+        if index is not None:
+            return index
+        flist = cast(Dict[str, Dict[str, Any]], self.get_file_list(root))
+        index = FileListIndex(root, flist, self.gcode_metadata)
+        if self.fs_observer.has_fast_observe:
+            # Changes to the file system are only observed when a
+            # fast observer is available, otherwise the index must be
+            # rebuilt for each request
+            self.file_list_indexes[root] = index
+        return index
+
+    def _on_filelist_changed(self, result: Dict[str, Any]) -> None:
+        for key in ("item", "source_item"):
+            item: Dict[str, Any] = result.get(key, {})
+            self.file_list_indexes.pop(item.get("root", ""), None)
+
     async def _handle_metadata_request(self,
                                        web_request: WebRequest
                                        ) -> Dict[str, Any]:
@@ -432,6 +579,43 @@ class FileManager:
         metadata['filename'] = requested_file
         return metadata
 
+    async def _handle_metadata_batch_request(
+        self, web_request: WebRequest
+    ) -> Dict[str, Any]:
+        filenames: Optional[List[str]] = web_request.get_list("filenames", None)
+        directory = web_request.get_str("directory", None)
+        fields: Optional[List[str]] = web_request.get_list("fields", None)
+        if (filenames is None) == (directory is None):
+            raise self.server.error(
+                "Either 'filenames' or 'directory' must be specified"
+            )
+        mdst = self.gcode_metadata
+        if directory is not None:
+            # Metadata is only stored for files that exist, so the
+            # directory's files are resolved from the metadata storage
+            directory = directory.strip("/")
+            filenames = sorted(
+                fname for fname in mdst.metadata.keys()
+                if os.path.dirname(fname) == directory
+            )
+        assert filenames is not None
+        files: List[Dict[str, Any]] = []
+        missing: List[str] = []
+        for fname in filenames:
+            metadata: Optional[Dict[str, Any]] = mdst.metadata.get(fname)
+            if metadata is None:
+                missing.append(fname)
+                continue
+            item: Dict[str, Any] = {"filename": fname}
+            if fields is None:
+                item.update(metadata)
+            else:
+                for field in fields:
+                    if field in metadata:
+                        item[field] = metadata[field]
+            files.append(item)
+        return {"files": files, "missing": missing}
+
     async def _handle_metascan_request(
         self, web_request: WebRequest
     ) -> Dict[str, Any]:
@@ -480,8 +664,10 @@ class FileManager:
             return []
         if "thumbnails" not in metadata:
             return []
-        thumblist: List[Dict[str, Any]] = metadata["thumbnails"]
-        for info in thumblist:
+        thumblist: List[Dict[str, Any]] = []
+        for thumb in metadata["thumbnails"]:
+            info = dict(thumb)
+            thumblist.append(info)
             relpath: Optional[str] = info.pop("relative_path", None)
             if relpath is None:
                 continue
@@ -686,6 +872,67 @@ class FileManager:
                 "action": "zip_files"
             }
 
+    async def _handle_zip_download(
+        self, web_request: WebRequest
+    ) -> StreamingResponse:
+        store_only = web_request.get_boolean("store_only", False)
+        suffix = time.strftime("%Y%m%d-%H%M%S", time.localtime())
+        filename = web_request.get_str("filename", f"collection-{suffix}.zip")
+        if (
+            not filename or os.path.basename(filename) != filename or
+            any(ord(c) < 32 or ord(c) == 127 for c in filename)
+        ):
+            raise self.server.error(f"Invalid archive file name: {filename!r}")
+        items = web_request.get_list("items")
+        if not items:
+            raise self.server.error(
+                "At least one file or directory must be specified"
+            )
+        ZipStream.check_available(self.server)
+        zip_items = await self.event_loop.run_in_thread(
+            self._collect_zip_items, items
+        )
+        ZipStream.check_available(self.server)
+        zstream = ZipStream(
+            self.server, zip_items, filename, store_only,
+            web_request.get_client_connection()
+        )
+        return StreamingResponse(zstream.stream(), "application/zip", filename)
+
+    def _collect_zip_items(self, item_list: List[str]) -> List[ZipItem]:
+        processed: Set[Tuple[int, int]] = set()
+        zip_items: List[ZipItem] = []
+        for item in item_list:
+            root, str_path = self._convert_request_path(item)
+            root_path = pathlib.Path(self.file_paths[root])
+            item_path = pathlib.Path(str_path)
+            self.check_reserved_path(item_path, False)
+            if not item_path.exists():
+                raise self.server.error(
+                    f"No file/directory exits at '{item}'"
+                )
+            if item_path.is_file():
+                children = [item_path]
+            elif item_path.is_dir():
+                children = [
+                    child for child in item_path.iterdir() if child.is_file() and
+                    not self.check_reserved_path(child, False, False)
+                ]
+            else:
+                raise self.server.error(
+                    f"Item at path '{item}' is not a valid file or "
+                    "directory"
+                )
+            for child_path in children:
+                st = child_path.stat()
+                ident = (st.st_dev, st.st_ino)
+                if ident in processed:
+                    continue
+                processed.add(ident)
+                rel_path = child_path.relative_to(root_path.parent)
+                zip_items.append(ZipItem(child_path, str(rel_path), st.st_size))
+        return zip_items
+
     def _zip_files(
         self,
         item_list: List[str],
@@ -696,46 +943,14 @@ class FileManager:
             destination = pathlib.Path(destination).expanduser().resolve()
         tmpdir = pathlib.Path(tempfile.gettempdir())
         temp_dest = tmpdir.joinpath(destination.name)
-        processed: Set[Tuple[int, int]] = set()
+        zip_items = self._collect_zip_items(item_list)
         cptype = zipfile.ZIP_STORED if store_only else zipfile.ZIP_DEFLATED
         with zipfile.ZipFile(str(temp_dest), "w", compression=cptype) as zf:
-            for item in item_list:
-                root, str_path = self._convert_request_path(item)
-                root_path = pathlib.Path(self.file_paths[root])
-                item_path = pathlib.Path(str_path)
-                self.check_reserved_path(item_path, False)
-                if not item_path.exists():
-                    raise self.server.error(
-                        f"No file/directory exits at '{item}'"
-                    )
-                if item_path.is_file():
-                    st = item_path.stat()
-                    ident = (st.st_dev, st.st_ino)
-                    if ident in processed:
-                        continue
-                    processed.add(ident)
-                    rel_path = item_path.relative_to(root_path.parent)
-                    zf.write(str(item_path), arcname=str(rel_path))
+            for zip_item in zip_items:
+                try:
+                    zf.write(str(zip_item.path), arcname=zip_item.arcname)
+                except PermissionError:
                     continue
-                elif not item_path.is_dir():
-                    raise self.server.error(
-                        f"Item at path '{item}' is not a valid file or "
-                        "directory"
-                    )
-                for child_path in item_path.iterdir():
-                    if child_path.is_file():
-                        if self.check_reserved_path(child_path, False, False):
-                            continue
-                        st = child_path.stat()
-                        ident = (st.st_dev, st.st_ino)
-                        if ident in processed:
-                            continue
-                        processed.add(ident)
-                        rel_path = child_path.relative_to(root_path.parent)
-                        try:
-                            zf.write(str(child_path), arcname=str(rel_path))
-                        except PermissionError:
-                            continue
         shutil.move(str(temp_dest), str(destination))
 
     def _list_directory(self,
@@ -747,29 +962,34 @@ class FileManager:
             raise self.server.error(
                 f"Directory does not exist ({path})")
         self.check_reserved_path(path, False)
-        flist: Dict[str, Any] = {'dirs': [], 'files': []}
-        for fname in os.listdir(path):
-            full_path = os.path.join(path, fname)
-            if not os.path.exists(full_path):
-                continue
-            path_info = self.get_path_info(full_path, root)
-            if os.path.isdir(full_path):
-                path_info['dirname'] = fname
-                flist['dirs'].append(path_info)
-            elif os.path.isfile(full_path):
-                path_info['filename'] = fname
-                # Check to see if a filelist update is necessary
+        flist: Dict[str, Any]
+        index = self.fs_observer.list_directory(root, path)
+        if index is not None:
+            flist = dict(index)
+        else:
+            flist = {'dirs': [], 'files': []}
+            for fname in os.listdir(path):
+                full_path = os.path.join(path, fname)
+                if not os.path.exists(full_path):
+                    continue
+                path_info = self.get_path_info(full_path, root)
+                if os.path.isdir(full_path):
+                    path_info['dirname'] = fname
+                    flist['dirs'].append(path_info)
+                elif os.path.isfile(full_path):
+                    path_info['filename'] = fname
+                    flist['files'].append(path_info)
+        if root == "gcodes" and is_extended:
+            for path_info in flist['files']:
+                fname = path_info['filename']
                 ext = os.path.splitext(fname)[-1].lower()
-                if (
-                    root == "gcodes" and
-                    ext in VALID_GCODE_EXTS and
-                    is_extended
-                ):
-                    rel_path = self.get_relative_path(root, full_path)
-                    metadata: Dict[str, Any] = self.gcode_metadata.get(
-                        rel_path, {})
-                    path_info.update(metadata)
-                flist['files'].append(path_info)
+                if ext not in VALID_GCODE_EXTS:
+                    continue
+                rel_path = self.get_relative_path(
+                    root, os.path.join(path, fname)
+                )
+                metadata: Dict[str, Any] = self.gcode_metadata.get(rel_path, {})
+                path_info.update(metadata)
         usage = shutil.disk_usage(path)
         flist['disk_usage'] = usage._asdict()
         flist['root_info'] = {
@@ -817,6 +1037,119 @@ class FileManager:
             tempfile.gettempdir(),
             f"moonraker.upload-{loop_time}.mru")
 
+    async def _handle_upload_session(
+        self, web_request: WebRequest
+    ) -> Dict[str, Any]:
+        req_type = web_request.get_request_type()
+        if req_type == RequestType.POST:
+            return await self._create_upload_session(web_request)
+        session = self.get_upload_session(web_request.get_str("session_id"))
+        if req_type == RequestType.DELETE:
+            await self._remove_upload_session(session)
+            return {"session_id": session.session_id, "action": "cancelled"}
+        session.touch()
+        return session.get_status()
+
+    async def _create_upload_session(
+        self, web_request: WebRequest
+    ) -> Dict[str, Any]:
+        self.check_write_enabled()
+        if len(self.upload_sessions) >= MAX_UPLOAD_SESSIONS:
+            raise self.server.error("Too many active upload sessions", 429)
+        size = web_request.get_int("size")
+        app: MoonrakerApp = self.server.lookup_component("application")
+        if size < 0 or size > app.max_upload_size:
+            raise self.server.error(f"Invalid upload size: {size}", 413)
+        form_args: Dict[str, Any] = {
+            "filename": web_request.get_str("filename"),
+            "root": web_request.get_str("root", "gcodes"),
+            "path": web_request.get_str("path", ""),
+            "print": str(web_request.get_boolean("print", False)).lower(),
+            "current_user": web_request.get_current_user()
+        }
+        checksum = web_request.get_str("checksum", None)
+        session_id = uuid.uuid4().hex
+        tmp_path = f"{self.gen_temp_upload_path()}.{session_id}"
+        # Validate the destination before any data is received
+        upload_info = self._parse_upload_args(
+            dict(form_args, tmp_file_path=tmp_path)
+        )
+        self.check_reserved_path(upload_info["dest_path"], True)
+        if upload_info["root"] not in self.full_access_roots:
+            raise self.server.error(f"Invalid root request: {upload_info['root']}")
+        session = UploadSession(session_id, tmp_path, size, form_args, checksum)
+        try:
+            await self.event_loop.run_in_thread(session.open)
+        except Exception as e:
+            raise self.server.error(f"Unable to create upload session: {e}") from e
+        self.upload_sessions[session_id] = session
+        self.session_gc_timer.start(delay=UPLOAD_SESSION_PRUNE_INTERVAL)
+        logging.info(
+            f"Upload session {session_id} created for {form_args['filename']}, "
+            f"size: {size}"
+        )
+        ret = session.get_status()
+        ret["chunk_size"] = UPLOAD_SESSION_CHUNK_SIZE
+        ret["timeout"] = self.upload_session_timeout
+        return ret
+
+    async def _handle_upload_session_finalize(
+        self, web_request: WebRequest
+    ) -> Dict[str, Any]:
+        session = self.get_upload_session(web_request.get_str("session_id"))
+        checksum = web_request.get_str("checksum", session.checksum)
+        if session.finalizing:
+            raise self.server.error("Upload session is being finalized", 409)
+        if session.active_writers or not session.is_complete():
+            raise self.server.error(
+                f"Upload incomplete, received {session.received_size} of "
+                f"{session.size} bytes", 409
+            )
+        session.finalizing = True
+        try:
+            calc_chksum = await self.event_loop.run_in_thread(session.finish_hash)
+            if checksum is not None and checksum.lower() != calc_chksum:
+                raise self.server.error(
+                    f"File checksum mismatch: expected {checksum.lower()}, "
+                    f"calculated {calc_chksum}", 422
+                )
+            await self.event_loop.run_in_thread(session.close)
+            form_args = dict(session.form_args, tmp_file_path=session.tmp_path)
+            logging.info(
+                f"Finalizing upload session {session.session_id}: "
+                f"{form_args['filename']}, checksum: {calc_chksum}"
+            )
+            self.upload_sessions.pop(session.session_id, None)
+            if not self.upload_sessions:
+                self.session_gc_timer.stop()
+            return await self.finalize_upload(form_args)
+        except Exception:
+            if session.session_id in self.upload_sessions:
+                session.finalizing = False
+            raise
+
+    def get_upload_session(self, session_id: str) -> UploadSession:
+        session = self.upload_sessions.get(session_id)
+        if session is None:
+            raise self.server.error(f"Upload session {session_id} not found", 404)
+        return session
+
+    async def _remove_upload_session(self, session: UploadSession) -> None:
+        self.upload_sessions.pop(session.session_id, None)
+        if not self.upload_sessions:
+            self.session_gc_timer.stop()
+        await self.event_loop.run_in_thread(session.remove)
+
+    async def _prune_upload_sessions(self, eventtime: float) -> float:
+        now = time.monotonic()
+        for session in list(self.upload_sessions.values()):
+            if session.finalizing or session.active_writers:
+                continue
+            if now - session.last_active > self.upload_session_timeout:
+                logging.info(f"Upload session {session.session_id} expired")
+                await self._remove_upload_session(session)
+        return eventtime + UPLOAD_SESSION_PRUNE_INTERVAL
+
     async def finalize_upload(self,
                               form_args: Dict[str, Any]
                               ) -> Dict[str, Any]:
@@ -886,6 +1219,7 @@ class FileManager:
             'dir_path': dir_path,
             'dest_path': dest_path,
             'tmp_file_path': upload_args['tmp_file_path'],
+            'upload_windows': upload_args.get('upload_windows'),
             'start_print': start_print,
             'unzip_ufp': unzip_ufp,
             'ext': f_ext,
@@ -972,6 +1306,10 @@ class FileManager:
                     upload_info['tmp_file_path'], dest_path)
                 finfo = self.get_path_info(upload_info['dest_path'],
                                            upload_info['root'])
+                if upload_info["upload_windows"] is not None:
+                    # Header and footer data captured during the upload,
+                    # the metadata parser does not need to read the file
+                    finfo["upload_windows"] = upload_info["upload_windows"]
         except Exception:
             logging.exception("Upload Write Error")
             raise self.server.error("Unable to save file", 500)
@@ -981,16 +1319,48 @@ class FileManager:
                       root: str,
                       list_format: bool = False
                       ) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
-        # Use os.walk find files in sd path and subdirs
-        filelist: Dict[str, Any] = {}
+        filelist: Optional[Dict[str, Any]] = None
         path = self.file_paths.get(root, None)
         if path is None or not os.path.isdir(path):
             msg = f"Failed to build file list, invalid path: {root}: {path}"
             logging.info(msg)
             raise self.server.error(msg)
+        if not self._has_readable_reserved_subpath(path):
+            # Use the observer's file index when available
+            exts = VALID_GCODE_EXTS if root == "gcodes" else None
+            filelist = self.fs_observer.list_files(root, exts)
+        if filelist is None:
+            filelist = self._walk_file_list(root, path)
+        if list_format:
+            flist: List[Dict[str, Any]] = []
+            for fname in sorted(filelist, key=str.lower):
+                fdict: Dict[str, Any] = {'path': fname}
+                fdict.update(filelist[fname])
+                flist.append(fdict)
+            return flist
+        return filelist
+
+    def _walk_file_list(self, root: str, path: str) -> Dict[str, Any]:
+        filelist: Dict[str, Any] = {}
         logging.info(f"Updating File List <{root}>...")
+        exts = VALID_GCODE_EXTS if root == "gcodes" else None
+        self.walk_directory(root, path, filelist, exts=exts)
+        return filelist
+
+    def walk_directory(
+        self,
+        root: str,
+        path: str,
+        filelist: Dict[str, Any],
+        prefix: str = "",
+        exts: Optional[List[str]] = None,
+        visited_dirs: Optional[Set[Tuple[int, int]]] = None
+    ) -> None:
+        # Use os.walk find files in path and subdirs
         st = os.stat(path)
-        visited_dirs = {(st.st_dev, st.st_ino)}
+        if visited_dirs is None:
+            visited_dirs = set()
+        visited_dirs.add((st.st_dev, st.st_ino))
         for dir_path, dir_names, files in os.walk(path, followlinks=True):
             scan_dirs: List[str] = []
             # Filter out directories that have already been visited. This
@@ -1008,22 +1378,23 @@ class FileManager:
             dir_names[:] = scan_dirs
             for name in files:
                 ext = os.path.splitext(name)[-1].lower()
-                if root == 'gcodes' and ext not in VALID_GCODE_EXTS:
+                if exts is not None and ext not in exts:
                     continue
                 full_path = os.path.join(dir_path, name)
                 if not os.path.exists(full_path):
                     continue
-                fname = full_path[len(path) + 1:]
+                fname = prefix + full_path[len(path) + 1:]
                 finfo = self.get_path_info(full_path, root)
                 filelist[fname] = finfo
-        if list_format:
-            flist: List[Dict[str, Any]] = []
-            for fname in sorted(filelist, key=str.lower):
-                fdict: Dict[str, Any] = {'path': fname}
-                fdict.update(filelist[fname])
-                flist.append(fdict)
-            return flist
-        return filelist
+
+    def _has_readable_reserved_subpath(self, path: str) -> bool:
+        # Readable reserved folders are not watched, however their
+        # contents are included in file lists
+        root_path = pathlib.Path(path).resolve()
+        for res_path, can_read in self.reserved_paths.values():
+            if can_read and root_path in res_path.parents:
+                return True
+        return False
 
     def get_file_metadata(self, filename: str) -> Dict[str, Any]:
         if filename[0] == '/':
@@ -1136,8 +1507,426 @@ class FileManager:
         for hdl in self.scheduled_notifications.values():
             hdl.cancel()
         self.scheduled_notifications.clear()
+        self.session_gc_timer.stop()
+        for session in self.upload_sessions.values():
+            session.remove()
+        self.upload_sessions.clear()
         self.fs_observer.close()
+        self.gcode_metadata.close()
+
+
+FILE_QUERY_DEFAULT_LIMIT = 100
+FILE_QUERY_MAX_LIMIT = 1000
+# Maps sort fields to the file info or metadata field used as the key
+FILE_QUERY_SORT_FIELDS = {
+    "name": "",
+    "modified": "modified",
+    "size": "size",
+    "print_time": "estimated_time",
+    "last_printed": "print_start_time"
+}
+
+@dataclass(frozen=True)
+class FileQueryFilter:
+    extensions: Optional[List[str]] = None
+    slicer: Optional[str] = None
+    filament_type: Optional[str] = None
+    name: Optional[str] = None
+
+    def match(self, path: str, metadata: Optional[Dict[str, Any]]) -> bool:
+        if self.extensions is not None:
+            if os.path.splitext(path)[-1].lower() not in self.extensions:
+                return False
+        if self.name is not None and self.name.lower() not in path.lower():
+            return False
+        if self.slicer is not None:
+            slicer = (metadata or {}).get("slicer")
+            if not isinstance(slicer, str) or slicer.lower() != self.slicer.lower():
+                return False
+        if self.filament_type is not None:
+            ftype: Union[str, List[str], None]
+            ftype = (metadata or {}).get("filament_type")
+            if isinstance(ftype, str):
+                ftype = ftype.split(";")
+            if not isinstance(ftype, list):
+                return False
+            req_type = self.filament_type.lower()
+            if req_type not in [str(ft).strip().lower() for ft in ftype]:
+                return False
+        return True
+
+    @property
+    def uses_metadata(self) -> bool:
+        return self.slicer is not None or self.filament_type is not None
+
+
+class FileListIndex:
+    """
+    A snapshot of a root's file list with sort orders built on demand.  Each
+    order is a list of sort keys with a parallel list of paths, allowing a
+    cursor (the key of the last item returned) to be located by bisection.
+    """
+    def __init__(
+        self,
+        root: str,
+        files: Dict[str, Dict[str, Any]],
+        gcode_metadata: MetadataStorage
+    ) -> None:
+        self.root = root
+        self.files = files
+        self.gcode_metadata = gcode_metadata
+        self.orders: Dict[
+            Tuple[str, bool], Tuple[int, List[Tuple[Any, ...]], List[str]]
+        ] = {}
 
+    def _get_metadata(self, path: str) -> Optional[Dict[str, Any]]:
+        if self.root != "gcodes":
+            return None
+        return self.gcode_metadata.metadata.get(path)
+
+    def _build_order(
+        self, sort_by: str, descending: bool
+    ) -> Tuple[List[Tuple[Any, ...]], List[str]]:
+        field = FILE_QUERY_SORT_FIELDS[sort_by]
+        if not field:
+            descending = False
+        revision = self.gcode_metadata.revision
+        okey = (sort_by, descending)
+        if okey in self.orders:
+            order_rev, keys, paths = self.orders[okey]
+            if sort_by in ("modified", "size") or order_rev == revision:
+                return keys, paths
+        entries: List[Tuple[Any, ...]] = []
+        for path, finfo in self.files.items():
+            if not field:
+                entries.append((path.lower(), path))
+                continue
+            if field in finfo:
+                value = finfo[field]
+            else:
+                value = (self._get_metadata(path) or {}).get(field)
+            if not isinstance(value, (int, float)):
+                # Items without a value are placed at the end of the list,
+                # the flag is inverted for descending orders as they are
+                # traversed in reverse.
+                entries.append((int(not descending), 0, path.lower(), path))
+            else:
+                entries.append((int(descending), value, path.lower(), path))
+        entries.sort()
+        keys = entries
+        paths = [entry[-1] for entry in entries]
+        self.orders[okey] = (revision, keys, paths)
+        return keys, paths
+
+    def query(
+        self,
+        sort_by: str,
+        descending: bool,
+        last_key: Optional[Tuple[Any, ...]],
+        limit: int,
+        file_filter: FileQueryFilter
+    ) -> Tuple[List[str], Optional[Tuple[Any, ...]]]:
+        # Raises a TypeError if the supplied key does not match the order
+        keys, paths = self._build_order(sort_by, descending)
+        count = len(keys)
+        if last_key is None:
+            idx = count - 1 if descending else 0
+        elif descending:
+            idx = bisect.bisect_left(keys, last_key) - 1
+        else:
+            idx = bisect.bisect_right(keys, last_key)
+        step = -1 if descending else 1
+        result: List[str] = []
+        while 0 <= idx < count:
+            path = paths[idx]
+            mdata = self._get_metadata(path) if file_filter.uses_metadata else None
+            if file_filter.match(path, mdata):
+                result.append(path)
+                if len(result) == limit:
+                    break
+            idx += step
+        if len(result) == limit and 0 <= idx + step < count:
+            return result, keys[idx]
+        return result, None
+
+
+UPLOAD_SESSION_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_SESSION_PRUNE_INTERVAL = 60.
+MAX_UPLOAD_SESSIONS = 8
+
+class UploadSession:
+    """
+    Tracks a resumable upload.  Chunks may be written in any order.  The
+    SHA256 checksum is calculated as contiguous data is received from the
+    start of the file.  Any remainder is read back from disk when the
+    session is finalized.
+    """
+    def __init__(
+        self,
+        session_id: str,
+        tmp_path: str,
+        size: int,
+        form_args: Dict[str, Any],
+        checksum: Optional[str] = None
+    ) -> None:
+        self.session_id = session_id
+        self.tmp_path = tmp_path
+        self.size = size
+        self.form_args = form_args
+        self.checksum = checksum
+        self.received: List[List[int]] = []
+        self.last_active = time.monotonic()
+        self.active_writers: int = 0
+        self.finalizing: bool = False
+        self.hash_offset: int = 0
+        self.hash_claimed: bool = False
+        self._hash = hashlib.sha256()
+        self._fd: Optional[int] = None
+
+    @property
+    def received_size(self) -> int:
+        return sum(end - start for start, end in self.received)
+
+    def touch(self) -> None:
+        self.last_active = time.monotonic()
+
+    def is_complete(self) -> bool:
+        if self.size == 0:
+            return True
+        return self.received == [[0, self.size]]
+
+    def open(self) -> None:
+        self._fd = os.open(
+            self.tmp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644
+        )
+        os.ftruncate(self._fd, self.size)
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def remove(self) -> None:
+        self.close()
+        with contextlib.suppress(OSError):
+            os.remove(self.tmp_path)
+
+    def write(self, offset: int, data: bytes) -> None:
+        if self._fd is None:
+            raise IOError("Upload session closed")
+        view = memoryview(data)
+        while view:
+            written = os.pwrite(self._fd, view, offset)
+            view = view[written:]
+            offset += written
+
+    def add_range(self, start: int, end: int) -> None:
+        if start >= end:
+            return
+        ranges = self.received + [[start, end]]
+        ranges.sort()
+        merged: List[List[int]] = [ranges[0]]
+        for rng in ranges[1:]:
+            if rng[0] <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], rng[1])
+            else:
+                merged.append(rng)
+        self.received = merged
+
+    def claim_hash(self, offset: int) -> Optional[hashlib._Hash]:
+        # A chunk starting at the current hash offset may update the
+        # checksum as it is received
+        if self.hash_claimed or offset != self.hash_offset:
+            return None
+        self.hash_claimed = True
+        return self._hash.copy()
+
+    def release_hash(
+        self, hasher: Optional[hashlib._Hash] = None, end: int = 0
+    ) -> None:
+        self.hash_claimed = False
+        if hasher is not None and end > self.hash_offset:
+            self._hash = hasher
+            self.hash_offset = end
+
+    def finish_hash(self) -> str:
+        if self._fd is None:
+            raise IOError("Upload session closed")
+        while self.hash_offset < self.size:
+            size = min(UPLOAD_SESSION_CHUNK_SIZE, self.size - self.hash_offset)
+            data = os.pread(self._fd, size, self.hash_offset)
+            if not data:
+                raise IOError("Unexpected end of upload file")
+            self._hash.update(data)
+            self.hash_offset += len(data)
+        return self._hash.hexdigest()
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "filename": self.form_args["filename"],
+            "root": self.form_args["root"],
+            "size": self.size,
+            "received": [list(rng) for rng in self.received],
+            "received_size": self.received_size,
+            "complete": self.is_complete()
+        }
+
+
+ZIP_STREAM_CHUNK_SIZE = 64 * 1024
+ZIP_STREAM_MAX_CHUNKS = 16
+ZIP_STREAM_MAX_STREAMS = 2
+ZIP_PROGRESS_INTERVAL = .5
+
+@dataclass(frozen=True)
+class ZipItem:
+    path: pathlib.Path
+    arcname: str
+    size: int
+
+class ZipStream:
+    """
+    Builds a zip archive in a dedicated thread and yields it in chunks as
+    it is written.  ZipFile writes data descriptors when its file object
+    is not seekable, so no temporary file is required.  At most
+    ZIP_STREAM_MAX_CHUNKS chunks are buffered before the thread waits
+    for the client.  A stream is counted against ZIP_STREAM_MAX_STREAMS
+    from the time iteration begins until its thread exits, a stream that
+    is never iterated does not hold a slot.
+    """
+    active_streams: int = 0
+
+    def __init__(
+        self,
+        server: Server,
+        items: List[ZipItem],
+        filename: str,
+        store_only: bool = False,
+        connection: Optional[BaseRemoteConnection] = None
+    ) -> None:
+        self.server = server
+        self.event_loop = server.get_event_loop()
+        self.items = items
+        self.filename = filename
+        self.compression = zipfile.ZIP_STORED if store_only else zipfile.ZIP_DEFLATED
+        self.connection = connection
+        self.total_size = sum(item.size for item in items)
+        self.processed_size = 0
+        self.last_progress_time = 0.
+        self.chunk_queue: asyncio.Queue[Union[bytes, int, None]] = asyncio.Queue()
+        self.chunk_slots = threading.Semaphore(ZIP_STREAM_MAX_CHUNKS)
+        self.cancelled = threading.Event()
+        self.buffer = bytearray()
+        self.error: Optional[Exception] = None
+
+    @classmethod
+    def check_available(cls, server: Server) -> None:
+        if cls.active_streams >= ZIP_STREAM_MAX_STREAMS:
+            raise server.error(
+                "Maximum number of zip downloads in progress", 503
+            )
+
+    # File object interface used by ZipFile in the worker thread
+    def write(self, data: bytes) -> int:
+        self.buffer += data
+        if len(self.buffer) >= ZIP_STREAM_CHUNK_SIZE:
+            self._send_chunk()
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def _send_chunk(self) -> None:
+        while not self.chunk_slots.acquire(timeout=1.):
+            if self.cancelled.is_set():
+                break
+        if self.cancelled.is_set():
+            raise self.server.error("Zip stream cancelled")
+        chunk = bytes(self.buffer)
+        self.buffer.clear()
+        self._queue_item(chunk)
+
+    def _queue_item(self, item: Union[bytes, int, None]) -> None:
+        aioloop = self.event_loop.asyncio_loop
+        aioloop.call_soon_threadsafe(self.chunk_queue.put_nowait, item)
+
+    def _build_archive(self) -> None:
+        try:
+            zfobj = cast(IO[bytes], self)
+            with zipfile.ZipFile(zfobj, "w", compression=self.compression) as zf:
+                for idx, item in enumerate(self.items):
+                    try:
+                        zf.write(str(item.path), arcname=item.arcname)
+                    except (PermissionError, FileNotFoundError):
+                        logging.info(f"Zip stream: unable to read {item.path}")
+                    self._queue_item(idx)
+            if self.buffer:
+                self._send_chunk()
+        except Exception as e:
+            self.error = e
+        finally:
+            self._queue_item(None)
+
+    def _notify_progress(self, index: int) -> None:
+        item = self.items[index]
+        self.processed_size += item.size
+        conn = self.connection
+        if (
+            conn is None or conn.is_closed or
+            not conn.accepts_notification("zip_progress", "file_manager")
+        ):
+            return
+        # Limit the notification rate, the final file is always reported
+        now = self.event_loop.get_loop_time()
+        completed = index + 1
+        if (
+            completed < len(self.items) and
+            now - self.last_progress_time < ZIP_PROGRESS_INTERVAL
+        ):
+            return
+        self.last_progress_time = now
+        root, _, path = item.arcname.partition("/")
+        conn.call_method(
+            "notify_zip_progress",
+            [{
+                "filename": self.filename,
+                "item": {"root": root, "path": path},
+                "completed_files": completed,
+                "total_files": len(self.items),
+                "processed_size": self.processed_size,
+                "total_size": self.total_size
+            }]
+        )
+
+    async def stream(self) -> AsyncGenerator[bytes, None]:
+        ZipStream.check_available(self.server)
+        ZipStream.active_streams += 1
+        thread = threading.Thread(
+            target=self._build_archive, name="zip-stream", daemon=True
+        )
+        complete = False
+        try:
+            thread.start()
+            while True:
+                item = await self.chunk_queue.get()
+                if item is None:
+                    break
+                elif isinstance(item, int):
+                    self._notify_progress(item)
+                    continue
+                self.chunk_slots.release()
+                yield item
+            complete = True
+            if self.error is not None:
+                raise self.error
+        finally:
+            if not complete and thread.is_alive():
+                # The stream was closed early, wake the thread so it can exit
+                self.cancelled.set()
+                self.chunk_slots.release()
+                while await self.chunk_queue.get() is not None:
+                    pass
+            ZipStream.active_streams -= 1
 
 class NotifySyncLock(asyncio.Lock):
     def __init__(self, config: ConfigHelper) -> None:
@@ -1356,13 +2145,18 @@ class BaseFileSystemObserver:
             else:
                 self.gcode_metadata.remove_file_metadata(rel_path)
 
-    def parse_gcode_metadata(self, file_path: str) -> asyncio.Event:
+    def parse_gcode_metadata(
+        self, file_path: str, path_info: Optional[Dict[str, Any]] = None
+    ) -> asyncio.Event:
         rel_path = self.file_manager.get_relative_path("gcodes", file_path)
         ext = os.path.splitext(rel_path)[-1].lower()
-        try:
-            path_info = self.file_manager.get_path_info(file_path, "gcodes")
-        except Exception:
-            path_info = {}
+        if path_info is not None:
+            path_info = dict(path_info)
+        else:
+            try:
+                path_info = self.file_manager.get_path_info(file_path, "gcodes")
+            except Exception:
+                path_info = {}
         if (
             ext not in VALID_GCODE_EXTS or
             path_info.get('size', 0) == 0
@@ -1464,6 +2258,24 @@ class BaseFileSystemObserver:
             return
         self.clear_metadata(root, str(item_path), is_dir)
 
+    def list_files(
+        self, root: str, exts: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Dict[str, Any]]]:
+        # Observers that do not maintain a file index return None,
+        # requiring the caller to walk the file system
+        return None
+
+    def list_directory(
+        self, root: str, dir_path: str
+    ) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        return None
+
+    def invalidate_index(self, root: Optional[str] = None) -> None:
+        pass
+
+    def on_reserved_path_added(self, res_path: pathlib.Path) -> None:
+        pass
+
     def close(self) -> None:
         pass
 
@@ -1488,6 +2300,11 @@ class InotifyNode:
         self.pending_file_events: Dict[str, str] = {}
         self.queued_move_notificatons: List[List[str]] = []
         self.is_processing_metadata = False
+        # In-memory index of this directory.  A value of None indicates
+        # that the item has changed and its path info must be refreshed.
+        self.node_info: Optional[Dict[str, Any]] = None
+        self.file_info: Dict[str, Optional[Dict[str, Any]]] = {}
+        self.unwatched_dirs: Dict[str, Optional[Dict[str, Any]]] = {}
 
     async def _finish_create_node(self) -> None:
         # Finish a node's creation.  All children that were created
@@ -1541,20 +2358,173 @@ class InotifyNode:
             return []
         metadata_events: List[asyncio.Event] = []
         visited_dirs.add((st.st_dev, st.st_ino))
+        fm = self.iobsvr.file_manager
+        root = self.get_root()
         for fname in os.listdir(dir_path):
             item_path = os.path.join(dir_path, fname)
             if os.path.isdir(item_path):
-                fm = self.iobsvr.file_manager
                 if fm.check_reserved_path(item_path, True, False):
+                    self.unwatched_dirs[fname] = None
                     continue
                 new_child = self.create_child_node(fname, False)
                 if new_child is not None:
                     metadata_events.extend(new_child.scan_node(visited_dirs))
-            elif os.path.isfile(item_path) and self.get_root() == "gcodes":
-                mevt = self.iobsvr.parse_gcode_metadata(item_path)
-                metadata_events.append(mevt)
+            elif os.path.isfile(item_path):
+                path_info: Optional[Dict[str, Any]] = None
+                with contextlib.suppress(Exception):
+                    path_info = fm.get_path_info(item_path, root)
+                if os.path.islink(item_path):
+                    # Changes to a link target are not observed, the
+                    # index refreshes linked files on every request
+                    self.file_info[fname] = None
+                else:
+                    self.file_info[fname] = path_info
+                if root == "gcodes":
+                    mevt = self.iobsvr.parse_gcode_metadata(item_path, path_info)
+                    metadata_events.append(mevt)
         return metadata_events
 
+    def add_unwatched_dir(self, dir_name: str) -> None:
+        self.node_info = None
+        self.unwatched_dirs[dir_name] = None
+
+    def remove_unwatched_dir(self, dir_name: str) -> None:
+        self.node_info = None
+        self.unwatched_dirs.pop(dir_name, None)
+
+    def unwatch_child_node(self, name: str) -> None:
+        # Reserved directories are not watched, their contents are
+        # excluded from the index
+        child = self.pop_child_node(name)
+        if child is None:
+            return
+        child.clear_events()
+        child.clear_watches()
+        self.add_unwatched_dir(name)
+
+    def mark_file_changed(self, file_name: str) -> None:
+        self.node_info = None
+        self.file_info[file_name] = None
+
+    def remove_file_info(self, file_name: str) -> None:
+        self.node_info = None
+        self.file_info.pop(file_name, None)
+
+    def invalidate_index(self) -> None:
+        self.node_info = None
+        for name in self.file_info:
+            self.file_info[name] = None
+        for name in self.unwatched_dirs:
+            self.unwatched_dirs[name] = None
+        for child in self.child_nodes.values():
+            child.invalidate_index()
+
+    def get_node_info(self) -> Dict[str, Any]:
+        if self.node_info is None:
+            fm = self.iobsvr.file_manager
+            self.node_info = fm.get_path_info(self.get_path(), self.get_root())
+        return self.node_info
+
+    def get_file_info(
+        self, index: Dict[str, Optional[Dict[str, Any]]], name: str
+    ) -> Optional[Dict[str, Any]]:
+        info = index.get(name)
+        if info is None:
+            full_path = os.path.join(self.get_path(), name)
+            is_dir = index is self.unwatched_dirs
+            if is_dir and not os.path.isdir(full_path):
+                return None
+            elif not is_dir and not os.path.isfile(full_path):
+                # The file may be a broken symbolic link or a link
+                # to a folder.  Leave its entry in place, the next
+                # request will check again.
+                return None
+            fm = self.iobsvr.file_manager
+            try:
+                info = fm.get_path_info(full_path, self.get_root())
+            except Exception:
+                return None
+            if not os.path.islink(full_path):
+                index[name] = info
+        return info
+
+    def list_files(
+        self,
+        file_list: Dict[str, Dict[str, Any]],
+        prefix: str = "",
+        exts: Optional[List[str]] = None
+    ) -> None:
+        for name in list(self.file_info.keys()):
+            if exts is not None and os.path.splitext(name)[-1].lower() not in exts:
+                continue
+            info = self.get_file_info(self.file_info, name)
+            if info is not None:
+                file_list[f"{prefix}{name}"] = dict(info)
+        for child_name, child in self.child_nodes.items():
+            child.list_files(file_list, f"{prefix}{child_name}/", exts)
+        for dir_name in list(self.unwatched_dirs.keys()):
+            self._walk_unwatched_dir(dir_name, file_list, prefix, exts)
+
+    def _walk_unwatched_dir(
+        self,
+        dir_name: str,
+        file_list: Dict[str, Dict[str, Any]],
+        prefix: str,
+        exts: Optional[List[str]]
+    ) -> None:
+        # Directories that cannot be watched, such as a link to a folder
+        # in another root, are walked on each request.  Reserved folders
+        # and folders already watched by this root are excluded, the latter
+        # are listed by the watched node.
+        fm = self.iobsvr.file_manager
+        dir_path = os.path.join(self.get_path(), dir_name)
+        if (
+            not os.path.isdir(dir_path) or
+            fm.check_reserved_path(dir_path, False, False)
+        ):
+            return
+        root = self.get_root()
+        node = self.iobsvr.get_watched_node(dir_path)
+        if node is not None and node.get_root() == root:
+            return
+        root_path = self.iobsvr.watched_roots[root].get_path()
+        st = os.stat(root_path)
+        fm.walk_directory(
+            root, dir_path, file_list, f"{prefix}{dir_name}/", exts,
+            {(st.st_dev, st.st_ino)}
+        )
+
+    def list_directory(self) -> Dict[str, List[Dict[str, Any]]]:
+        dirs: List[Dict[str, Any]] = []
+        files: List[Dict[str, Any]] = []
+        for name, child in self.child_nodes.items():
+            try:
+                info = dict(child.get_node_info())
+            except Exception:
+                continue
+            info["dirname"] = name
+            dirs.append(info)
+        for name in list(self.unwatched_dirs.keys()):
+            dinfo = self.get_file_info(self.unwatched_dirs, name)
+            if dinfo is not None:
+                dirs.append(dict(dinfo, dirname=name))
+        for name in list(self.file_info.keys()):
+            finfo = self.get_file_info(self.file_info, name)
+            if finfo is not None:
+                files.append(dict(finfo, filename=name))
+        return {"dirs": dirs, "files": files}
+
+    def find_node(self, rel_path: str) -> Optional[InotifyNode]:
+        node: InotifyNode = self
+        for part in pathlib.PurePosixPath(rel_path).parts:
+            if part == ".":
+                continue
+            child = node.get_child_node(part)
+            if child is None:
+                return None
+            node = child
+        return node
+
     def move_child_node(
         self,
         child_name: str,
@@ -1572,6 +2542,10 @@ class InotifyNode:
         new_parent.add_child_node(child_node)
         new_path = child_node.get_path()
         new_root = child_node.get_root()
+        self.node_info = None
+        new_parent.node_info = None
+        if new_root != prev_root:
+            child_node.invalidate_index()
         logging.debug(f"Moving node from '{prev_path}' to '{new_path}'")
         # Attempt to move metadata
         move_res = self.iobsvr.try_move_metadata(
@@ -1656,12 +2630,15 @@ class InotifyNode:
         self.flush_delete()
         if name in self.child_nodes:
             return self.child_nodes[name]
+        self.node_info = None
         try:
             new_child = InotifyNode(self.iobsvr, self, name)
         except Exception:
             # This node is already watched under another root,
             # bypass creation
+            self.unwatched_dirs[name] = None
             return None
+        self.unwatched_dirs.pop(name, None)
         self.child_nodes[name] = new_child
         if notify:
             pending_node = self.search_pending_event("create_node")
@@ -1673,13 +2650,17 @@ class InotifyNode:
         return new_child
 
     def schedule_child_delete(self, child_name: str, is_node: bool) -> None:
+        self.node_info = None
         if is_node:
+            self.unwatched_dirs.pop(child_name, None)
             child_node = self.child_nodes.pop(child_name, None)
             if child_node is None:
                 return
             self.iobsvr.remove_watch(
                 child_node.watch_desc, need_low_level_rm=False)
             child_node.remove_event("delete_child")
+        else:
+            self.file_info.pop(child_name, None)
         self.pending_deleted_children.add((child_name, is_node))
         self.add_event("delete_child", INOTIFY_BUNDLE_TIME)
 
@@ -1781,6 +2762,7 @@ class InotifyRootNode(InotifyNode):
                  root_path: str
                  ) -> None:
         self.root_name = root_name
+        self.is_indexed = False
         super().__init__(iobsvr, self, root_path)
 
     def get_path(self) -> str:
@@ -1822,6 +2804,8 @@ class InotifyObserver(BaseFileSystemObserver):
             self.inotify.fileno(), self._handle_inotify_read)
         self.watched_roots: Dict[str, InotifyRootNode] = {}
         self.watched_nodes: Dict[int, InotifyNode] = {}
+        self.watched_inodes: Dict[Tuple[int, int], int] = {}
+        self.watch_inodes: Dict[int, Tuple[int, int]] = {}
         self.pending_moves: Dict[
             int, Tuple[InotifyNode, str, asyncio.Handle]] = {}
         self.initialized: bool = False
@@ -1857,6 +2841,53 @@ class InotifyObserver(BaseFileSystemObserver):
     def on_item_copy(self, root: str, item_path: StrOrPath) -> Optional[Awaitable]:
         return None
 
+    def _get_indexed_root(self, root: str) -> Optional[InotifyRootNode]:
+        root_node = self.watched_roots.get(root)
+        if root_node is None or not root_node.is_indexed:
+            return None
+        return root_node
+
+    def list_files(
+        self, root: str, exts: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Dict[str, Any]]]:
+        root_node = self._get_indexed_root(root)
+        if root_node is None:
+            return None
+        file_list: Dict[str, Dict[str, Any]] = {}
+        root_node.list_files(file_list, exts=exts)
+        return file_list
+
+    def list_directory(
+        self, root: str, dir_path: str
+    ) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        root_node = self._get_indexed_root(root)
+        if root_node is None:
+            return None
+        rel_path = self.file_manager.get_relative_path(root, dir_path)
+        if not rel_path:
+            return None
+        node = root_node.find_node(rel_path)
+        if node is None:
+            return None
+        return node.list_directory()
+
+    def invalidate_index(self, root: Optional[str] = None) -> None:
+        for name, root_node in self.watched_roots.items():
+            if root is None or name == root:
+                root_node.invalidate_index()
+
+    def on_reserved_path_added(self, res_path: pathlib.Path) -> None:
+        for root_node in self.watched_roots.values():
+            root_path = pathlib.Path(root_node.get_path()).resolve()
+            if root_path in res_path.parents:
+                rel_path = res_path.relative_to(root_path)
+                parent = root_node.find_node(str(rel_path.parent))
+                if parent is not None:
+                    parent.unwatch_child_node(rel_path.name)
+            elif root_path != res_path and res_path not in root_path.parents:
+                continue
+            root_node.invalidate_index()
+
     def add_root_watch(self, root: str, root_path: str) -> None:
         # remove all existing watches on root
         if root in self.watched_roots:
@@ -1884,6 +2915,7 @@ class InotifyObserver(BaseFileSystemObserver):
                     log=False
                 )
                 return
+            root_node.is_indexed = True
             self.log_nodes()
             self.event_loop.register_callback(
                 self._notify_root_updated, mevts, root, root_path)
@@ -1901,6 +2933,7 @@ class InotifyObserver(BaseFileSystemObserver):
                     exc_info=e
                 )
                 continue
+            node.is_indexed = True
             if not evts:
                 continue
             root_path = node.get_path()
@@ -1952,13 +2985,34 @@ class InotifyObserver(BaseFileSystemObserver):
                 logging.info(msg)
             raise self.server.error("Watch already exists")
         self.watched_nodes[watch] = node
+        try:
+            st = os.stat(dir_path)
+        except OSError:
+            pass
+        else:
+            inode = (st.st_dev, st.st_ino)
+            self.watched_inodes[inode] = watch
+            self.watch_inodes[watch] = inode
         return watch
 
+    def get_watched_node(self, dir_path: str) -> Optional[InotifyNode]:
+        try:
+            st = os.stat(dir_path)
+        except OSError:
+            return None
+        watch = self.watched_inodes.get((st.st_dev, st.st_ino))
+        if watch is None:
+            return None
+        return self.watched_nodes.get(watch)
+
     def remove_watch(self,
                      wdesc: int,
                      need_low_level_rm: bool = True
                      ) -> None:
         node = self.watched_nodes.pop(wdesc, None)
+        inode = self.watch_inodes.pop(wdesc, None)
+        if inode is not None and self.watched_inodes.get(inode) == wdesc:
+            del self.watched_inodes[inode]
         if need_low_level_rm and node is not None:
             try:
                 self.inotify.rm_watch(wdesc)
@@ -2035,6 +3089,7 @@ class InotifyObserver(BaseFileSystemObserver):
                 logging.debug(
                     f"Inotify - ignoring create watch at reserved path: {full_path}"
                 )
+                node.add_unwatched_dir(evt.name)
             else:
                 self.sync_lock.add_pending_path("create_dir", full_path)
                 node.create_child_node(evt.name)
@@ -2051,6 +3106,7 @@ class InotifyObserver(BaseFileSystemObserver):
                 logging.debug(
                     f"Inotify - Child node with name {evt.name} does not exist"
                 )
+                node.remove_unwatched_dir(evt.name)
         elif evt.mask & iFlags.MOVED_TO:
             logging.debug(f"Inotify directory move to: {root}, {node_path}, {evt.name}")
             moved_evt = self.pending_moves.pop(evt.cookie, None)
@@ -2067,6 +3123,7 @@ class InotifyObserver(BaseFileSystemObserver):
                         f"reserved path: {full_path}"
                     )
                     prev_parent.schedule_child_delete(child_name, True)
+                    node.add_unwatched_dir(evt.name)
                 else:
                     prev_parent.move_child_node(child_name, evt.name, node)
             else:
@@ -2076,9 +3133,16 @@ class InotifyObserver(BaseFileSystemObserver):
                     logging.debug(
                         f"Inotify - ignoring moved folder to reserved path: {full_path}"
                     )
+                    node.add_unwatched_dir(evt.name)
                 else:
                     self.sync_lock.add_pending_path("create_dir", full_path)
                     node.create_child_node(evt.name)
+        elif evt.mask & iFlags.ATTRIB:
+            child_node = node.get_child_node(evt.name)
+            if child_node is not None:
+                child_node.node_info = None
+            elif evt.name in node.unwatched_dirs:
+                node.add_unwatched_dir(evt.name)
 
     def _process_file_event(self, evt: InotifyEvent, node: InotifyNode) -> None:
         ext: str = os.path.splitext(evt.name)[-1].lower()
@@ -2089,6 +3153,7 @@ class InotifyObserver(BaseFileSystemObserver):
             logging.debug(f"Inotify file create: {root}, "
                           f"{node_path}, {evt.name}")
             self.sync_lock.add_pending_path("create_file", file_path)
+            node.mark_file_changed(evt.name)
             node.schedule_file_event(evt.name, "create_file")
             if os.path.islink(file_path):
                 logging.debug(f"Inotify symlink create: {file_path}")
@@ -2096,6 +3161,7 @@ class InotifyObserver(BaseFileSystemObserver):
         elif evt.mask & iFlags.DELETE:
             logging.debug(f"Inotify file delete: {root}, "
                           f"{node_path}, {evt.name}")
+            node.remove_file_info(evt.name)
             if root == "gcodes" and ext == ".ufp":
                 # Don't notify deleted ufp files
                 return
@@ -2103,11 +3169,13 @@ class InotifyObserver(BaseFileSystemObserver):
         elif evt.mask & iFlags.MOVED_FROM:
             logging.debug(f"Inotify file move from: {root}, "
                           f"{node_path}, {evt.name}")
+            node.remove_file_info(evt.name)
             self._schedule_pending_move(evt, node, False)
         elif evt.mask & iFlags.MOVED_TO:
             logging.debug(f"Inotify file move to: {root}, "
                           f"{node_path}, {evt.name}")
             node.flush_delete()
+            node.mark_file_changed(evt.name)
             moved_evt = self.pending_moves.pop(evt.cookie, None)
             pending_node = node.find_pending_node()
             if moved_evt is not None:
@@ -2158,11 +3226,17 @@ class InotifyObserver(BaseFileSystemObserver):
                     self.notify_filelist_changed("create_file", root, file_path)
         elif evt.mask & iFlags.MODIFY:
             self.sync_lock.add_pending_path("modify_file", file_path)
+            node.mark_file_changed(evt.name)
             node.schedule_file_event(evt.name, "modify_file")
         elif evt.mask & iFlags.CLOSE_WRITE:
             logging.debug(f"Inotify writable file closed: {file_path}")
+            node.mark_file_changed(evt.name)
             # Only process files that have been created or modified
             node.complete_file_write(evt.name)
+        elif evt.mask & iFlags.ATTRIB:
+            # Attribute changes only update the file index
+            if evt.name in node.file_info:
+                node.mark_file_changed(evt.name)
 
     async def _finish_gcode_move(
         self,
@@ -2299,6 +3373,95 @@ class InotifyObserver(BaseFileSystemObserver):
 
 METADATA_NAMESPACE = "gcode_metadata"
 METADATA_VERSION = 3
+METADATA_WORKER_IDLE_TIME = 300.
+
+class MetadataWorker:
+    """
+    A long lived metadata.py process.  Requests are written to the
+    worker's stdin and responses read from its stdout, each prefixed
+    with its length.  The process is launched on demand and exits after
+    it has been idle for METADATA_WORKER_IDLE_TIME seconds.
+    """
+    def __init__(self, server: Server) -> None:
+        self.server = server
+        self.event_loop = server.get_event_loop()
+        self.proc: Optional[asyncio.subprocess.Process] = None
+        self.idle_handle: Optional[asyncio.TimerHandle] = None
+
+    async def _start(self) -> asyncio.subprocess.Process:
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, METADATA_SCRIPT, "--worker",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        self.event_loop.create_task(self._log_stderr(proc))
+        self.proc = proc
+        return proc
+
+    async def _log_stderr(self, proc: asyncio.subprocess.Process) -> None:
+        assert proc.stderr is not None
+        async for line in proc.stderr:
+            logging.info(line.decode(errors="ignore").rstrip())
+
+    async def extract(
+        self,
+        config: Dict[str, Any],
+        proc_input: Optional[bytes],
+        timeout: float
+    ) -> Dict[str, Any]:
+        if self.idle_handle is not None:
+            self.idle_handle.cancel()
+            self.idle_handle = None
+        proc = self.proc
+        if proc is None or proc.returncode is not None:
+            proc = await self._start()
+        assert proc.stdin is not None and proc.stdout is not None
+        data = jsonw.dumps(config)
+        request = len(data).to_bytes(4, "big") + data + (proc_input or b"")
+        try:
+            resp: Dict[str, Any] = await asyncio.wait_for(
+                self._send_request(proc, request), timeout
+            )
+        except asyncio.TimeoutError:
+            self.kill()
+            raise self.server.error(
+                f"Metadata extraction timed out after {timeout} seconds"
+            ) from None
+        except BaseException:
+            # The state of the worker is unknown, terminate it
+            self.kill()
+            raise
+        self.idle_handle = self.event_loop.delay_callback(
+            METADATA_WORKER_IDLE_TIME, self.close
+        )
+        return resp
+
+    async def _send_request(
+        self, proc: asyncio.subprocess.Process, request: bytes
+    ) -> Dict[str, Any]:
+        # A wedged worker may stop reading its stdin, the write is
+        # covered by the same timeout as the response
+        assert proc.stdin is not None and proc.stdout is not None
+        proc.stdin.write(request)
+        await proc.stdin.drain()
+        reader = proc.stdout
+        size = int.from_bytes(await reader.readexactly(4), "big")
+        return jsonw.loads(await reader.readexactly(size))
+
+    def kill(self) -> None:
+        if self.proc is not None and self.proc.returncode is None:
+            self.proc.kill()
+        self.proc = None
+
+    def close(self) -> None:
+        if self.idle_handle is not None:
+            self.idle_handle.cancel()
+            self.idle_handle = None
+        if self.proc is not None and self.proc.stdin is not None:
+            # The worker exits when stdin is closed
+            self.proc.stdin.close()
+        self.proc = None
 
 class MetadataStorage:
     def __init__(self,
@@ -2310,6 +3473,11 @@ class MetadataStorage:
             'enable_object_processing', False)
         self.default_metadata_parser_timeout = config.getfloat(
             'default_metadata_parser_timeout', 20.)
+        worker_count = config.getint(
+            "metadata_workers", min(2, os.cpu_count() or 1), minval=1
+        )
+        self.workers = [MetadataWorker(self.server) for _ in range(worker_count)]
+        self.active_requests: Set[str] = set()
         self.gc_path = ""
         db.register_local_namespace(METADATA_NAMESPACE)
         self.mddb = db.wrap_namespace(
@@ -2327,11 +3495,17 @@ class MetadataStorage:
         # 1000 gcode files we are using < 1MiB of additional memory.
         # That said, in the future all components that access metadata should
         # be refactored to do so asynchronously.
+        #
+        # Records in the cache are never modified once stored, they are
+        # replaced.  This allows readers to share the nested values of a
+        # record rather than receive a deep copy.
         self.metadata: Dict[str, Any] = self.mddb.as_dict()
         self.pending_requests: Dict[
             str, Tuple[Dict[str, Any], asyncio.Event]] = {}
         self.busy: bool = False
         self.processors: Dict[str, Dict[str, Any]] = {}
+        # Incremented when metadata is added or updated
+        self.revision: int = 0
 
     def prune_storage(self) -> None:
         # Check for removed gcode files while moonraker was shutdown
@@ -2344,13 +3518,16 @@ class MetadataStorage:
                     del_keys.append(fname)
                 elif "thumbnails" in self.metadata[fname]:
                     # Check for any stale data entries and remove them
-                    need_sync = False
-                    for thumb in self.metadata[fname]['thumbnails']:
-                        if 'data' in thumb:
-                            del thumb['data']
-                            need_sync = True
-                    if need_sync:
-                        self.mddb[fname] = self.metadata[fname]
+                    thumbs: List[Dict[str, Any]]
+                    thumbs = self.metadata[fname]['thumbnails']
+                    if any('data' in thumb for thumb in thumbs):
+                        metadata = dict(self.metadata[fname])
+                        metadata['thumbnails'] = [
+                            {k: v for k, v in thumb.items() if k != 'data'}
+                            for thumb in thumbs
+                        ]
+                        self.metadata[fname] = metadata
+                        self.mddb[fname] = metadata
             # Delete any removed keys from the database
             if del_keys:
                 ret = self.mddb.delete_batch(del_keys).result()
@@ -2372,12 +3549,19 @@ class MetadataStorage:
             key: str,
             default: Optional[_T] = None
             ) -> Union[_T, Dict[str, Any]]:
-        return deepcopy(self.metadata.get(key, default))
+        # Returns a shallow copy of the record.  Top level fields may be
+        # modified by the caller, nested values are shared with the cache
+        # and must be copied before they are modified.
+        metadata: Optional[Dict[str, Any]] = self.metadata.get(key)
+        if metadata is None:
+            return default  # type: ignore
+        return dict(metadata)
 
     def insert(self, key: str, value: Dict[str, Any]) -> None:
         val = deepcopy(value)
         self.metadata[key] = val
         self.mddb[key] = val
+        self.revision += 1
 
     def is_processing(self) -> bool:
         return len(self.pending_requests) > 0
@@ -2554,45 +3738,72 @@ class MetadataStorage:
 
     async def _process_metadata_update(self) -> None:
         while self.pending_requests:
-            fname, (path_info, mevt) = \
-                list(self.pending_requests.items())[0]
-            if self._has_valid_data(fname, path_info):
-                mevt.set()
-                continue
-            ufp_path: Optional[str] = path_info.get('ufp_path', None)
-            retries = 3
-            while retries:
-                try:
-                    await self._run_extract_metadata(fname, ufp_path)
-                except Exception:
-                    logging.exception("Error running extract_metadata.py")
-                    retries -= 1
-                else:
-                    await self.server.send_event(
-                        "file_manager:metadata_processed", fname
-                    )
+            count = min(len(self.workers), len(self.pending_requests))
+            await asyncio.gather(
+                *[self._run_worker_requests(w) for w in self.workers[:count]]
+            )
+        self.busy = False
+
+    async def _run_worker_requests(self, worker: MetadataWorker) -> None:
+        # Process pending requests until none remain unclaimed
+        while True:
+            for fname, (path_info, mevt) in self.pending_requests.items():
+                if fname not in self.active_requests:
                     break
             else:
-                if ufp_path is None:
-                    self.metadata[fname] = {
-                        'size': path_info.get('size', 0),
-                        'modified': path_info.get('modified', 0),
-                        'print_start_time': None,
-                        'job_id': None
-                    }
-                    self.mddb[fname] = self.metadata[fname]
-                logging.info(
-                    f"Unable to extract metadata from file: {fname}")
-            self.pending_requests.pop(fname, None)
-            mevt.set()
-        self.busy = False
+                return
+            self.active_requests.add(fname)
+            try:
+                await self._process_request(worker, fname, path_info)
+            finally:
+                self.active_requests.discard(fname)
+                self.pending_requests.pop(fname, None)
+                mevt.set()
+
+    async def _process_request(
+        self, worker: MetadataWorker, fname: str, path_info: Dict[str, Any]
+    ) -> None:
+        if self._has_valid_data(fname, path_info):
+            return
+        ufp_path: Optional[str] = path_info.get('ufp_path', None)
+        windows: Optional[Tuple[bytes, bytes]]
+        windows = path_info.get("upload_windows")
+        retries = 3
+        while retries:
+            try:
+                await self._run_extract_metadata(worker, fname, ufp_path, windows)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logging.exception("Error running extract_metadata.py")
+                retries -= 1
+                # A failed attempt may have modified the file
+                windows = None
+            else:
+                await self.server.send_event(
+                    "file_manager:metadata_processed", fname
+                )
+                break
+        else:
+            if ufp_path is None:
+                self.metadata[fname] = {
+                    'size': path_info.get('size', 0),
+                    'modified': path_info.get('modified', 0),
+                    'print_start_time': None,
+                    'job_id': None
+                }
+                self.mddb[fname] = self.metadata[fname]
+                self.revision += 1
+            logging.info(
+                f"Unable to extract metadata from file: {fname}")
 
-    async def _run_extract_metadata(self,
-                                    filename: str,
-                                    ufp_path: Optional[str]
-                                    ) -> None:
-        # Escape single quotes in the file name so that it may be
-        # properly loaded
+    async def _run_extract_metadata(
+        self,
+        worker: MetadataWorker,
+        filename: str,
+        ufp_path: Optional[str],
+        windows: Optional[Tuple[bytes, bytes]] = None
+    ) -> None:
         config: Dict[str, Any] = {
             "filename": filename,
             "gcode_dir": self.gc_path,
@@ -2600,6 +3811,10 @@ class MetadataStorage:
             "ufp_path": ufp_path,
             "processors": list(self.processors.values())
         }
+        proc_input: Optional[bytes] = None
+        if windows is not None and ufp_path is None:
+            config["stdin_windows"] = [len(windows[0]), len(windows[1])]
+            proc_input = b"".join(windows)
         timeout = self.default_metadata_parser_timeout
         if ufp_path is not None or self.enable_object_proc:
             timeout = max(timeout, 300.)
@@ -2608,27 +3823,7 @@ class MetadataStorage:
                 [proc.get("timeout", 0) for proc in self.processors.values()]
             )
             timeout = max(timeout, proc_timeout)
-        eventloop = self.server.get_event_loop()
-        md_cfg = await eventloop.run_in_thread(self._create_metadata_cfg, config)
-        cmd = " ".join([sys.executable, METADATA_SCRIPT, "-c", shlex.quote(md_cfg)])
-        result = bytearray()
-        try:
-            sc: SCMDComp = self.server.lookup_component('shell_command')
-            scmd = sc.build_shell_command(
-                cmd, callback=result.extend, log_stderr=True
-            )
-            if not await scmd.run(timeout=timeout):
-                raise self.server.error("Extract Metadata returned with error")
-        finally:
-            def _rm_md_config():
-                with contextlib.suppress(OSError):
-                    os.remove(md_cfg)
-            await eventloop.run_in_thread(_rm_md_config)
-        try:
-            decoded_resp: Dict[str, Any] = jsonw.loads(result.strip())
-        except Exception:
-            logging.debug(f"Invalid metadata response:\n{result}")
-            raise
+        decoded_resp = await worker.extract(config, proc_input, timeout)
         path: str = decoded_resp['file']
         metadata: Dict[str, Any] = decoded_resp['metadata']
         if not metadata:
@@ -2637,13 +3832,11 @@ class MetadataStorage:
         metadata.update({'print_start_time': None, 'job_id': None})
         self.metadata[path] = metadata
         self.mddb[path] = metadata
+        self.revision += 1
 
-    def _create_metadata_cfg(self, config: Dict[str, Any]) -> str:
-        with tempfile.NamedTemporaryFile(
-            prefix="metacfg-", suffix=".json", delete=False
-        ) as f:
-            f.write(jsonw.dumps(config))
-            return f.name
+    def close(self) -> None:
+        for worker in self.workers:
+            worker.close()
 
 def load_component(config: ConfigHelper) -> FileManager:
     return FileManager(config)
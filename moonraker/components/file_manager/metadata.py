@@ -10,6 +10,8 @@ import json
 import argparse
 import re
 import os
+import mmap
+import functools
 import sys
 import io
 import base64
@@ -37,25 +39,47 @@ if TYPE_CHECKING:
     pass
 
 READ_SIZE = 1024 * 1024  # 1 MiB
+IDENT_SIZE = 32 * 1024  # 32 KiB
 UFP_MODEL_PATH = "/3D/model.gcode"
 UFP_THUMB_PATH = "/Metadata/thumbnail.png"
 SUPPORTED_THUMB_FORMATS = ("png", "jpg", "qoi")
 FMT_CONV_MAP = {
     "qoi": "png"
 }
+# Matches comment lines and "; key = value" settings.  Patterns are
+# anchored with a newline rather than "^" in multiline mode, as the
+# literal prefix is considerably faster to search for.
+COMMENT_PATTERN = re.compile(r"\n(;[^\n]*)")
+SETTING_PATTERN = re.compile(r"\n; ([^=\n]+?) = ([^\n]*)")
 
 logging.basicConfig(stream=sys.stderr, level=logging.INFO)
 logger = logging.getLogger("metadata")
 
+class MetadataError(Exception):
+    pass
+
 # Regex helpers.  These methods take patterns with placeholders
 # to insert the correct regex capture group for floats, ints,
 # and strings:
 #  Float: (%F) = (\d*\.?\d+)
 #  Integer: (%D) = (\d+)
 #  String: (%S) = (.+)
-def regex_find_floats(pattern: str, data: str) -> List[float]:
+# Compiled patterns are cached, as the parsers request the same
+# patterns for every file processed.
+@functools.lru_cache(maxsize=None)
+def compile_pattern(pattern: str) -> re.Pattern[str]:
     pattern = pattern.replace(r"(%F)", r"([0-9]*\.?[0-9]+)")
-    matches = re.findall(pattern, data)
+    pattern = pattern.replace(r"(%D)", r"([0-9]+)")
+    pattern = pattern.replace(r"(%S)", r"(.*)")
+    return re.compile(pattern)
+
+@functools.lru_cache(maxsize=None)
+def compile_separator_pattern(separators: str) -> re.Pattern[str]:
+    separators = re.escape(separators)
+    return re.compile(rf'\s*(")(?:\\"|[^"])*"\s*|[^{separators}]+')
+
+def regex_find_floats(pattern: str, data: str) -> List[float]:
+    matches = compile_pattern(pattern).findall(data)
     if matches:
         # return the maximum height value found
         try:
@@ -65,8 +89,7 @@ def regex_find_floats(pattern: str, data: str) -> List[float]:
     return []
 
 def regex_find_ints(pattern: str, data: str) -> List[int]:
-    pattern = pattern.replace(r"(%D)", r"([0-9]+)")
-    matches = re.findall(pattern, data)
+    matches = compile_pattern(pattern).findall(data)
     if matches:
         # return the maximum height value found
         try:
@@ -76,13 +99,11 @@ def regex_find_ints(pattern: str, data: str) -> List[int]:
     return []
 
 def regex_find_strings(pattern: str, separators: str, data: str) -> List[str]:
-    pattern = pattern.replace(r"(%S)", r"(.*)")
-    match = re.search(pattern, data)
+    match = compile_pattern(pattern).search(data)
     if match and match.group(1):
-        separators = re.escape(separators)
-        pattern = rf'\s*(")(?:\\"|[^"])*"\s*|[^{separators}]+'
         parsed_matches: List[str] = []
-        for m in re.finditer(pattern, match.group(1)):
+        sep_pattern = compile_separator_pattern(separators)
+        for m in sep_pattern.finditer(match.group(1)):
             (val, sep) = m.group(0, 1)
             val = val.strip()
             if sep:
@@ -93,8 +114,7 @@ def regex_find_strings(pattern: str, separators: str, data: str) -> List[str]:
     return []
 
 def regex_find_float(pattern: str, data: str) -> Optional[float]:
-    pattern = pattern.replace(r"(%F)", r"([0-9]*\.?[0-9]+)")
-    match = re.search(pattern, data)
+    match = compile_pattern(pattern).search(data)
     val: Optional[float] = None
     if match:
         try:
@@ -104,8 +124,7 @@ def regex_find_float(pattern: str, data: str) -> Optional[float]:
     return val
 
 def regex_find_int(pattern: str, data: str) -> Optional[int]:
-    pattern = pattern.replace(r"(%D)", r"([0-9]+)")
-    match = re.search(pattern, data)
+    match = compile_pattern(pattern).search(data)
     val: Optional[int] = None
     if match:
         try:
@@ -115,8 +134,7 @@ def regex_find_int(pattern: str, data: str) -> Optional[int]:
     return val
 
 def regex_find_string(pattern: str, data: str) -> Optional[str]:
-    pattern = pattern.replace(r"(%S)", r"(.*)")
-    match = re.search(pattern, data)
+    match = compile_pattern(pattern).search(data)
     if match:
         return match.group(1).strip('"')
     return None
@@ -173,6 +191,7 @@ class BaseSlicer(metaclass=SlicerType):
         self.header_data = data[:READ_SIZE]
         self.footer_data = data[-READ_SIZE:]
         self.size: int = file_size
+        self._settings: Optional[Dict[str, str]] = None
 
     def _check_has_objects(self,
                            data: str,
@@ -206,27 +225,85 @@ class BaseSlicer(metaclass=SlicerType):
         return False
 
     @classmethod
-    def from_file(cls, file_path: str) -> BaseSlicer:
+    def from_file(
+        cls, file_path: str, windows: Optional[Tuple[bytes, bytes]] = None
+    ) -> BaseSlicer:
         header = tail = ""
-        with open(file_path, 'rb') as f:
-            size = f.seek(0, os.SEEK_END)
-            f.seek(0)
-            header = f.read(READ_SIZE).decode(errors="ignore")
-            if size > READ_SIZE * 2:
-                f.seek(size - READ_SIZE)
-            if size > READ_SIZE:
-                tail = f.read().decode(errors="ignore")
-        for slicercls in cls.registered_slicers:
-            ident = slicercls.identify(header)
-            if ident is not None:
-                name, ver = ident
-                return slicercls(file_path, size, header + tail, name, ver)
+        if windows is not None:
+            # Header and footer data provided by the caller
+            size = os.path.getsize(file_path)
+            header = windows[0].decode(errors="ignore")
+            tail = windows[1].decode(errors="ignore")
+        else:
+            with open(file_path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size:
+                    # Decode the windows directly from the mapped file
+                    # rather than copying them into intermediate buffers
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    with mm, memoryview(mm) as view:
+                        header = str(view[:READ_SIZE], "utf-8", "ignore")
+                        if size > READ_SIZE:
+                            tail_start = max(READ_SIZE, size - READ_SIZE)
+                            tail = str(view[tail_start:], "utf-8", "ignore")
+        ident = cls.identify_slicer(header)
+        if ident is not None:
+            slicercls, name, ver = ident
+            return slicercls(file_path, size, header + tail, name, ver)
         return UnknownSlicer(file_path, size, header + tail)
 
+    @classmethod
+    def identify_slicer(
+        cls, header: str
+    ) -> Tuple[Type[BaseSlicer], str, str] | None:
+        # Slicers identify themselves in a comment at the top of the
+        # file, so first attempt identification using a small prefix.
+        # If that fails fall back to the comments in the entire header,
+        # gcode commands can't identify the slicer and searching them
+        # with each registered slicer's patterns is expensive.
+        candidates = [header[:IDENT_SIZE]]
+        if len(header) > IDENT_SIZE:
+            comments = COMMENT_PATTERN.findall("\n" + header)
+            candidates.append("\n".join(comments))
+        for data in candidates:
+            for slicercls in cls.registered_slicers:
+                ident = slicercls.identify(data)
+                if ident is not None:
+                    return slicercls, ident[0], ident[1]
+        return None
+
     @classmethod
     def identify(cls, data: str) -> Tuple[str, str] | None:
         return None
 
+    @property
+    def config_data(self) -> str:
+        return self.header_data
+
+    @property
+    def settings(self) -> Dict[str, str]:
+        # Settings reported in "; key = value" comments, parsed in
+        # a single pass over the config data on first access
+        if self._settings is None:
+            self._settings = {}
+            for match in SETTING_PATTERN.finditer("\n" + self.config_data):
+                self._settings.setdefault(match.group(1), match.group(2))
+        return self._settings
+
+    def find_setting_float(self, key: str, suffix: str = "") -> Optional[float]:
+        return regex_find_float(f"^(%F){suffix}", self.settings.get(key, ""))
+
+    def find_setting_int(self, key: str) -> Optional[int]:
+        return regex_find_int(r"^(%D)", self.settings.get(key, ""))
+
+    def find_setting_string(self, key: str) -> Optional[str]:
+        if key not in self.settings:
+            return None
+        return regex_find_string(r"^(%S)", self.settings[key])
+
+    def find_setting_strings(self, key: str, separators: str) -> List[str]:
+        return regex_find_strings(r"^(%S)", separators, self.settings.get(key, ""))
+
     def run_parsers(self) -> Dict[str, Any]:
         result: Dict[str, Any] = {}
         for name in vars(BaseSlicer).keys():
@@ -342,6 +419,9 @@ class BaseSlicer(metaclass=SlicerType):
         if not os.path.exists(thumb_dir):
             try:
                 os.mkdir(thumb_dir)
+            except FileExistsError:
+                # Created by a concurrent metadata worker
+                pass
             except Exception:
                 logger.info(f"Unable to create thumb dir: {thumb_dir}")
                 return None
@@ -479,19 +559,17 @@ class PrusaSlicer(BaseSlicer):
 
     def parse_first_layer_height(self) -> Optional[float]:
         # Check percentage
-        pct = regex_find_float(r"; first_layer_height = (%F)%", self.config_data)
+        pct = self.find_setting_float("first_layer_height", "%")
         if pct is not None:
             if self.layer_height is None:
                 # Failed to parse the original layer height, so it is not
                 # possible to calculate a percentage
                 return None
             return round(pct / 100. * self.layer_height, 6)
-        return regex_find_float(r"; first_layer_height = (%F)", self.config_data)
+        return self.find_setting_float("first_layer_height")
 
     def parse_layer_height(self) -> Optional[float]:
-        self.layer_height = regex_find_float(
-            r"; layer_height = (%F)", self.config_data
-        )
+        self.layer_height = self.find_setting_float("layer_height")
         return self.layer_height
 
     def parse_object_height(self) -> Optional[float]:
@@ -507,7 +585,7 @@ class PrusaSlicer(BaseSlicer):
         return regex_find_max_float(r"G1\sZ(%F)\sF", self.footer_data)
 
     def parse_filament_total(self) -> Optional[float]:
-        line = regex_find_string(r'filament\sused\s\[mm\]\s=\s(%S)\n', self.config_data)
+        line = self.find_setting_string("filament used [mm]")
         if line:
             filament = regex_find_floats(
                 r"(%F)", line
@@ -517,13 +595,10 @@ class PrusaSlicer(BaseSlicer):
         return None
 
     def parse_filament_weight_total(self) -> Optional[float]:
-        return regex_find_float(
-            r"total\sfilament\sused\s\[g\]\s=\s(%F)",
-            self.config_data
-        )
+        return self.find_setting_float("total filament used [g]")
 
     def parse_filament_weights(self) -> Optional[List[float]]:
-        line = regex_find_string(r'filament\sused\s\[g\]\s=\s(%S)\n', self.config_data)
+        line = self.find_setting_string("filament used [g]")
         if line:
             weights = regex_find_floats(
                 r"(%F)", line
@@ -533,9 +608,7 @@ class PrusaSlicer(BaseSlicer):
         return None
 
     def parse_filament_type(self) -> Optional[str]:
-        result = regex_find_strings(
-            r";\sfilament_type\s=\s(%S)", ",;", self.config_data
-        )
+        result = self.find_setting_strings("filament_type", ",;")
         if len(result) > 1:
             return json.dumps(result)
         elif result:
@@ -543,9 +616,7 @@ class PrusaSlicer(BaseSlicer):
         return None
 
     def parse_filament_name(self) -> Optional[str]:
-        result = regex_find_strings(
-            r";\sfilament_settings_id\s=\s(%S)", ",;", self.config_data
-        )
+        result = self.find_setting_strings("filament_settings_id", ",;")
         if len(result) > 1:
             return json.dumps(result)
         elif result:
@@ -553,46 +624,38 @@ class PrusaSlicer(BaseSlicer):
         return None
 
     def parse_filament_colors(self) -> Optional[List[str]]:
-        return regex_find_strings(
-            r";\sfilament_colour\s=\s(%S)", ",;", self.config_data
-        )
+        return self.find_setting_strings("filament_colour", ",;")
 
     def parse_extruder_colors(self) -> Optional[List[str]]:
-        return regex_find_strings(
-            r";\sextruder_colour\s=\s(%S)", ",;", self.config_data
-        )
+        return self.find_setting_strings("extruder_colour", ",;")
 
     def parse_filament_temps(self) -> Optional[List[int]]:
-        temps = regex_find_strings(
-            r";\s(?:nozzle_)?temperature\s=\s(%S)", ",;", self.config_data
-        )
+        key = "temperature"
+        if "nozzle_temperature" in self.settings:
+            key = "nozzle_temperature"
+        temps = self.find_setting_strings(key, ",;")
         try:
             return [int(t) for t in temps]
         except ValueError:
             return None
 
     def parse_referenced_tools(self) -> Optional[List[int]]:
-        tools = regex_find_strings(
-            r";\sreferenced_tools\s=\s(%S)", ",;", self.config_data
-        )
+        tools = self.find_setting_strings("referenced_tools", ",;")
         try:
             return [int(t) for t in tools]
         except ValueError:
             return None
 
     def parse_mmu_print(self) -> Optional[int]:
-        return regex_find_int(
-            r";\ssingle_extruder_multi_material\s=\s(%D)", self.config_data
-        )
+        return self.find_setting_int("single_extruder_multi_material")
 
     def parse_estimated_time(self) -> Optional[float]:
-        time_match = re.search(
-            r';\sestimated\sprinting\stime.*', self.config_data
-        )
-        if not time_match:
+        for key, time_group in self.settings.items():
+            if key.startswith("estimated printing time"):
+                break
+        else:
             return None
         total_time = 0
-        time_group = time_match.group()
         time_patterns = [(r"(\d+)d", 24*60*60), (r"(\d+)h", 60*60),
                          (r"(\d+)m", 60), (r"(\d+)s", 1)]
         try:
@@ -605,33 +668,25 @@ class PrusaSlicer(BaseSlicer):
         return round(total_time, 2)
 
     def parse_first_layer_extr_temp(self) -> Optional[float]:
-        return regex_find_float(
-            r"; first_layer_temperature = (%F)", self.config_data
-        )
+        return self.find_setting_float("first_layer_temperature")
 
     def parse_first_layer_bed_temp(self) -> Optional[float]:
-        return regex_find_float(
-            r"; first_layer_bed_temperature = (%F)", self.config_data
-        )
+        return self.find_setting_float("first_layer_bed_temperature")
 
     def parse_chamber_temp(self) -> Optional[float]:
-        return regex_find_float(
-            r"; chamber_temperature = (%F)", self.config_data
-        )
+        return self.find_setting_float("chamber_temperature")
 
     def parse_nozzle_diameter(self) -> Optional[float]:
-        return regex_find_float(
-            r";\snozzle_diameter\s=\s(%F)", self.config_data
-        )
+        return self.find_setting_float("nozzle_diameter")
 
     def parse_layer_count(self) -> Optional[int]:
-        return regex_find_int(r"; total layers count = (%D)", self.config_data)
+        return self.find_setting_int("total layers count")
 
     def parse_filament_change_count(self) -> Optional[int]:
-        res = regex_find_int(r"; total toolchanges = (%D)", self.config_data)
+        res = self.find_setting_int("total toolchanges")
         if res is not None:
             return res
-        return regex_find_int(r"; total filament change = (%D)", self.config_data)
+        return self.find_setting_int("total filament change")
 
     def parse_printer_vendor(self) -> Optional[str]:
         return regex_find_string(r'; printer_vendor = (%S)', self.footer_data)
@@ -658,7 +713,7 @@ class Slic3rPE(PrusaSlicer):
         return "Slic3r Prusa Edition"
 
     def parse_filament_total(self) -> Optional[float]:
-        return regex_find_float(r"filament\sused\s=\s(%F)mm", self.footer_data)
+        return self.find_setting_float("filament used", "mm")
 
     def parse_thumbnails(self) -> Optional[List[Dict[str, Any]]]:
         return None
@@ -672,15 +727,13 @@ class Slic3r(PrusaSlicer):
         return None
 
     def parse_filament_total(self) -> Optional[float]:
-        filament = regex_find_float(
-            r";\sfilament\_length\_m\s=\s(%F)", self.footer_data
-        )
+        filament = self.find_setting_float("filament_length_m")
         if filament is not None:
             filament *= 1000
         return filament
 
     def parse_filament_weight_total(self) -> Optional[float]:
-        return regex_find_float(r";\sfilament\smass\_g\s=\s(%F)", self.footer_data)
+        return self.find_setting_float("filament mass_g")
 
     def parse_estimated_time(self) -> Optional[float]:
         return None
@@ -701,9 +754,7 @@ class BambuStudio(PrusaSlicer):
         return self.header_data
 
     def parse_first_layer_height(self) -> Optional[float]:
-        return regex_find_float(
-            r"; initial_layer_print_height = (%F)", self.config_data
-        )
+        return self.find_setting_float("initial_layer_print_height")
 
     def parse_object_height(self) -> float | None:
         return regex_find_float(r"; max_z_height: (%F)", self.config_data)
@@ -722,19 +773,13 @@ class BambuStudio(PrusaSlicer):
         return None
 
     def parse_first_layer_extr_temp(self) -> Optional[float]:
-        return regex_find_float(
-            r"; nozzle_temperature_initial_layer = (%F)", self.config_data
-        )
+        return self.find_setting_float("nozzle_temperature_initial_layer")
 
     def parse_first_layer_bed_temp(self) -> Optional[float]:
-        return regex_find_float(
-            r"; hot_plate_temp_initial_layer = (%F)", self.config_data
-        )
+        return self.find_setting_float("hot_plate_temp_initial_layer")
 
     def parse_chamber_temp(self) -> Optional[float]:
-        return regex_find_float(
-            r"; chamber_temperatures = (%F)", self.config_data
-        )
+        return self.find_setting_float("chamber_temperatures")
 
     def parse_layer_count(self) -> Optional[int]:
         return regex_find_int(r"; total layer number: (%D)", self.config_data)
@@ -1000,13 +1045,13 @@ class KISSlicer(BaseSlicer):
         return None
 
     def parse_first_layer_extr_temp(self) -> Optional[float]:
-        return regex_find_float(r"; first_layer_C = (%F)", self.header_data)
+        return self.find_setting_float("first_layer_C")
 
     def parse_first_layer_bed_temp(self) -> Optional[float]:
-        return regex_find_float(r"; bed_C = (%F)", self.header_data)
+        return self.find_setting_float("bed_C")
 
     def parse_chamber_temp(self) -> Optional[float]:
-        return regex_find_float(r"; chamber_C = (%F)", self.header_data)
+        return self.find_setting_float("chamber_C")
 
 
 class IdeaMaker(BaseSlicer):
@@ -1162,14 +1207,10 @@ class KiriMoto(BaseSlicer):
         return None
 
     def parse_first_layer_height(self) -> Optional[float]:
-        return regex_find_float(
-            r"; firstSliceHeight = (%F)", self.header_data
-        )
+        return self.find_setting_float("firstSliceHeight")
 
     def parse_layer_height(self) -> Optional[float]:
-        self.layer_height = regex_find_float(
-            r"; sliceHeight = (%F)", self.header_data
-        )
+        self.layer_height = self.find_setting_float("sliceHeight")
         return self.layer_height
 
     def parse_object_height(self) -> Optional[float]:
@@ -1197,14 +1238,10 @@ class KiriMoto(BaseSlicer):
         )
 
     def parse_first_layer_extr_temp(self) -> Optional[float]:
-        return regex_find_float(
-            r"; firstLayerNozzleTemp = (%F)", self.header_data
-        )
+        return self.find_setting_float("firstLayerNozzleTemp")
 
     def parse_first_layer_bed_temp(self) -> Optional[float]:
-        return regex_find_float(
-            r"; firstLayerBedTemp = (%F)", self.header_data
-        )
+        return self.find_setting_float("firstLayerBedTemp")
 
 
 PPC_REGEX = (
@@ -1307,7 +1344,12 @@ def run_gcode_processors(
             logger.info(
                 f"Running processor {name} {version} on file {short_name}..."
             )
-            ret = subprocess.run(arglist, capture_output=True, timeout=timeout)
+            # The processor must not inherit stdin, in worker mode it
+            # carries the request stream
+            ret = subprocess.run(
+                arglist, stdin=subprocess.DEVNULL, capture_output=True,
+                timeout=timeout
+            )
         except Exception:
             logger.info(f"Processor {name} failed with error")
             logger.info(traceback.format_exc())
@@ -1327,11 +1369,13 @@ def run_gcode_processors(
     return finished_procs, reload_slicer_data
 
 def extract_metadata(
-    file_path: str, processors: List[Dict[str, Any]]
+    file_path: str,
+    processors: List[Dict[str, Any]],
+    windows: Optional[Tuple[bytes, bytes]] = None
 ) -> Dict[str, Any]:
     metadata: Dict[str, Any] = {}
     proc_list: List[str] = []
-    slicer = BaseSlicer.from_file(file_path)
+    slicer = BaseSlicer.from_file(file_path, windows)
     if processors:
         proc_list, reload = run_gcode_processors(file_path, slicer, processors)
         if reload:
@@ -1347,8 +1391,7 @@ def extract_metadata(
 
 def extract_ufp(ufp_path: str, dest_path: str) -> None:
     if not os.path.isfile(ufp_path):
-        logger.info(f"UFP file Not Found: {ufp_path}")
-        sys.exit(-1)
+        raise MetadataError(f"UFP file Not Found: {ufp_path}")
     thumb_name = os.path.splitext(
         os.path.basename(dest_path))[0] + ".png"
     dest_thumb_dir = os.path.join(os.path.dirname(dest_path), ".thumbs")
@@ -1366,18 +1409,43 @@ def extract_ufp(ufp_path: str, dest_path: str) -> None:
                 dest_path = os.path.realpath(dest_path)
             shutil.move(tmp_model_path, dest_path)
             if tmp_thumb_path:
-                if not os.path.exists(dest_thumb_dir):
-                    os.mkdir(dest_thumb_dir)
+                os.makedirs(dest_thumb_dir, exist_ok=True)
                 shutil.move(tmp_thumb_path, dest_thumb_path)
     except Exception:
         logger.info(traceback.format_exc())
-        sys.exit(-1)
+        raise MetadataError(f"Failed to extract UFP file: {ufp_path}") from None
     try:
         os.remove(ufp_path)
     except Exception:
         logger.info(f"Error removing ufp file: {ufp_path}")
 
-def main(config: Dict[str, Any]) -> None:
+def read_stdin(size: int) -> bytes:
+    data = bytearray()
+    remaining = size
+    while remaining:
+        chunk = sys.stdin.buffer.read(remaining)
+        if not chunk:
+            raise EOFError("Unexpected end of input")
+        data += chunk
+        remaining -= len(chunk)
+    return bytes(data)
+
+def read_stdin_windows(header_size: int, tail_size: int) -> Tuple[bytes, bytes]:
+    data = read_stdin(header_size + tail_size)
+    return data[:header_size], data[header_size:]
+
+def write_stdout(data: bytes) -> None:
+    fd = sys.stdout.fileno()
+    while data:
+        try:
+            ret = os.write(fd, data)
+        except OSError:
+            continue
+        data = data[ret:]
+
+def process_file(
+    config: Dict[str, Any], windows: Optional[Tuple[bytes, bytes]] = None
+) -> Dict[str, Any]:
     gc_path: str = config["gcode_dir"]
     filename: str = config["filename"]
     file_path = os.path.join(gc_path, filename)
@@ -1396,24 +1464,54 @@ def main(config: Dict[str, Any]) -> None:
     ufp = config.get("ufp_path")
     if ufp is not None:
         extract_ufp(ufp, file_path)
-    metadata: Dict[str, Any] = {}
     if not os.path.isfile(file_path):
-        logger.info(f"File Not Found: {file_path}")
-        sys.exit(-1)
+        raise MetadataError(f"File Not Found: {file_path}")
+    return extract_metadata(file_path, processors, windows)
+
+def main(config: Dict[str, Any]) -> None:
+    filename: str = config["filename"]
+    metadata: Dict[str, Any] = {}
     try:
-        metadata = extract_metadata(file_path, processors)
+        windows: Optional[Tuple[bytes, bytes]] = None
+        window_sizes: Optional[List[int]] = config.get("stdin_windows")
+        if window_sizes is not None:
+            windows = read_stdin_windows(*window_sizes)
+        metadata = process_file(config, windows)
+    except MetadataError as e:
+        logger.info(str(e))
+        sys.exit(-1)
     except Exception:
         logger.info(traceback.format_exc())
         sys.exit(-1)
-    fd = sys.stdout.fileno()
-    data = json.dumps(
-        {'file': filename, 'metadata': metadata}).encode()
-    while data:
+    write_stdout(json.dumps({'file': filename, 'metadata': metadata}).encode())
+
+def run_worker() -> None:
+    # Process requests received on stdin until it is closed.  Each request
+    # and response is a JSON object prefixed with its length as a 4 byte
+    # big endian integer.  The file windows, when present, follow the
+    # request.
+    while True:
         try:
-            ret = os.write(fd, data)
-        except OSError:
-            continue
-        data = data[ret:]
+            size = int.from_bytes(read_stdin(4), "big")
+        except EOFError:
+            break
+        config: Dict[str, Any] = json.loads(read_stdin(size))
+        if config.get("gcode_dir") is None:
+            config["gcode_dir"] = os.path.abspath(os.path.dirname(__file__))
+        windows: Optional[Tuple[bytes, bytes]] = None
+        window_sizes: Optional[List[int]] = config.get("stdin_windows")
+        if window_sizes is not None:
+            windows = read_stdin_windows(*window_sizes)
+        metadata: Dict[str, Any] = {}
+        try:
+            metadata = process_file(config, windows)
+        except MetadataError as e:
+            logger.info(str(e))
+        except Exception:
+            logger.info(traceback.format_exc())
+        resp = json.dumps({"file": config.get("filename"), "metadata": metadata})
+        data = resp.encode()
+        write_stdout(len(data).to_bytes(4, "big") + data)
 
 
 if __name__ == "__main__":
@@ -1438,7 +1536,13 @@ if __name__ == "__main__":
     parser.add_argument(
         "-o", "--check-objects", dest='check_objects', action='store_true',
         help="process gcode file for exclude object functionality")
+    parser.add_argument(
+        "-w", "--worker", action='store_true',
+        help="process requests received on stdin until it is closed")
     args = parser.parse_args()
+    if args.worker:
+        run_worker()
+        sys.exit(0)
     config: Dict[str, Any] = {}
     if args.config is None:
         if args.filename is None:
@@ -513,9 +513,12 @@ class History:
         metadata.pop('print_start_time', None)
         metadata.pop('job_id', None)
         if "thumbnails" in metadata:
-            thumb: Dict[str, Any]
-            for thumb in metadata['thumbnails']:
-                thumb.pop('data', None)
+            # Thumbnails are shared with the metadata storage, copy
+            # them rather than modifying in place
+            metadata['thumbnails'] = [
+                {k: v for k, v in thumb.items() if k != 'data'}
+                for thumb in metadata['thumbnails']
+            ]
         self.current_job.metadata = metadata
 
     def update_metadata(self, job_id: str) -> None:
@@ -12,9 +12,9 @@ import logging
 import getpass
 import asyncio
 import pathlib
-from ..utils import ServerError, get_unix_peer_credentials
+from ..utils import ServerError, FrameReader, get_unix_peer_credentials
 from ..utils import json_wrapper as jsonw
-from ..common import KlippyState, RequestType
+from ..common import KlippyState, RequestType, BaseRemoteConnection
 
 # Annotation imports
 from typing import (
@@ -25,13 +25,14 @@ from typing import (
     Callable,
     Coroutine,
     Dict,
+    FrozenSet,
     List,
     Set,
     Tuple,
     Union
 )
 if TYPE_CHECKING:
-    from ..common import WebRequest, APITransport, BaseRemoteConnection
+    from ..common import WebRequest, APITransport
     from ..confighelper import ConfigHelper
     from .klippy_apis import KlippyAPI
     from .file_manager.file_manager import FileManager
@@ -40,6 +41,7 @@ if TYPE_CHECKING:
     from .database import MoonrakerDatabase as Database
     FlexCallback = Callable[..., Optional[Coroutine]]
     Subscription = Dict[str, Optional[List[str]]]
+    SubscriptionKey = FrozenSet[Tuple[str, Optional[FrozenSet[str]]]]
 
 # These endpoints are reserved for klippy/moonraker communication only and are
 # not exposed via http or the websocket
@@ -72,6 +74,10 @@ class KlippyConnection:
         self.writer: Optional[asyncio.StreamWriter] = None
         self.connection_mutex: asyncio.Lock = asyncio.Lock()
         self.event_loop = self.server.get_event_loop()
+        self.gcode_batch_window = config.getfloat(
+            "gcode_response_batch_window", 0., minval=0., maxval=1.
+        )
+        self.pending_gcode_responses: List[str] = []
         self.log_no_access = True
         # Connection State
         self.connection_task: Optional[asyncio.Task] = None
@@ -92,6 +98,7 @@ class KlippyConnection:
         self._state: KlippyState = KlippyState.DISCONNECTED
         self._state.set_message("Klippy Disconnected")
         self.subscriptions: Dict[APITransport, Subscription] = {}
+        self.subscription_index = SubscriptionIndex()
         self.subscription_cache: Dict[str, Dict[str, Any]] = {}
         # Setup remote methods accessible to Klippy.  Note that all
         # registered remote methods should be of the notification type,
@@ -186,9 +193,10 @@ class KlippyConnection:
 
     async def _read_stream(self, reader: asyncio.StreamReader) -> None:
         errors_remaining: int = 10
-        while not reader.at_eof():
+        frame_reader = FrameReader(reader, limit=UNIX_BUFFER_LIMIT)
+        while not frame_reader.at_eof():
             try:
-                data = await reader.readuntil(b'\x03')
+                frames = await frame_reader.read_frames()
             except (ConnectionError, asyncio.IncompleteReadError):
                 break
             except asyncio.CancelledError:
@@ -201,12 +209,15 @@ class KlippyConnection:
                     break
                 continue
             errors_remaining = 10
-            try:
-                decoded_cmd = jsonw.loads(data[:-1])
-                self._process_command(decoded_cmd)
-            except Exception:
-                logging.exception(
-                    f"Error processing Klippy Host Response: {data.decode()}")
+            for data in frames:
+                try:
+                    decoded_cmd = jsonw.loads(data)
+                    self._process_command(decoded_cmd)
+                except Exception:
+                    logging.exception(
+                        "Error processing Klippy Host Response: "
+                        f"{data.tobytes().decode(errors='replace')}"
+                    )
         if not self.closing:
             logging.debug("Klippy Disconnection From _read_stream()")
             await self.close()
@@ -565,7 +576,26 @@ class KlippyConnection:
             logging.exception(f"Error running remote method: {method_name}")
 
     def _process_gcode_response(self, response: str) -> None:
-        self.server.send_event("server:gcode_response", response)
+        self.push_gcode_response(response)
+
+    def push_gcode_response(self, response: str) -> None:
+        # Responses received within the batch window are delivered
+        # together in a single "server:gcode_response_batch" event
+        self.pending_gcode_responses.append(response)
+        if len(self.pending_gcode_responses) == 1:
+            self.event_loop.call_at(
+                self.event_loop.get_loop_time() + self.gcode_batch_window,
+                self._flush_gcode_responses
+            )
+
+    def _flush_gcode_responses(self) -> None:
+        responses = self.pending_gcode_responses
+        self.pending_gcode_responses = []
+        if not responses:
+            return
+        self.server.send_event("server:gcode_response_batch", responses)
+        for response in responses:
+            self.server.send_event("server:gcode_response", response)
 
     def _process_status_update(
         self, eventtime: float, status: Dict[str, Dict[str, Any]]
@@ -591,16 +621,24 @@ class KlippyConnection:
                     logging.info("Klippy has shutdown")
                     self.server.send_event("server:klippy_shutdown")
                 self._state = new_state
-        for conn, sub in self.subscriptions.items():
-            conn_status: Dict[str, Any] = {}
-            for name, fields in sub.items():
-                if name in status:
-                    val: Dict[str, Any] = dict(status[name])
-                    if fields is not None:
-                        val = {k: v for k, v in val.items() if k in fields}
-                    if val:
-                        conn_status[name] = val
-            conn.send_status(conn_status, eventtime)
+        index = self.subscription_index
+        filtered_status = index.filter_status(status)
+        for key, group_status in filtered_status.items():
+            # Connections with identical subscriptions receive the same
+            # notification, encode it once per message format and share
+            # the result
+            encoded: Dict[str, bytes] = {}
+            for conn in index.get_connections(key):
+                if (
+                    isinstance(conn, BaseRemoteConnection) and
+                    not conn.status_interval
+                ):
+                    conn.queue_status(group_status, eventtime, encoded)
+                else:
+                    conn.send_status(group_status, eventtime)
+        for conn, key in index.local_transports:
+            if key not in filtered_status:
+                conn.send_status({}, eventtime)
 
     async def request(self, web_request: WebRequest) -> Any:
         if not self.is_connected():
@@ -699,6 +737,7 @@ class KlippyConnection:
             result['status'] = pruned_status
             if requested_sub:
                 self.subscriptions[conn] = requested_sub
+            self.subscription_index.rebuild(self.subscriptions)
             return result
 
     async def _request_standard(
@@ -716,7 +755,8 @@ class KlippyConnection:
             self.pending_requests.pop(base_request.id, None)
 
     def remove_subscription(self, conn: APITransport) -> None:
-        self.subscriptions.pop(conn, None)
+        if self.subscriptions.pop(conn, None) is not None:
+            self.subscription_index.rebuild(self.subscriptions)
 
     def is_connected(self) -> bool:
         return self.writer is not None and not self.closing
@@ -776,6 +816,7 @@ class KlippyConnection:
             request.set_exception(ServerError("Klippy Disconnected", 503))
         self.pending_requests = {}
         self.subscriptions = {}
+        self.subscription_index.rebuild(self.subscriptions)
         self.subscription_cache.clear()
         self._peer_cred = {}
         self._missing_reqs.clear()
@@ -809,6 +850,79 @@ class KlippyConnection:
                 await self._on_connection_closed()
         self.closing = False
 
+class SubscriptionIndex:
+    """
+    Inverted index of status subscriptions.  Connections with identical
+    subscriptions are grouped, and each group is indexed by the objects
+    and fields it requested.  Processing a status update only visits the
+    groups subscribed to the fields present in the update.
+
+    Local transports, such as KlippyAPI, drive periodic work from status
+    updates and receive every update, even when it contains none of their
+    subscribed fields.  They are tracked separately for this purpose.
+    """
+    def __init__(self) -> None:
+        self.groups: Dict[SubscriptionKey, List[APITransport]] = {}
+        self.local_transports: List[Tuple[APITransport, SubscriptionKey]] = []
+        # Groups subscribed to every field of an object
+        self.object_index: Dict[str, List[SubscriptionKey]] = {}
+        # Groups subscribed to specific fields of an object
+        self.field_index: Dict[str, Dict[str, List[SubscriptionKey]]] = {}
+
+    def rebuild(self, subscriptions: Dict[APITransport, Subscription]) -> None:
+        groups: Dict[SubscriptionKey, List[APITransport]] = {}
+        object_index: Dict[str, List[SubscriptionKey]] = {}
+        field_index: Dict[str, Dict[str, List[SubscriptionKey]]] = {}
+        local_transports: List[Tuple[APITransport, SubscriptionKey]] = []
+        for conn, sub in subscriptions.items():
+            try:
+                key: SubscriptionKey = frozenset(
+                    (obj, None if fields is None else frozenset(fields))
+                    for obj, fields in sub.items()
+                )
+            except TypeError:
+                # Unhashable field names, don't share with other connections
+                key = frozenset([(f"__conn_{id(conn)}", None)])
+            if not isinstance(conn, BaseRemoteConnection):
+                local_transports.append((conn, key))
+            if key in groups:
+                groups[key].append(conn)
+                continue
+            groups[key] = [conn]
+            for obj, fields in sub.items():
+                if fields is None:
+                    object_index.setdefault(obj, []).append(key)
+                    continue
+                obj_fields = field_index.setdefault(obj, {})
+                for field in set(fields):
+                    obj_fields.setdefault(field, []).append(key)
+        self.groups = groups
+        self.object_index = object_index
+        self.field_index = field_index
+        self.local_transports = local_transports
+
+    def get_connections(self, key: SubscriptionKey) -> List[APITransport]:
+        return self.groups.get(key, [])
+
+    def filter_status(
+        self, status: Dict[str, Dict[str, Any]]
+    ) -> Dict[SubscriptionKey, Dict[str, Dict[str, Any]]]:
+        group_status: Dict[SubscriptionKey, Dict[str, Dict[str, Any]]] = {}
+        for obj, fields in status.items():
+            for key in self.object_index.get(obj, []):
+                if fields:
+                    group_status.setdefault(key, {})[obj] = dict(fields)
+            obj_fields = self.field_index.get(obj)
+            if obj_fields is None:
+                continue
+            for field, value in fields.items():
+                for key in obj_fields.get(field, []):
+                    group_status.setdefault(key, {}).setdefault(obj, {})[field] = value
+        return group_status
+
+    def __len__(self) -> int:
+        return len(self.groups)
+
 # Basic KlippyRequest class, easily converted to dict for json encoding
 class KlippyRequest:
     def __init__(self, rpc_method: str, params: Dict[str, Any]) -> None:
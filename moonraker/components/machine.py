@@ -2134,7 +2134,9 @@ class InstallValidator:
             "the update.  Go to the following URL and provide your linux "
             f"password: {url}"
         )
-        self.server.send_event("server:gcode_response", gc_announcement)
+        kconn: KlippyConnection
+        kconn = self.server.lookup_component("klippy_connection")
+        kconn.push_gcode_response(gc_announcement)
 
     async def remove_announcement(self) -> None:
         if not self.announcement_id:
@@ -11,8 +11,11 @@ import fcntl
 import time
 import re
 import os
+import sys
 import pathlib
 import logging
+import threading
+import traceback
 from collections import deque
 from ..utils import ioctl_macros
 from ..common import RequestType
@@ -53,6 +56,12 @@ REPORT_QUEUE_SIZE = 30
 THROTTLE_CHECK_INTERVAL = 10
 WATCHDOG_REFRESH_TIME = 2.
 REPORT_BLOCKED_TIME = 4.
+LOOP_MONITOR_INTERVAL_DEFAULT = .1
+SLOW_CALLBACK_THRESHOLD = .1
+SLOW_CALLBACK_QUEUE_SIZE = 20
+WORST_OFFENDER_COUNT = 10
+MAX_STACK_DEPTH = 12
+LAG_HISTOGRAM_BUCKETS = (.001, .005, .01, .025, .05, .1, .25, .5, 1., 5.)
 
 THROTTLED_FLAGS = {
     1: "Under-Voltage Detected",
@@ -70,6 +79,14 @@ class ProcStats:
         self.server = config.get_server()
         self.event_loop = self.server.get_event_loop()
         self.watchdog = Watchdog(self)
+        server_cfg = config["server"]
+        self.loop_monitor: Optional[LoopMonitor] = None
+        if server_cfg.getboolean("enable_loop_monitor", False):
+            interval = server_cfg.getfloat(
+                "loop_monitor_interval", LOOP_MONITOR_INTERVAL_DEFAULT,
+                minval=.01, maxval=1.
+            )
+            self.loop_monitor = LoopMonitor(self, interval)
         self.stat_update_timer = self.event_loop.register_timer(
             self._handle_stat_update)
         self.vcgencmd: Optional[VCGenCmd] = None
@@ -88,6 +105,9 @@ class ProcStats:
         self.server.register_endpoint(
             "/machine/proc_stats", RequestType.GET, self._handle_stat_request
         )
+        self.server.register_endpoint(
+            "/server/perf/loop", RequestType.GET, self._handle_loop_perf_request
+        )
         self.server.register_event_handler(
             "server:klippy_shutdown", self._handle_shutdown
         )
@@ -108,6 +128,8 @@ class ProcStats:
     async def component_init(self) -> None:
         self.stat_update_timer.start()
         self.watchdog.start()
+        if self.loop_monitor is not None:
+            self.loop_monitor.start()
 
     def register_stat_callback(self, callback: STAT_CALLBACK) -> None:
         self.stat_callbacks.append(callback)
@@ -130,9 +152,26 @@ class ProcStats:
             'system_cpu_usage': self.cpu_usage,
             'system_uptime': time.clock_gettime(time.CLOCK_BOOTTIME),
             'system_memory': self.memory_usage,
-            'websocket_connections': websocket_count
+            'websocket_connections': websocket_count,
+            'websocket_compression': wsm.get_compression_stats(),
+            'event_loop': self._get_loop_stats()
         }
 
+    async def _handle_loop_perf_request(
+        self, web_request: WebRequest
+    ) -> Dict[str, Any]:
+        if self.loop_monitor is None:
+            raise self.server.error(
+                "Event loop monitor not enabled, set 'enable_loop_monitor' "
+                "in the [server] section to enable it"
+            )
+        return self.loop_monitor.get_stats()
+
+    def _get_loop_stats(self, reset: bool = False) -> Optional[Dict[str, Any]]:
+        if self.loop_monitor is None:
+            return None
+        return self.loop_monitor.get_period_stats(reset)
+
     async def _handle_shutdown(self) -> None:
         msg = "\nMoonraker System Usage Statistics:"
         for stats in self.proc_stat_queue:
@@ -178,7 +217,9 @@ class ProcStats:
             'network': net,
             'system_cpu_usage': self.cpu_usage,
             'system_memory': self.memory_usage,
-            'websocket_connections': websocket_count
+            'websocket_connections': websocket_count,
+            'websocket_compression': wsm.get_compression_stats(),
+            'event_loop': self._get_loop_stats(reset=True)
         })
         if (
             not self.update_sequence % THROTTLE_CHECK_INTERVAL
@@ -334,6 +375,8 @@ class ProcStats:
     def close(self) -> None:
         self.stat_update_timer.stop()
         self.watchdog.stop()
+        if self.loop_monitor is not None:
+            self.loop_monitor.stop()
 
 class Watchdog:
     def __init__(self, proc_stats: ProcStats) -> None:
@@ -367,6 +410,189 @@ class Watchdog:
     def stop(self):
         self.watchdog_timer.stop()
 
+class LoopMonitor:
+    """
+    Measures event loop lag by comparing the scheduled and actual run
+    times of a high frequency timer.  A sampling thread watches the
+    timer's heartbeat, when the loop stalls longer than the threshold
+    the stack of the main thread is captured to identify the blocking
+    callback.
+    """
+    def __init__(self, proc_stats: ProcStats, interval: float) -> None:
+        self.event_loop = proc_stats.event_loop
+        self.interval = interval
+        self.monitor_timer = self.event_loop.register_timer(
+            self._monitor_callback
+        )
+        self.main_ident = threading.get_ident()
+        self.sample_thread: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+        self.heartbeat: float = time.monotonic()
+        self.pending_sample: Optional[Dict[str, Any]] = None
+        self.next_run_time: float = 0.
+        self.histogram: List[int] = [0] * (len(LAG_HISTOGRAM_BUCKETS) + 1)
+        self.sample_count: int = 0
+        self.total_lag: float = 0.
+        self.max_lag: float = 0.
+        self.slow_count: int = 0
+        self.slow_callbacks: Deque[Dict[str, Any]] = deque(
+            maxlen=SLOW_CALLBACK_QUEUE_SIZE
+        )
+        self.offenders: Dict[str, Dict[str, Any]] = {}
+        self._reset_period()
+
+    def _reset_period(self) -> None:
+        self.period_samples: int = 0
+        self.period_total_lag: float = 0.
+        self.period_max_lag: float = 0.
+        self.period_slow_count: int = 0
+
+    def _monitor_callback(self, eventtime: float) -> float:
+        self.heartbeat = time.monotonic()
+        lag = max(0., eventtime - self.next_run_time)
+        for idx, limit in enumerate(LAG_HISTOGRAM_BUCKETS):
+            if lag <= limit:
+                self.histogram[idx] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+        self.sample_count += 1
+        self.total_lag += lag
+        self.max_lag = max(self.max_lag, lag)
+        self.period_samples += 1
+        self.period_total_lag += lag
+        self.period_max_lag = max(self.period_max_lag, lag)
+        sample = self.pending_sample
+        self.pending_sample = None
+        if lag > SLOW_CALLBACK_THRESHOLD:
+            if sample is None:
+                # The stall was too short for the sampler to catch
+                sample = {"time": time.time(), "handler": "unknown", "stack": []}
+            self._record_slow_callback(sample, lag)
+        self.next_run_time = eventtime + self.interval
+        return self.next_run_time
+
+    def _record_slow_callback(self, sample: Dict[str, Any], lag: float) -> None:
+        sample["duration"] = round(lag, 6)
+        self.slow_count += 1
+        self.period_slow_count += 1
+        self.slow_callbacks.append(sample)
+        handler: str = sample["handler"]
+        offender = self.offenders.get(handler)
+        if offender is None:
+            offender = self.offenders[handler] = {
+                "handler": handler,
+                "count": 0,
+                "total_duration": 0.,
+                "max_duration": 0.,
+                "stack": sample["stack"]
+            }
+        offender["count"] += 1
+        offender["total_duration"] = round(offender["total_duration"] + lag, 6)
+        if lag > offender["max_duration"]:
+            offender["max_duration"] = round(lag, 6)
+            offender["stack"] = sample["stack"]
+        if lag > REPORT_BLOCKED_TIME:
+            logging.info(
+                f"Slow callback detected: {handler}, "
+                f"blocked for {lag:.3f} seconds"
+            )
+
+    def _sample_loop(self) -> None:
+        sampled_beat: float = 0.
+        while not self.stop_event.wait(SLOW_CALLBACK_THRESHOLD / 2):
+            beat = self.heartbeat
+            if beat == sampled_beat:
+                continue
+            stall_time = time.monotonic() - beat
+            if stall_time < SLOW_CALLBACK_THRESHOLD + self.interval:
+                continue
+            frame = sys._current_frames().get(self.main_ident)
+            if frame is None:
+                continue
+            sampled_beat = beat
+            stack = traceback.extract_stack(frame, limit=MAX_STACK_DEPTH)
+            del frame
+            if self.heartbeat != beat:
+                # The loop resumed while the stack was captured
+                continue
+            self.pending_sample = {
+                "time": time.time(),
+                "handler": self._find_handler(stack),
+                "stack": [
+                    f"{fs.filename}:{fs.lineno} in {fs.name}" for fs in stack
+                ]
+            }
+
+    def _find_handler(self, stack: traceback.StackSummary) -> str:
+        # Report the innermost Moonraker frame, falling back to the
+        # innermost frame when the stall occurs outside of Moonraker
+        pkg_dir = str(pathlib.Path(__file__).parent.parent)
+        for fs in reversed(stack):
+            if fs.filename.startswith(pkg_dir):
+                rel_path = os.path.relpath(fs.filename, pkg_dir)
+                return f"{rel_path}:{fs.lineno} in {fs.name}"
+        if stack:
+            return f"{stack[-1].filename}:{stack[-1].lineno} in {stack[-1].name}"
+        return "unknown"
+
+    def get_period_stats(self, reset: bool = False) -> Dict[str, Any]:
+        avg_lag = 0.
+        if self.period_samples:
+            avg_lag = self.period_total_lag / self.period_samples
+        ret = {
+            "avg_lag": round(avg_lag, 6),
+            "max_lag": round(self.period_max_lag, 6),
+            "slow_callbacks": self.period_slow_count
+        }
+        if reset:
+            self._reset_period()
+        return ret
+
+    def get_stats(self) -> Dict[str, Any]:
+        avg_lag = 0.
+        if self.sample_count:
+            avg_lag = self.total_lag / self.sample_count
+        histogram: List[Dict[str, Any]] = [
+            {"max_lag": limit, "count": count}
+            for limit, count in zip(LAG_HISTOGRAM_BUCKETS, self.histogram)
+        ]
+        histogram.append({"max_lag": None, "count": self.histogram[-1]})
+        worst = sorted(
+            self.offenders.values(), key=lambda o: o["max_duration"],
+            reverse=True
+        )
+        return {
+            "monitor_interval": self.interval,
+            "slow_threshold": SLOW_CALLBACK_THRESHOLD,
+            "sample_count": self.sample_count,
+            "avg_lag": round(avg_lag, 6),
+            "max_lag": round(self.max_lag, 6),
+            "slow_callback_count": self.slow_count,
+            "lag_histogram": histogram,
+            "recent_slow_callbacks": list(self.slow_callbacks),
+            "worst_offenders": worst[:WORST_OFFENDER_COUNT]
+        }
+
+    def start(self) -> None:
+        if self.monitor_timer.is_running():
+            return
+        self.heartbeat = time.monotonic()
+        self.next_run_time = self.event_loop.get_loop_time()
+        self.monitor_timer.start()
+        self.stop_event.clear()
+        self.sample_thread = threading.Thread(
+            target=self._sample_loop, name="loop-monitor", daemon=True
+        )
+        self.sample_thread.start()
+
+    def stop(self) -> None:
+        self.monitor_timer.stop()
+        self.stop_event.set()
+        if self.sample_thread is not None:
+            self.sample_thread.join(1.)
+            self.sample_thread = None
+
 class VCGenCmd:
     """
     This class uses the BCM2835 Mailbox to directly query the throttled
@@ -22,6 +22,7 @@ from typing import (
     Coroutine,
     Dict,
     Set,
+    Union,
     cast
 )
 if TYPE_CHECKING:
@@ -186,7 +187,7 @@ class ShellCommand:
         verbose: bool = True,
         log_complete: bool = True,
         sig_idx: int = 1,
-        proc_input: Optional[str] = None,
+        proc_input: Optional[Union[str, bytes]] = None,
         success_codes: Optional[List[int]] = None
     ) -> bool:
         async with self.run_lock:
@@ -210,8 +211,9 @@ class ShellCommand:
             assert self.proc is not None
             try:
                 if proc_input is not None:
-                    ret: Coroutine = self.proc.communicate(
-                        input=proc_input.encode())
+                    if isinstance(proc_input, str):
+                        proc_input = proc_input.encode()
+                    ret: Coroutine = self.proc.communicate(input=proc_input)
                 else:
                     ret = self.proc.wait()
                 await asyncio.wait_for(ret, timeout=timeout)
@@ -7,6 +7,7 @@
 from __future__ import annotations
 import logging
 import asyncio
+import tornado
 from tornado.websocket import WebSocketHandler, WebSocketClosedError
 from tornado.web import HTTPError
 from ..common import (
@@ -15,7 +16,8 @@ from ..common import (
     BaseRemoteConnection,
     TransportType,
 )
-from ..utils import ServerError, parse_ip_address
+from ..utils import ServerError, FrameReader, parse_ip_address
+from ..utils import msgpack_wrapper as msgpackw
 
 # Annotation imports
 from typing import (
@@ -24,10 +26,12 @@ from typing import (
     Optional,
     Callable,
     Coroutine,
+    Awaitable,
     Tuple,
     Union,
     Dict,
     List,
+    Set,
 )
 
 if TYPE_CHECKING:
@@ -44,6 +48,15 @@ if TYPE_CHECKING:
     AuthComp = Optional[Authorization]
 
 CLIENT_TYPES = ["web", "mobile", "desktop", "display", "bot", "agent", "other"]
+CLIENT_CAPABILITIES = ["gcode_response_batch"]
+MAX_QUEUE_SIZE_DEFAULT = 1000
+STALL_TIMEOUT_DEFAULT = 60.
+COMPRESSION_LEVEL_DEFAULT = 6
+COMPRESSION_THRESHOLD_DEFAULT = 1024
+# The compression threshold and statistics rely on private attributes
+# of tornado's websocket protocol, only access them on tested versions
+WS_PROTOCOL_ATTRS = ("_compressor", "_message_bytes_out", "_wire_bytes_out")
+WS_PROTOCOL_INTERNALS = (6, 2) <= tornado.version_info < (7,)
 
 class WebsocketManager:
     def __init__(self, config: ConfigHelper) -> None:
@@ -51,6 +64,29 @@ class WebsocketManager:
         self.clients: Dict[int, BaseRemoteConnection] = {}
         self.bridge_connections: Dict[int, BridgeSocket] = {}
         self.closed_event: Optional[asyncio.Event] = None
+        self.max_queue_size = config.getint(
+            "max_websocket_queue_size", MAX_QUEUE_SIZE_DEFAULT, minval=10
+        )
+        self.stall_timeout = config.getfloat(
+            "websocket_stall_timeout", STALL_TIMEOUT_DEFAULT, minval=0.
+        )
+        self.compression_enabled = config.getboolean(
+            "websocket_compression", False
+        )
+        self.compression_level = config.getint(
+            "websocket_compression_level", COMPRESSION_LEVEL_DEFAULT,
+            minval=1, maxval=9
+        )
+        self.compression_threshold = config.getint(
+            "websocket_compression_threshold", COMPRESSION_THRESHOLD_DEFAULT,
+            minval=0
+        )
+        self.compression_stats: Dict[str, int] = {
+            "compressed_messages": 0,
+            "uncompressed_messages": 0,
+            "message_bytes": 0,
+            "wire_bytes": 0
+        }
         app: MoonrakerApp = self.server.lookup_component("application")
         app.register_websocket_handler("/websocket", WebSocket)
         app.register_websocket_handler("/klippysocket", BridgeSocket)
@@ -62,6 +98,20 @@ class WebsocketManager:
             "/server/connection/identify", RequestType.POST, self._handle_identify,
             TransportType.WEBSOCKET, auth_required=False
         )
+        self.server.register_endpoint(
+            "/server/connection/stats", RequestType.GET, self._handle_stats_request
+        )
+        self.server.register_endpoint(
+            "/server/connection/notification_filter", RequestType.POST,
+            self._handle_notification_filter, TransportType.WEBSOCKET
+        )
+        self.notification_families: Dict[str, str] = {
+            "gcode_response": "server",
+            "gcode_response_batch": "server"
+        }
+        self.server.register_event_handler(
+            "server:gcode_response_batch", self._notify_gcode_responses
+        )
 
     def register_notification(
         self,
@@ -71,6 +121,7 @@ class WebsocketManager:
     ) -> None:
         if notify_name is None:
             notify_name = event_name.split(':')[-1]
+        self.notification_families[notify_name] = event_name.split(':')[0]
         if event_type == "logout":
             def notify_handler(*args):
                 self.notify_clients(notify_name, args)
@@ -96,6 +147,8 @@ class WebsocketManager:
         version = web_request.get_str("version")
         client_type: str = web_request.get_str("type").lower()
         url = web_request.get_str("url")
+        max_rate = web_request.get_float("max_status_rate", 0.)
+        capabilities: List[str] = web_request.get_list("capabilities", [])
         sc.authenticate(
             token=web_request.get_str("access_token", None),
             api_key=web_request.get_str("api_key", None)
@@ -103,6 +156,8 @@ class WebsocketManager:
 
         if client_type not in CLIENT_TYPES:
             raise self.server.error(f"Invalid Client Type: {client_type}")
+        sc.set_max_status_rate(max_rate)
+        sc.capabilities = set(capabilities) & set(CLIENT_CAPABILITIES)
         sc.client_data = {
             "name": name,
             "version": version,
@@ -124,6 +179,42 @@ class WebsocketManager:
         self.server.send_event("websockets:client_identified", sc)
         return {'connection_id': sc.uid}
 
+    async def _handle_stats_request(
+        self, web_request: WebRequest
+    ) -> Dict[str, Any]:
+        connections: List[Dict[str, Any]] = []
+        for sc in list(self.clients.values()):
+            stats: Dict[str, Any] = {
+                "connection_id": sc.uid,
+                "client_name": sc.client_data.get("name", "unknown"),
+                "type": sc.client_data.get("type", "")
+            }
+            stats.update(sc.get_queue_stats())
+            connections.append(stats)
+        return {"connections": connections}
+
+    async def _handle_notification_filter(
+        self, web_request: WebRequest
+    ) -> Dict[str, Any]:
+        sc = web_request.get_client_connection()
+        assert sc is not None
+        include: Optional[List[str]] = None
+        if web_request.get("include", None) is not None:
+            include = web_request.get_list("include")
+        exclude: List[str] = web_request.get_list("exclude", [])
+        # An empty include list delivers no notifications
+        inc_set: Optional[Set[str]] = None
+        if include is not None:
+            inc_set = {self._strip_notify_prefix(name) for name in include}
+        exc_set = {self._strip_notify_prefix(name) for name in exclude}
+        sc.set_notification_filter(inc_set, exc_set)
+        return sc.get_notification_filter()
+
+    def _strip_notify_prefix(self, name: str) -> str:
+        if name.startswith("notify_"):
+            return name[7:]
+        return name
+
     def _process_logout(self, user: Dict[str, Any]) -> None:
         if "username" not in user:
             return
@@ -209,10 +300,92 @@ class WebsocketManager:
         msg: Dict[str, Any] = {'jsonrpc': "2.0", 'method': "notify_" + name}
         if data:
             msg['params'] = data
+        # Every recipient receives the same notification, encode it once
+        # per message format and queue the shared result
+        encoded: Dict[str, bytes] = {}
+        family = self.notification_families.get(name, "")
         for sc in list(self.clients.values()):
-            if sc.uid in mask or sc.need_auth:
+            if (
+                sc.uid in mask or sc.need_auth or
+                not sc.accepts_notification(name, family)
+            ):
                 continue
-            sc.queue_message(msg)
+            sc.queue_shared_message(msg, encoded)
+
+    def _notify_gcode_responses(self, responses: List[str]) -> None:
+        batch_msg: Dict[str, Any] = {
+            'jsonrpc': "2.0",
+            'method': "notify_gcode_response_batch",
+            'params': [responses]
+        }
+        batch_cache: Dict[str, bytes] = {}
+        single_msgs: List[Tuple[Dict[str, Any], Dict[str, bytes]]] = [
+            ({
+                'jsonrpc': "2.0",
+                'method': "notify_gcode_response",
+                'params': [resp]
+            }, {}) for resp in responses
+        ]
+        for sc in list(self.clients.values()):
+            if sc.need_auth:
+                continue
+            if "gcode_response_batch" in sc.capabilities:
+                if sc.accepts_notification("gcode_response_batch", "server"):
+                    sc.queue_shared_message(batch_msg, batch_cache)
+                continue
+            if not sc.accepts_notification("gcode_response", "server"):
+                continue
+            for msg, cache in single_msgs:
+                sc.queue_shared_message(msg, cache)
+
+    def get_compression_options(self) -> Optional[Dict[str, Any]]:
+        if not self.compression_enabled:
+            return None
+        return {"compression_level": self.compression_level}
+
+    def write_message(
+        self,
+        handler: WebSocketHandler,
+        message: Union[bytes, str],
+        binary: bool = False
+    ) -> Awaitable[None]:
+        ws_conn: Any = handler.ws_connection
+        compressor = _get_ws_compressor(ws_conn)
+        if compressor is None:
+            return handler.write_message(message, binary)
+        if isinstance(message, str) and len(message) < self.compression_threshold:
+            # The threshold applies to the encoded size of the message
+            msg_size = len(message.encode())
+        else:
+            msg_size = len(message)
+        if msg_size < self.compression_threshold:
+            # Permessage-deflate allows individual messages to be sent
+            # uncompressed.  Tornado does not expose this, so bypass the
+            # connection's compressor while the frame is written.
+            ws_conn._compressor = None
+            try:
+                ret = handler.write_message(message, binary)
+            finally:
+                ws_conn._compressor = compressor
+            self.compression_stats["uncompressed_messages"] += 1
+            return ret
+        msg_bytes_out: int = ws_conn._message_bytes_out
+        wire_bytes_out: int = ws_conn._wire_bytes_out
+        ret = handler.write_message(message, binary)
+        stats = self.compression_stats
+        stats["compressed_messages"] += 1
+        stats["message_bytes"] += ws_conn._message_bytes_out - msg_bytes_out
+        stats["wire_bytes"] += ws_conn._wire_bytes_out - wire_bytes_out
+        return ret
+
+    def get_compression_stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = dict(self.compression_stats)
+        ratio: Optional[float] = None
+        if stats["wire_bytes"]:
+            ratio = round(stats["message_bytes"] / stats["wire_bytes"], 2)
+        stats["enabled"] = self.compression_enabled
+        stats["ratio"] = ratio
+        return stats
 
     def get_count(self) -> int:
         return len(self.clients)
@@ -231,6 +404,15 @@ class WebsocketManager:
             pass
         self.closed_event = None
 
+def _get_ws_compressor(ws_conn: Any) -> Any:
+    # Returns the connection's permessage-deflate compressor, or None if
+    # compression is not active or tornado's internals are not known
+    if not WS_PROTOCOL_INTERNALS or ws_conn is None:
+        return None
+    if not all(hasattr(ws_conn, attr) for attr in WS_PROTOCOL_ATTRS):
+        return None
+    return ws_conn._compressor
+
 class WebSocket(WebSocketHandler, BaseRemoteConnection):
     connection_count: int = 0
 
@@ -268,6 +450,14 @@ class WebSocket(WebSocketHandler, BaseRemoteConnection):
                      f"Host Name: {self.hostname}")
         self.wsm.add_client(self)
 
+    def select_subprotocol(self, subprotocols: List[str]) -> Optional[str]:
+        if "msgpack" in subprotocols and msgpackw.MSGPACK_ENABLED:
+            self._message_format = "msgpack"
+            return "msgpack"
+        if "json" in subprotocols:
+            return "json"
+        return None
+
     def on_message(self, message: Union[bytes, str]) -> None:
         self.eventloop.register_callback(self._process_message, message)
 
@@ -279,7 +469,7 @@ class WebSocket(WebSocketHandler, BaseRemoteConnection):
         self.__class__.connection_count -= 1
         kconn: Klippy = self.server.lookup_component("klippy_connection")
         kconn.remove_subscription(self)
-        self.message_buf = []
+        self.message_buf.clear()
         now = self.eventloop.get_loop_time()
         pong_elapsed = now - self.last_pong_time
         for resp in self.pending_responses.values():
@@ -297,7 +487,9 @@ class WebSocket(WebSocketHandler, BaseRemoteConnection):
 
     async def write_to_socket(self, message: Union[bytes, str]) -> None:
         try:
-            await self.write_message(message)
+            await self.wsm.write_message(
+                self, message, binary=self._message_format == "msgpack"
+            )
         except WebSocketClosedError:
             self.is_closed = True
             self.message_buf.clear()
@@ -312,6 +504,9 @@ class WebSocket(WebSocketHandler, BaseRemoteConnection):
             return self.cors_allowed
         return True
 
+    def get_compression_options(self) -> Optional[Dict[str, Any]]:
+        return self.wsm.get_compression_options()
+
     def on_user_logout(self, user: str) -> bool:
         if super().on_user_logout(user):
             self._need_auth = True
@@ -427,9 +622,10 @@ class BridgeSocket(WebSocketHandler):
 
     async def _read_unix_stream(self, reader: asyncio.StreamReader) -> None:
         errors_remaining: int = 10
-        while not reader.at_eof():
+        frame_reader = FrameReader(reader)
+        while not frame_reader.at_eof():
             try:
-                data = memoryview(await reader.readuntil(b'\x03'))
+                frames = await frame_reader.read_frames()
             except (ConnectionError, asyncio.IncompleteReadError):
                 break
             except asyncio.CancelledError:
@@ -442,7 +638,8 @@ class BridgeSocket(WebSocketHandler):
                     break
                 continue
             try:
-                await self.write_message(data[:-1].tobytes())
+                for data in frames:
+                    await self.wsm.write_message(self, data.tobytes())
             except WebSocketClosedError:
                 logging.info(
                     f"Bridge closed while writing: {self.uid}")
@@ -466,6 +663,9 @@ class BridgeSocket(WebSocketHandler):
             return self.cors_allowed
         return True
 
+    def get_compression_options(self) -> Optional[Dict[str, Any]]:
+        return self.wsm.get_compression_options()
+
     # Check Authorized User
     async def prepare(self) -> None:
         max_conns = self.settings["max_websocket_connections"]
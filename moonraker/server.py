@@ -78,6 +78,8 @@ class Server:
         self.log_manager = log_manager
         self.app_args = args
         self.events: Dict[str, List[FlexCallback]] = {}
+        self.pending_events: List[Tuple[asyncio.Future, str, Tuple[Any, ...]]] = []
+        self.event_stats: Dict[str, Dict[str, Any]] = {}
         self.components: Dict[str, Any] = {}
         self.failed_components: List[str] = []
         self.warnings: Dict[str, str] = {}
@@ -124,11 +126,13 @@ class Server:
         self.register_endpoint(
             "/server/restart", RequestType.POST, self._handle_server_restart
         )
+        self.register_debug_endpoint(
+            "/debug/events/stats", RequestType.GET, self._handle_event_stats_request
+        )
         self.register_notification("server:klippy_ready")
         self.register_notification("server:klippy_shutdown")
         self.register_notification("server:klippy_disconnect",
                                    "klippy_disconnected")
-        self.register_notification("server:gcode_response")
 
     def get_app_args(self) -> Dict[str, Any]:
         return dict(self.app_args)
@@ -392,15 +396,33 @@ class Server:
 
     def send_event(self, event: str, *args) -> asyncio.Future:
         fut = self.event_loop.create_future()
-        self.event_loop.register_callback(
-            self._process_event, fut, event, *args)
+        # Events sent during the same loop iteration are dispatched
+        # together in a single callback
+        self.pending_events.append((fut, event, args))
+        if len(self.pending_events) == 1:
+            self.event_loop.call_soon(self._dispatch_pending_events)
         return fut
 
-    async def _process_event(
+    def _dispatch_pending_events(self) -> None:
+        pending = self.pending_events
+        self.pending_events = []
+        for fut, event, args in pending:
+            self._process_event(fut, event, *args)
+
+    def _process_event(
         self, fut: asyncio.Future, event: str, *args
     ) -> None:
         events = self.events.get(event, [])
+        stats = self.event_stats.get(event)
+        if stats is None:
+            stats = self.event_stats[event] = {
+                "dispatch_count": 0,
+                "handler_time": 0.,
+                "max_handler_time": 0.
+            }
+        stats["dispatch_count"] += 1
         coroutines: List[Coroutine] = []
+        start_time = time.perf_counter()
         for func in events:
             try:
                 ret = func(*args)
@@ -409,22 +431,59 @@ class Server:
             else:
                 if ret is not None:
                     coroutines.append(ret)
+        elapsed = time.perf_counter() - start_time
         if coroutines:
-            results = await asyncio.gather(*coroutines, return_exceptions=True)
-            for val in results:
-                if isinstance(val, Exception):
-                    if sys.version_info < (3, 10):
-                        exc_info = "".join(traceback.format_exception(
-                            type(val), val, val.__traceback__
-                        ))
-                    else:
-                        exc_info = "".join(traceback.format_exception(val))
-                    logging.info(
-                        f"\nError processing callback in event {event}\n{exc_info}"
-                    )
+            # Only events with coroutine handlers require a task
+            self.event_loop.create_task(
+                self._await_event_handlers(fut, event, coroutines, elapsed)
+            )
+            return
+        self._update_event_stats(stats, elapsed)
+        if not fut.done():
+            fut.set_result(None)
+
+    async def _await_event_handlers(
+        self,
+        fut: asyncio.Future,
+        event: str,
+        coroutines: List[Coroutine],
+        elapsed: float
+    ) -> None:
+        start_time = time.perf_counter()
+        results = await asyncio.gather(*coroutines, return_exceptions=True)
+        elapsed += time.perf_counter() - start_time
+        self._update_event_stats(self.event_stats[event], elapsed)
+        for val in results:
+            if isinstance(val, Exception):
+                if sys.version_info < (3, 10):
+                    exc_info = "".join(traceback.format_exception(
+                        type(val), val, val.__traceback__
+                    ))
+                else:
+                    exc_info = "".join(traceback.format_exception(val))
+                logging.info(
+                    f"\nError processing callback in event {event}\n{exc_info}"
+                )
         if not fut.done():
             fut.set_result(None)
 
+    def _update_event_stats(self, stats: Dict[str, Any], elapsed: float) -> None:
+        stats["handler_time"] += elapsed
+        if elapsed > stats["max_handler_time"]:
+            stats["max_handler_time"] = elapsed
+
+    def get_event_stats(self) -> Dict[str, Dict[str, Any]]:
+        ret: Dict[str, Dict[str, Any]] = {}
+        for event, stats in self.event_stats.items():
+            count: int = stats["dispatch_count"]
+            ret[event] = {
+                "dispatch_count": count,
+                "handler_time": round(stats["handler_time"], 6),
+                "avg_handler_time": round(stats["handler_time"] / count, 6),
+                "max_handler_time": round(stats["max_handler_time"], 6)
+            }
+        return ret
+
     def register_remote_method(
         self, method_name: str, cb: FlexCallback
     ) -> None:
@@ -507,6 +566,11 @@ class Server:
         self.event_loop.register_callback(self._stop_server)
         return "ok"
 
+    async def _handle_event_stats_request(
+        self, web_request: WebRequest
+    ) -> Dict[str, Any]:
+        return {"events": self.get_event_stats()}
+
     async def _handle_info_request(self, web_request: WebRequest) -> Dict[str, Any]:
         raw = web_request.get_boolean("raw", False)
         file_manager: Optional[FileManager] = self.lookup_component(
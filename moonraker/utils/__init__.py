@@ -256,6 +256,67 @@ def get_unix_peer_credentials(
         "group_id": gid
     }
 
+class FrameReader:
+    """
+    Reads delimited frames from a StreamReader in large chunks.  All
+    complete frames available in a chunk are returned together as
+    memoryviews referencing the received data, avoiding a copy and
+    a coroutine wakeup per frame.
+    """
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        delimiter: bytes = b"\x03",
+        chunk_size: int = 256 * 1024,
+        limit: int = 20 * 1024 * 1024
+    ) -> None:
+        self.reader = reader
+        self.delimiter = delimiter
+        self.chunk_size = chunk_size
+        self.limit = limit
+        self._partial = bytearray()
+
+    def at_eof(self) -> bool:
+        return self.reader.at_eof()
+
+    async def read_frames(self) -> List[memoryview]:
+        delim = self.delimiter
+        while True:
+            chunk = await self.reader.read(self.chunk_size)
+            if not chunk:
+                partial = bytes(self._partial)
+                self._partial = bytearray()
+                raise asyncio.IncompleteReadError(partial, None)
+            data: Union[bytes, bytearray] = chunk
+            search_start = 0
+            if self._partial:
+                # The partial buffer is never referenced by a returned view,
+                # so it is safe to extend in place.
+                search_start = max(0, len(self._partial) - len(delim) + 1)
+                self._partial += chunk
+                data = self._partial
+            idx = data.find(delim, search_start)
+            if idx < 0:
+                if data is chunk:
+                    self._partial = bytearray(chunk)
+                if len(self._partial) > self.limit:
+                    self._partial = bytearray()
+                    raise asyncio.LimitOverrunError(
+                        "Frame exceeds the buffer limit", self.limit
+                    )
+                continue
+            frames: List[memoryview] = []
+            view = memoryview(data)
+            start = 0
+            while idx >= 0:
+                frames.append(view[start:idx])
+                start = idx + len(delim)
+                idx = data.find(delim, start)
+            # Frames reference the current buffer, unprocessed data is
+            # moved to a new buffer.
+            self._partial = bytearray(view[start:])
+            return frames
+
 def pretty_print_time(seconds: int) -> str:
     if seconds == 0:
         return "0 Seconds"
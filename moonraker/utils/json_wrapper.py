@@ -11,7 +11,9 @@ from typing import Any, Union, TYPE_CHECKING
 
 if TYPE_CHECKING:
     def dumps(obj: Any) -> bytes: ...  # type: ignore # noqa: E704
-    def loads(data: Union[str, bytes, bytearray]) -> Any: ...  # noqa: E704
+    def loads(  # noqa: E704
+        data: Union[str, bytes, bytearray, memoryview]
+    ) -> Any: ...
 
 MSGSPEC_ENABLED = False
 _msgspc_var = os.getenv("MOONRAKER_ENABLE_MSGSPEC", "y").lower()
@@ -27,7 +29,11 @@ if _msgspc_var in ["y", "yes", "true"]:
 if not MSGSPEC_ENABLED:
     import json
     from json import JSONDecodeError  # type: ignore # noqa: F401,F811
-    loads = json.loads  # type: ignore
+
+    def loads(data) -> Any:  # type: ignore # noqa: F811
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
 
     def dumps(obj) -> bytes:  # type: ignore # noqa: F811
         return json.dumps(obj, separators=(",", ":")).encode("utf-8")
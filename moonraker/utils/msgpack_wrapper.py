@@ -0,0 +1,32 @@
+# Wrapper for msgspec's MessagePack support
+#
+# Copyright (C) 2026 Moonraker Contributors
+#
+# This file may be distributed under the terms of the GNU GPLv3 license
+
+from __future__ import annotations
+import contextlib
+from . import json_wrapper as jsonw
+from typing import Any, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    def dumps(obj: Any) -> bytes: ...  # type: ignore # noqa: E704
+    def loads(  # noqa: E704
+        data: Union[bytes, bytearray, memoryview]
+    ) -> Any: ...
+
+MSGPACK_ENABLED = False
+if jsonw.MSGSPEC_ENABLED:
+    with contextlib.suppress(ImportError):
+        import msgspec
+        encoder = msgspec.msgpack.Encoder()
+        decoder = msgspec.msgpack.Decoder()
+        dumps = encoder.encode  # type: ignore # noqa: F811
+        loads = decoder.decode  # type: ignore # noqa: F811
+        MSGPACK_ENABLED = True
+if not MSGPACK_ENABLED:
+    def loads(data) -> Any:  # type: ignore # noqa: F811
+        raise RuntimeError("MessagePack support requires msgspec")
+
+    def dumps(obj) -> bytes:  # type: ignore # noqa: F811
+        raise RuntimeError("MessagePack support requires msgspec")
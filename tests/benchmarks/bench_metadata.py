@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# Benchmark for gcode metadata extraction
+#
+# Generates a corpus of synthetic gcode files that mimic the output of
+# several slicers, then measures the time spent identifying the slicer
+# and running the metadata parsers on each file.  Pass "--dump" to print
+# the extracted metadata, which is useful to verify that changes to the
+# parsers do not alter their output.
+#
+# Usage: python3 tests/benchmarks/bench_metadata.py [-n ITERATIONS] [-s SIZE]
+
+from __future__ import annotations
+import sys
+import io
+import json
+import base64
+import pathlib
+import argparse
+import random
+import tempfile
+import time
+from PIL import Image
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(pathlib.Path(__file__).parents[2]))
+from moonraker.components.file_manager import metadata  # noqa: E402
+
+LAYER_HEIGHT = .2
+
+def make_thumbnail(prefix: str, width: int, height: int) -> List[str]:
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), (0xE0, 0x60, 0x20)).save(buf, "PNG")
+    data = base64.b64encode(buf.getvalue()).decode()
+    lines = [f"; {prefix} begin {width}x{height} {len(data)}"]
+    lines.extend(f"; {data[i:i + 78]}" for i in range(0, len(data), 78))
+    lines.append(f"; {prefix} end")
+    lines.append(";")
+    return lines
+
+def make_moves(
+    size: int, rng: random.Random, layer_fmt: List[str], z_fmt: str
+) -> List[str]:
+    lines: List[str] = []
+    total = 0
+    layer = 0
+    while total < size:
+        z = round((layer + 1) * LAYER_HEIGHT, 2)
+        for fmt in layer_fmt:
+            lines.append(fmt.format(layer=layer, z=z))
+        lines.append(z_fmt.format(z=z))
+        for _ in range(2000):
+            line = (
+                f"G1 X{rng.uniform(0, 250):.3f} Y{rng.uniform(0, 210):.3f} "
+                f"E{rng.uniform(0, 2):.5f}"
+            )
+            total += len(line) + 1
+            lines.append(line)
+        layer += 1
+    return lines
+
+def prusa_config(rng: random.Random) -> List[str]:
+    settings: Dict[str, str] = {
+        "bed_temperature": "60",
+        "chamber_temperature": "0",
+        "extruder_colour": '""',
+        "filament_colour": "#FF8000",
+        "filament_settings_id": '"Prusament PLA"',
+        "filament_type": "PLA",
+        "first_layer_bed_temperature": "60",
+        "first_layer_height": "0.2",
+        "first_layer_temperature": "215",
+        "layer_height": str(LAYER_HEIGHT),
+        "nozzle_diameter": "0.4",
+        "printer_model": "MK4",
+        "printer_variant": "0.4",
+        "printer_vendor": "",
+        "profile_version": "1.12.0",
+        "single_extruder_multi_material": "0",
+        "temperature": "210",
+    }
+    # Pad with the unrelated settings present in a real config block
+    for i in range(400):
+        settings[f"setting_{i:03d}"] = f"{rng.random():.4f},{rng.random():.4f}"
+    return [f"; {key} = {val}" for key, val in sorted(settings.items())]
+
+def gen_prusa(size: int, rng: random.Random) -> str:
+    lines = [
+        "; generated by PrusaSlicer 2.7.1+linux-x64-GTK3 on "
+        "2024-01-10 at 14:21:52 UTC",
+        "",
+        ";",
+    ]
+    lines.extend(make_thumbnail("thumbnail", 16, 16))
+    lines.extend(make_thumbnail("thumbnail", 220, 124))
+    lines.extend(["", "; external perimeters extrusion width = 0.45mm"])
+    lines.extend(["M190 S60", "M109 S215", "G28", "; printing object cube.stl"])
+    lines.extend(make_moves(
+        size, rng, [";LAYER_CHANGE", ";Z:{z}", ";HEIGHT:0.2",
+                    ";BEFORE_LAYER_CHANGE", "G92 E0", ";{z}", ""],
+        "G1 Z{z} F720"
+    ))
+    lines.extend([
+        "M84", "",
+        "; filament used [mm] = 2471.32",
+        "; filament used [cm3] = 5.94",
+        "; filament used [g] = 7.37",
+        "; filament cost = 0.18",
+        "; total filament used [g] = 7.37",
+        "; total filament cost = 0.18",
+        "; estimated printing time (normal mode) = 1h 2m 13s",
+        "; estimated first layer printing time (normal mode) = 1m 57s",
+        "",
+        "; prusaslicer_config = begin",
+    ])
+    lines.extend(prusa_config(rng))
+    lines.append("; prusaslicer_config = end")
+    return "\n".join(lines) + "\n"
+
+def gen_orca(size: int, rng: random.Random) -> str:
+    lines = [
+        "; HEADER_BLOCK_START",
+        "; generated by OrcaSlicer 2.0.0 on 2024-03-02 at 10:12:11",
+        "; total layer number: 150",
+        "; HEADER_BLOCK_END",
+        "",
+        "; THUMBNAIL_BLOCK_START",
+    ]
+    lines.extend(make_thumbnail("thumbnail", 300, 300))
+    lines.extend(["; THUMBNAIL_BLOCK_END", ""])
+    lines.extend(["M190 S65", "M109 S220", "G28"])
+    lines.extend(make_moves(
+        size, rng, [";LAYER_CHANGE", ";Z:{z}", ";HEIGHT:0.2",
+                    ";BEFORE_LAYER_CHANGE", ";{z}", ""],
+        "G1 Z{z} F720"
+    ))
+    lines.extend([
+        "M84", "",
+        "; filament used [mm] = 3012.11",
+        "; filament used [cm3] = 7.24",
+        "; filament used [g] = 9.01",
+        "; filament cost = 0.22",
+        "; total filament used [g] = 9.01",
+        "; total filament cost = 0.22",
+        "; total layers count = 150",
+        "; total filament change = 0",
+        "; estimated printing time (normal mode) = 1d 2h 3m 4s",
+        "",
+        "; CONFIG_BLOCK_START",
+    ])
+    config = prusa_config(rng)
+    config.append("; nozzle_temperature = 220,220")
+    config.sort()
+    lines.extend(config)
+    lines.append("; CONFIG_BLOCK_END")
+    return "\n".join(lines) + "\n"
+
+def gen_cura(size: int, rng: random.Random) -> str:
+    lines = [
+        ";FLAVOR:Marlin",
+        ";TIME:6012",
+        ";Filament used: 2.51223m",
+        ";Layer height: 0.2",
+        ";MINX:80.2", ";MINY:80.2", ";MINZ:0.2",
+        ";MAXX:140.8", ";MAXY:140.8", ";MAXZ:30",
+        ";TARGET_MACHINE.NAME:Creality Ender-3",
+        ";Generated with Cura_SteamEngine 5.6.0",
+        "M140 S60", "M105", "M190 S60", "M104 S200", "M105", "M109 S200",
+        "G28", ";LAYER_COUNT:150",
+    ]
+    lines.extend(make_moves(
+        size, rng, [";LAYER:{layer}", ";MESH:cube.stl"], "G0 F600 Z{z}"
+    ))
+    lines.extend([
+        "M84", ";TIME_ELAPSED:6012.5", ";End of Gcode",
+        ";SETTING_3 {\"global_quality\": \"[general]\\\\nversion = 4\"}",
+    ])
+    return "\n".join(lines) + "\n"
+
+def gen_simplify3d(size: int, rng: random.Random) -> str:
+    lines = [
+        "; G-Code generated by Simplify3D(R) Version 4.1.2",
+        "; Jan 10, 2024 at 2:21:52 PM",
+        "; Settings Summary",
+        ";   extruderDiameter,0.4",
+        ";   layerHeight,0.2",
+        ";   printMaterial,PLA",
+        ";   temperatureName,Extruder 1,Heated Bed",
+        ";   temperatureSetpointTemperatures,210,60",
+    ]
+    lines.extend(make_moves(size, rng, ["; layer {layer}, Z = {z}"], "G1 Z{z} F1000"))
+    lines.extend([
+        "; Build Summary",
+        ";   Build time: 1 hours 12 minutes",
+        ";   Filament length: 2012.3 mm (2.01 m)",
+        ";   Plastic weight: 6.01 g (0.01 lb)",
+        ";   makerBotModelMaterial,PLA",
+    ])
+    return "\n".join(lines) + "\n"
+
+def gen_ideamaker(size: int, rng: random.Random) -> str:
+    lines = [
+        ";Sliced by ideaMaker 4.4.1.6678, 2024-01-10 14:21:52",
+        ";Dimension: 250.00 210.00 210.00 0.40",
+        ";Bounding Box: 30.00 30.00 20.00",
+        ";Filament Type .0: PLA",
+        ";Filament Name .0: Raise3D PLA",
+        ";Filament Diameter .0: 1.75",
+        ";Filament Density .0: 1.24",
+        "M190 S60", "M109 T0 S210", ";PRINTING: cube.stl",
+    ]
+    lines.extend(make_moves(
+        size, rng, [";LAYER:{layer}", ";Z:{z}", ";HEIGHT:0.2"], "G1 Z{z} F900"
+    ))
+    lines.extend([";Print Time: 4012", ";Material#1 Used: 2301.2"])
+    return "\n".join(lines) + "\n"
+
+def gen_kirimoto(size: int, rng: random.Random) -> str:
+    lines = [
+        "; Generated by Kiri:Moto 4.1.2",
+        "; Tue Jan 10 2024 14:21:52",
+        "; firstSliceHeight = 0.25",
+        "; sliceHeight = 0.2",
+        "; firstLayerNozzleTemp = 215",
+        "; firstLayerBedTemp = 65",
+    ]
+    lines.extend(make_moves(
+        size, rng, [";; --- layer {layer} (0.2 @ {z}) ---"], "G1 Z{z} F900\n"
+    ))
+    lines.extend(["; --- filament used: 2211.23 mm ---", "; --- print time: 3611s ---"])
+    return "\n".join(lines) + "\n"
+
+def gen_unknown(size: int, rng: random.Random) -> str:
+    lines = ["; custom gcode", "M190 S55", "M109 S205", "G28"]
+    lines.extend(make_moves(size, rng, [], "G1 Z{z} F900"))
+    return "\n".join(lines) + "\n"
+
+GENERATORS: Dict[str, Callable[[int, random.Random], str]] = {
+    "prusaslicer": gen_prusa,
+    "orcaslicer": gen_orca,
+    "cura": gen_cura,
+    "simplify3d": gen_simplify3d,
+    "ideamaker": gen_ideamaker,
+    "kirimoto": gen_kirimoto,
+    "unknown": gen_unknown,
+}
+
+def build_corpus(dest: pathlib.Path, size: int) -> List[pathlib.Path]:
+    rng = random.Random(42)
+    files: List[pathlib.Path] = []
+    for name, gen in GENERATORS.items():
+        path = dest.joinpath(f"{name}.gcode")
+        path.write_text(gen(size, rng))
+        files.append(path)
+    return files
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Metadata extraction benchmark")
+    parser.add_argument("-n", "--iterations", type=int, default=10)
+    parser.add_argument(
+        "-s", "--size", type=float, default=8.,
+        help="approximate size of each generated file in MiB"
+    )
+    parser.add_argument(
+        "-d", "--dump", action="store_true", help="print the extracted metadata"
+    )
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        files = build_corpus(pathlib.Path(tmpdir), int(args.size * 1024 * 1024))
+        print(f"Files: {len(files)}, Size: {args.size} MiB, "
+              f"Iterations: {args.iterations}")
+        total = 0.
+        for path in files:
+            result: Dict[str, object] = {}
+            start = time.perf_counter()
+            for _ in range(args.iterations):
+                slicer = metadata.BaseSlicer.from_file(str(path))
+                result = slicer.run_parsers()
+            elapsed = (time.perf_counter() - start) / args.iterations
+            total += elapsed
+            print(f"{path.stem}: {slicer.slicer_name} {slicer.slicer_version}, "
+                  f"{elapsed * 1000:.2f} ms/file")
+            if args.dump:
+                print(json.dumps(result, indent=2, sort_keys=True))
+        print(f"total: {total * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
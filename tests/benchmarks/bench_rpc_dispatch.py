@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# Micro-benchmark for JSON-RPC request dispatch
+#
+# Measures the per-request overhead of JsonRPC.dispatch for the
+# "printer.objects.query" and "server.info" methods.  The endpoint
+# callbacks are stubs, so the results reflect the time spent parsing,
+# validating and routing requests.
+#
+# Usage: python3 tests/benchmarks/bench_rpc_dispatch.py [-n ITERATIONS]
+
+from __future__ import annotations
+import sys
+import pathlib
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(pathlib.Path(__file__).parents[2]))
+from moonraker.common import (  # noqa: E402
+    APIDefinition,
+    APITransport,
+    JsonRPC,
+    RequestType,
+    TransportType,
+    WebRequest
+)
+from moonraker.utils import json_wrapper as jsonw  # noqa: E402
+
+class StubServer:
+    def is_verbose_enabled(self) -> bool:
+        return False
+
+class StubTransport(APITransport):
+    @property
+    def transport_type(self) -> TransportType:
+        return TransportType.WEBSOCKET
+
+async def objects_query(web_request: WebRequest) -> Dict[str, Any]:
+    objects: Dict[str, Any] = web_request.get("objects")
+    return {"eventtime": 0., "status": {name: {} for name in objects}}
+
+async def server_info(web_request: WebRequest) -> Dict[str, Any]:
+    web_request.get_boolean("verbose", False)
+    return {"klippy_connected": True, "klippy_state": "ready", "components": []}
+
+def build_rpc() -> JsonRPC:
+    rpc = JsonRPC(StubServer())  # type: ignore
+    APIDefinition.reset_cache()
+    defs = [
+        APIDefinition.create(
+            "objects/query", RequestType.GET, objects_query, is_remote=True
+        ),
+        APIDefinition.create("/server/info", RequestType.GET, server_info)
+    ]
+    for api_def in defs:
+        for req_type, method in api_def.rpc_items():
+            rpc.register_method(method, req_type, api_def)
+    return rpc
+
+async def run_requests(
+    rpc: JsonRPC, requests: List[bytes], iterations: int
+) -> float:
+    transport = StubTransport()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for req in requests:
+            await rpc.dispatch(req, transport)
+    return time.perf_counter() - start
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="JSON-RPC dispatch benchmark")
+    parser.add_argument("-n", "--iterations", type=int, default=10000)
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+    rpc = build_rpc()
+    query = jsonw.dumps({
+        "jsonrpc": "2.0",
+        "method": "printer.objects.query",
+        "params": {"objects": {"toolhead": None, "extruder": ["temperature"]}},
+        "id": 1
+    })
+    info = jsonw.dumps({"jsonrpc": "2.0", "method": "server.info", "id": 2})
+    print(f"JSON Encoder: {'msgspec' if jsonw.MSGSPEC_ENABLED else 'json'}, "
+          f"Iterations: {args.iterations}, Repeat: {args.repeat}")
+    for desc, requests in [
+        ("printer.objects.query", [query]),
+        ("server.info", [info]),
+    ]:
+        best = min([
+            await run_requests(rpc, requests, args.iterations)
+            for _ in range(args.repeat)
+        ])
+        per_req = best / args.iterations * 1e6
+        print(f"{desc}: {per_req:.2f} us/request (best of {args.repeat})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# Micro-benchmark for status update fan-out
+#
+# Compares the per-connection filtering loop previously used by
+# KlippyConnection._process_status_update with the SubscriptionIndex.
+#
+# Usage: python3 tests/benchmarks/bench_status_fanout.py [-c CLIENTS] [-o OBJECTS]
+
+from __future__ import annotations
+import sys
+import pathlib
+import argparse
+import random
+import timeit
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(pathlib.Path(__file__).parents[2]))
+from moonraker.components.klippy_connection import SubscriptionIndex  # noqa: E402
+
+FIELDS_PER_OBJECT = 10
+
+class Client:
+    pass
+
+def build_subscriptions(
+    clients: int, objects: int, rng: random.Random
+) -> Dict[Any, Dict[str, Optional[List[str]]]]:
+    obj_names = [f"object_{i}" for i in range(objects)]
+    field_names = [f"field_{i}" for i in range(FIELDS_PER_OBJECT)]
+    # A handful of distinct UIs, many clients share a subscription
+    profiles: List[Dict[str, Optional[List[str]]]] = []
+    for _ in range(5):
+        sub: Dict[str, Optional[List[str]]] = {}
+        for name in rng.sample(obj_names, k=max(1, objects // 2)):
+            if rng.random() < .5:
+                sub[name] = None
+            else:
+                sub[name] = rng.sample(field_names, k=3)
+        profiles.append(sub)
+    subs: Dict[Any, Dict[str, Optional[List[str]]]] = {}
+    for i in range(clients):
+        if i % 5 == 4:
+            # Some clients have a unique subscription
+            subs[Client()] = {
+                name: None for name in rng.sample(obj_names, k=objects // 4)
+            }
+        else:
+            subs[Client()] = profiles[i % len(profiles)]
+    return subs
+
+def naive_fanout(
+    subs: Dict[Any, Dict[str, Optional[List[str]]]],
+    status: Dict[str, Dict[str, Any]]
+) -> int:
+    count = 0
+    for sub in subs.values():
+        conn_status: Dict[str, Any] = {}
+        for name, fields in sub.items():
+            if name in status:
+                val: Dict[str, Any] = dict(status[name])
+                if fields is not None:
+                    val = {k: v for k, v in val.items() if k in fields}
+                if val:
+                    conn_status[name] = val
+        if conn_status:
+            count += 1
+    return count
+
+def indexed_fanout(
+    index: SubscriptionIndex, status: Dict[str, Dict[str, Any]]
+) -> int:
+    count = 0
+    for key in index.filter_status(status):
+        count += len(index.get_connections(key))
+    return count
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Status fan-out benchmark")
+    parser.add_argument("-c", "--clients", type=int, default=50)
+    parser.add_argument("-o", "--objects", type=int, default=100)
+    parser.add_argument("-n", "--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    rng = random.Random(42)
+    subs = build_subscriptions(args.clients, args.objects, rng)
+    index = SubscriptionIndex()
+    index.rebuild(subs)
+    obj_names = [f"object_{i}" for i in range(args.objects)]
+    deltas = {
+        "single field": {"object_0": {"field_0": 1.}},
+        "typical (5 objects, 2 fields)": {
+            name: {"field_0": 1., "field_1": 2.}
+            for name in rng.sample(obj_names, k=5)
+        },
+        "full (all objects, all fields)": {
+            name: {f"field_{i}": float(i) for i in range(FIELDS_PER_OBJECT)}
+            for name in obj_names
+        },
+    }
+    print(
+        f"Clients: {args.clients}, Objects: {args.objects}, "
+        f"Subscription Groups: {len(index)}, Iterations: {args.iterations}"
+    )
+    for desc, status in deltas.items():
+        assert naive_fanout(subs, status) == indexed_fanout(index, status)
+        naive = timeit.timeit(
+            lambda: naive_fanout(subs, status), number=args.iterations
+        )
+        indexed = timeit.timeit(
+            lambda: indexed_fanout(index, status), number=args.iterations
+        )
+        per_naive = naive / args.iterations * 1e6
+        per_indexed = indexed / args.iterations * 1e6
+        print(
+            f"{desc}:\n  naive: {per_naive:.1f} us/update, "
+            f"indexed: {per_indexed:.1f} us/update, "
+            f"speedup: {per_naive / per_indexed:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+from __future__ import annotations
+import pytest
+import gzip
+import zlib
+import pathlib
+from typing import List
+from moonraker.utils import ServerError
+from moonraker.components import application
+from moonraker.components.application import (
+    UploadDecoder,
+    UploadTarget,
+    DECODE_CHUNK_SIZE
+)
+from streaming_form_data import StreamingFormDataParser
+
+BOMB_SIZE = 64 * 1024 * 1024
+MAX_SIZE = 1024 * 1024
+
+requires_zstd = pytest.mark.skipif(
+    not UploadDecoder.is_supported("zstd"), reason="zstd is not available"
+)
+
+def zstd_compress(data: bytes) -> bytes:
+    if application.ZSTD_MODULE == "compression.zstd":
+        from compression import zstd  # type: ignore
+        return zstd.compress(data)
+    import zstandard  # type: ignore
+    return zstandard.ZstdCompressor().compress(data)
+
+@pytest.fixture(scope="module")
+def gzip_bomb() -> bytes:
+    cobj = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    block = bytes(1024 * 1024)
+    parts = [cobj.compress(block) for _ in range(BOMB_SIZE // len(block))]
+    parts.append(cobj.flush())
+    return b"".join(parts)
+
+def test_decode_gzip():
+    data = b"G1 X10 Y10\n" * 100000
+    encoded = gzip.compress(data)
+    decoder = UploadDecoder("gzip", MAX_SIZE * 2)
+    pieces = list(decoder.decompress(encoded[:1000]))
+    pieces.extend(decoder.decompress(encoded[1000:]))
+    decoder.check_complete()
+    assert b"".join(pieces) == data
+    assert max(len(p) for p in pieces) <= DECODE_CHUNK_SIZE
+
+def test_decode_concatenated_members():
+    encoded = gzip.compress(b"first\n") + gzip.compress(b"second\n")
+    decoder = UploadDecoder("gzip")
+    assert b"".join(decoder.decompress(encoded)) == b"first\nsecond\n"
+    decoder.check_complete()
+
+@pytest.mark.parametrize(
+    "encoding", ["gzip", pytest.param("zstd", marks=requires_zstd)]
+)
+def test_decode_member_boundary(encoding: str):
+    compress = gzip.compress if encoding == "gzip" else zstd_compress
+    parts = [b"first\n" * 1000, b"second\n" * 1000, b"third\n" * 1000]
+    decoder = UploadDecoder(encoding)
+    pieces: List[bytes] = []
+    # Each chunk received ends exactly at the end of a member or frame
+    for part in parts:
+        pieces.extend(decoder.decompress(compress(part)))
+        decoder.check_complete()
+    assert b"".join(pieces) == b"".join(parts)
+
+@requires_zstd
+def test_decode_zstd():
+    data = b"G1 X10 Y10\n" * 100000
+    encoded = zstd_compress(data[:500000]) + zstd_compress(data[500000:])
+    decoder = UploadDecoder("zstd", MAX_SIZE * 2)
+    pieces: List[bytes] = []
+    for offset in range(0, len(encoded), 1000):
+        pieces.extend(decoder.decompress(encoded[offset:offset + 1000]))
+    decoder.check_complete()
+    assert b"".join(pieces) == data
+
+@requires_zstd
+def test_decode_zstd_size_limit():
+    decoder = UploadDecoder("zstd", MAX_SIZE)
+    pieces = decoder.decompress(zstd_compress(bytes(BOMB_SIZE)))
+    with pytest.raises(ServerError) as excinfo:
+        for piece in pieces:
+            assert len(piece) <= DECODE_CHUNK_SIZE
+    assert excinfo.value.status_code == 413
+    assert decoder.size <= MAX_SIZE + DECODE_CHUNK_SIZE
+
+def test_decode_incomplete():
+    encoded = gzip.compress(b"G28\n" * 1000)
+    decoder = UploadDecoder("gzip")
+    list(decoder.decompress(encoded[:-10]))
+    with pytest.raises(ServerError) as excinfo:
+        decoder.check_complete()
+    assert excinfo.value.status_code == 400
+
+def test_decode_invalid():
+    decoder = UploadDecoder("gzip")
+    with pytest.raises(ServerError) as excinfo:
+        list(decoder.decompress(b"not gzip data"))
+    assert excinfo.value.status_code == 400
+
+def test_decode_size_limit(gzip_bomb: bytes):
+    decoder = UploadDecoder("gzip", MAX_SIZE)
+    pieces = decoder.decompress(gzip_bomb)
+    with pytest.raises(ServerError) as excinfo:
+        for piece in pieces:
+            assert len(piece) <= DECODE_CHUNK_SIZE
+    assert excinfo.value.status_code == 413
+    assert decoder.size <= MAX_SIZE + DECODE_CHUNK_SIZE
+
+def test_upload_gzip_bomb(tmp_path: pathlib.Path, gzip_bomb: bytes):
+    boundary = "moonrakertestboundary"
+    body = (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="file"; '
+        'filename="bomb.gcode.gz"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode() + gzip_bomb + f"\r\n--{boundary}--\r\n".encode()
+    headers = {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+    tmp_file = tmp_path.joinpath("upload.gcode")
+    target = UploadTarget(str(tmp_file), MAX_SIZE)
+    parser = StreamingFormDataParser(headers)
+    parser.register("file", target)
+    with pytest.raises(ServerError) as excinfo:
+        for offset in range(0, len(body), 64 * 1024):
+            parser.data_received(body[offset:offset + 64 * 1024])
+    target.on_finish()
+    assert excinfo.value.status_code == 413
+    assert target.size <= MAX_SIZE
+    assert tmp_file.stat().st_size <= MAX_SIZE
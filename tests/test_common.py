@@ -0,0 +1,94 @@
+from __future__ import annotations
+import pytest
+import asyncio
+from types import SimpleNamespace
+from typing import Any, Dict, Optional, Tuple, Union
+from moonraker.common import BaseRemoteConnection
+from moonraker.utils import json_wrapper as jsonw
+from moonraker.eventloop import EventLoop
+
+class StalledConnection(BaseRemoteConnection):
+    def __init__(self, max_queue_size: int, stall_timeout: float) -> None:
+        self.close_args: Optional[Tuple[int, str]] = None
+        self.write_blocked = asyncio.Event()
+        evtloop = EventLoop()
+        wsm = SimpleNamespace(
+            max_queue_size=max_queue_size, stall_timeout=stall_timeout
+        )
+        server: Any = SimpleNamespace(
+            get_event_loop=lambda: evtloop,
+            lookup_component=lambda name: wsm
+        )
+        self.on_create(server)
+
+    async def write_to_socket(self, message: Union[bytes, str]) -> None:
+        # Simulate a client that never reads from the socket
+        await self.write_blocked.wait()
+
+    def close_socket(self, code: int, reason: str) -> None:
+        self.close_args = (code, reason)
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_notifications():
+    conn = StalledConnection(3, 0.)
+    for _ in range(6):
+        conn.call_method("notify_proc_stat_update")
+    await asyncio.sleep(0)
+    assert conn.dropped_messages > 0
+    queued = len(conn.message_buf)
+    conn.queue_message(b'{"jsonrpc": "2.0", "result": "ok", "id": 1}')
+    conn.call_method_with_response("test_method")
+    assert len(conn.message_buf) == queued + 2
+    conn.write_blocked.set()
+    await asyncio.sleep(0)
+
+@pytest.mark.asyncio
+async def test_full_queue_keeps_state_notifications():
+    conn = StalledConnection(3, 0.)
+    conn.call_method("notify_proc_stat_update")
+    # Allow the writer to block on the first message, then fill the queue
+    await asyncio.sleep(0)
+    for _ in range(3):
+        conn.call_method("notify_proc_stat_update")
+    queued = len(conn.message_buf)
+    conn.call_method("notify_proc_stat_update")
+    assert conn.dropped_messages == 1
+    # State changes are queued, the client would otherwise be left stale
+    conn.call_method("notify_klippy_ready")
+    cache: Dict[str, bytes] = {}
+    conn.queue_shared_message(
+        {"jsonrpc": "2.0", "method": "notify_filelist_changed"}, cache
+    )
+    conn.queue_shared_message(
+        {"jsonrpc": "2.0", "method": "notify_gcode_response"}, {}
+    )
+    assert conn.dropped_messages == 2
+    assert [
+        jsonw.loads(msg)["method"] for msg in list(conn.message_buf)[queued:]
+    ] == ["notify_klippy_ready", "notify_filelist_changed"]
+    conn.write_blocked.set()
+    await asyncio.sleep(0)
+
+@pytest.mark.asyncio
+async def test_stalled_queue_closed_without_traffic():
+    conn = StalledConnection(3, .1)
+    conn.call_method("notify_test")
+    # Allow the writer to block on the first message
+    await asyncio.sleep(0)
+    for _ in range(3):
+        conn.call_method("notify_test")
+    assert conn.close_args is None
+    await asyncio.sleep(.3)
+    assert conn.close_args == (1008, "Outbound Queue Stalled")
+    conn.write_blocked.set()
+    await asyncio.sleep(0)
+
+@pytest.mark.asyncio
+async def test_drained_queue_not_closed():
+    conn = StalledConnection(3, .1)
+    for _ in range(4):
+        conn.call_method("notify_test")
+    conn.write_blocked.set()
+    await asyncio.sleep(.3)
+    assert conn.close_args is None
+    assert not conn.message_buf
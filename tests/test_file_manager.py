@@ -0,0 +1,345 @@
+from __future__ import annotations
+import pytest
+import io
+import hashlib
+import pathlib
+import zipfile
+from types import SimpleNamespace
+import tornado.httputil
+import tornado.web
+from typing import Any, Dict, List, Optional, Tuple, cast
+from moonraker.utils import ServerError
+from moonraker.common import RequestType, StreamingResponse, WebRequest
+from moonraker.components.application import DynamicRequestHandler
+from moonraker.eventloop import EventLoop
+from moonraker.components.file_manager.file_manager import (
+    FileManager,
+    FileListIndex,
+    FileQueryFilter,
+    InotifyObserver,
+    UploadSession,
+    ZipItem,
+    ZipStream,
+    ZIP_STREAM_MAX_STREAMS
+)
+
+def make_server() -> Any:
+    evtloop = EventLoop()
+    return SimpleNamespace(
+        get_event_loop=lambda: evtloop,
+        error=ServerError,
+        is_running=lambda: False,
+        is_verbose_enabled=lambda: False,
+        add_warning=lambda *args, **kwargs: None
+    )
+
+def make_file_manager(
+    root_path: pathlib.Path, extra_roots: Dict[str, pathlib.Path] = {}
+) -> FileManager:
+    # A file manager with an indexed "config" root, extra roots are
+    # watched after the config root
+    server = make_server()
+    config: Any = SimpleNamespace(
+        get_server=lambda: server,
+        getboolean=lambda option, default, **kwargs: default
+    )
+    fm = FileManager.__new__(FileManager)
+    fm.server = server
+    fm.reserved_paths = {}
+    fm.full_access_roots = {"config"}
+    fm.file_paths = {"config": str(root_path)}
+    fm.file_paths.update({name: str(path) for name, path in extra_roots.items()})
+    fm.file_list_indexes = {}
+    fm.fs_observer = InotifyObserver(config, fm, Any, Any)
+    for name, path in fm.file_paths.items():
+        fm.fs_observer.add_root_watch(name, path)
+    fm.fs_observer.initialize()
+    return fm
+
+def make_file_manager_stub() -> FileManager:
+    fm = FileManager.__new__(FileManager)
+    fm.server = SimpleNamespace(error=ServerError)
+    return fm
+
+class MockConnection:
+    def __init__(self) -> None:
+        self.is_closed = False
+        self.messages: List[Any] = []
+
+    def accepts_notification(self, name: str, family: str) -> bool:
+        return True
+
+    def call_method(self, method: str, params: List[Any]) -> None:
+        self.messages.append((method, params))
+
+@pytest.fixture
+def zip_items(tmp_path: pathlib.Path) -> List[ZipItem]:
+    items: List[ZipItem] = []
+    for idx in range(3):
+        fpath = tmp_path.joinpath(f"file{idx}.gcode")
+        fpath.write_bytes(b"G1 X10\n" * 20000)
+        items.append(ZipItem(fpath, f"gcodes/{fpath.name}", fpath.stat().st_size))
+    return items
+
+@pytest.mark.asyncio
+async def test_zip_stream(zip_items: List[ZipItem]):
+    conn = MockConnection()
+    zstream = ZipStream(make_server(), zip_items, "test.zip", connection=conn)
+    data = b"".join([chunk async for chunk in zstream.stream()])
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert zf.namelist() == [item.arcname for item in zip_items]
+    assert ZipStream.active_streams == 0
+    # Progress is rate limited, the final file is always reported
+    assert conn.messages[-1][0] == "notify_zip_progress"
+    assert conn.messages[-1][1][0]["completed_files"] == len(zip_items)
+    assert len(conn.messages) < len(zip_items)
+
+@pytest.mark.asyncio
+async def test_zip_stream_limit(zip_items: List[ZipItem]):
+    server = make_server()
+    # Creating a stream does not take a slot until it is iterated
+    ZipStream(server, zip_items, "test.zip")
+    gens = [
+        ZipStream(server, zip_items, "test.zip").stream()
+        for _ in range(ZIP_STREAM_MAX_STREAMS + 1)
+    ]
+    for gen in gens[:-1]:
+        await gen.__anext__()
+    with pytest.raises(ServerError) as excinfo:
+        ZipStream.check_available(server)
+    assert excinfo.value.status_code == 503
+    with pytest.raises(ServerError) as excinfo:
+        await gens[-1].__anext__()
+    assert excinfo.value.status_code == 503
+    # Close a stream early, releasing its slot once the thread exits
+    await gens[0].aclose()
+    ZipStream.check_available(server)
+    for gen in gens[1:-1]:
+        async for _ in gen:
+            pass
+    assert ZipStream.active_streams == 0
+
+@pytest.mark.asyncio
+async def test_zip_stream_header_failure(zip_items: List[ZipItem]):
+    server = make_server()
+    conn: Any = SimpleNamespace(set_close_callback=lambda callback: None)
+    request = tornado.httputil.HTTPServerRequest(
+        "GET", "/server/files/zip/download", connection=conn
+    )
+    for _ in range(ZIP_STREAM_MAX_STREAMS + 1):
+        handler = tornado.web.RequestHandler(tornado.web.Application(), request)
+        zstream = ZipStream(server, zip_items, "bad\nname.zip")
+        response = StreamingResponse(
+            zstream.stream(), "application/zip", zstream.filename
+        )
+        # The Content-Disposition header is rejected before iteration
+        with pytest.raises(ValueError):
+            await DynamicRequestHandler._write_stream(
+                cast(DynamicRequestHandler, handler), response
+            )
+        assert ZipStream.active_streams == 0
+    ZipStream.check_available(server)
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "filename", ["bad\nname.zip", "bad\x00name.zip", "sub/name.zip", ""]
+)
+async def test_zip_download_invalid_filename(filename: str):
+    fm = make_file_manager_stub()
+    web_request = WebRequest(
+        "/server/files/zip/download",
+        {"filename": filename, "items": ["config/printer.cfg"]},
+        RequestType.GET
+    )
+    with pytest.raises(ServerError) as excinfo:
+        await fm._handle_zip_download(web_request)
+    assert excinfo.value.status_code == 400
+
+@pytest.fixture
+def config_root(tmp_path: pathlib.Path) -> pathlib.Path:
+    root_path = tmp_path.joinpath("config")
+    root_path.joinpath("private").mkdir(parents=True)
+    root_path.joinpath("printer.cfg").write_text("[printer]\n")
+    root_path.joinpath("private/secret.cfg").write_text("[secret]\n")
+    return root_path
+
+@pytest.mark.asyncio
+async def test_index_reserved_path_added(config_root: pathlib.Path):
+    fm = make_file_manager(config_root)
+    try:
+        flist = fm.fs_observer.list_files("config")
+        assert flist is not None and "private/secret.cfg" in flist
+        fm.add_reserved_path("private", config_root.joinpath("private"), False)
+        flist = fm.fs_observer.list_files("config")
+        assert flist is not None and set(flist) == {"printer.cfg"}
+        dir_info = fm.fs_observer.list_directory("config", str(config_root))
+        assert dir_info is not None
+        assert [d["dirname"] for d in dir_info["dirs"]] == ["private"]
+        assert dir_info["dirs"][0]["permissions"] == ""
+    finally:
+        fm.fs_observer.close()
+
+@pytest.mark.asyncio
+async def test_index_write_access_disabled(config_root: pathlib.Path):
+    fm = make_file_manager(config_root)
+    try:
+        flist = fm.fs_observer.list_files("config")
+        assert flist is not None and flist["printer.cfg"]["permissions"] == "rw"
+        fm.disable_write_access()
+        flist = fm.fs_observer.list_files("config")
+        assert flist is not None and flist["printer.cfg"]["permissions"] == "r"
+    finally:
+        fm.fs_observer.close()
+
+@pytest.mark.asyncio
+async def test_index_linked_root(tmp_path: pathlib.Path, config_root: pathlib.Path):
+    logs_root = tmp_path.joinpath("logs")
+    logs_root.joinpath("archive").mkdir(parents=True)
+    logs_root.joinpath("moonraker.log").write_text("log\n")
+    logs_root.joinpath("archive/klippy.log.1").write_text("log\n")
+    # A link to a folder watched by the config root
+    logs_root.joinpath("config_link").symlink_to(config_root)
+    # A link to a folder within the same root
+    logs_root.joinpath("archive_link").symlink_to(logs_root.joinpath("archive"))
+    fm = make_file_manager(config_root, {"logs": logs_root})
+    try:
+        flist = fm.fs_observer.list_files("logs")
+        assert flist is not None
+        # Only one of the archive paths is watched, its contents are
+        # listed once
+        archive = [name for name in flist if name.endswith("klippy.log.1")]
+        assert len(archive) == 1
+        assert set(flist) - set(archive) == {
+            "moonraker.log", "config_link/printer.cfg",
+            "config_link/private/secret.cfg"
+        }
+        walked = fm._walk_file_list("logs", str(logs_root))
+        assert set(flist) - set(archive) == set(walked) - set(archive)
+        # Reserved folders reached through the link are excluded
+        fm.add_reserved_path("private", config_root.joinpath("private"), False)
+        flist = fm.fs_observer.list_files("logs")
+        assert flist is not None and "config_link/printer.cfg" in flist
+        assert "config_link/private/secret.cfg" not in flist
+    finally:
+        fm.fs_observer.close()
+
+def test_upload_session_add_range():
+    session = UploadSession("test", "", 100, {})
+    session.add_range(10, 10)
+    assert session.received == []
+    session.add_range(50, 60)
+    session.add_range(10, 20)
+    assert session.received == [[10, 20], [50, 60]]
+    # Adjacent and overlapping ranges are merged
+    session.add_range(20, 30)
+    session.add_range(55, 70)
+    assert session.received == [[10, 30], [50, 70]]
+    session.add_range(25, 55)
+    assert session.received == [[10, 70]]
+    assert session.received_size == 60
+    assert not session.is_complete()
+    session.add_range(0, 100)
+    assert session.received == [[0, 100]]
+    assert session.is_complete()
+
+def test_upload_session_hash(tmp_path: pathlib.Path):
+    data = bytes(range(256)) * 64
+    session = UploadSession(
+        "test", str(tmp_path.joinpath("upload.tmp")), len(data), {}
+    )
+    session.open()
+    try:
+        half = len(data) // 2
+        # Only a chunk starting at the hash offset may claim the hash
+        assert session.claim_hash(half) is None
+        hasher = session.claim_hash(0)
+        assert hasher is not None
+        assert session.claim_hash(0) is None
+        session.write(0, data[:half])
+        hasher.update(data[:half])
+        session.release_hash(hasher, half)
+        assert session.hash_offset == half
+        # A released claim without a hash leaves the offset unchanged
+        assert session.claim_hash(half) is not None
+        session.release_hash()
+        assert session.hash_offset == half
+        # The remainder is read back from disk
+        session.write(half, data[half:])
+        assert session.finish_hash() == hashlib.sha256(data).hexdigest()
+    finally:
+        session.remove()
+    assert not tmp_path.joinpath("upload.tmp").exists()
+
+@pytest.fixture
+def file_index() -> FileListIndex:
+    files = {
+        "b.gcode": {"modified": 3., "size": 300},
+        "A.gcode": {"modified": 1., "size": 100},
+        "sub/c.gcode": {"modified": 2., "size": 200},
+        "d.gcode": {"modified": 5., "size": 500},
+        "e.gcode": {"modified": 4., "size": 400}
+    }
+    metadata = {
+        "b.gcode": {"estimated_time": 60., "slicer": "PrusaSlicer"},
+        "sub/c.gcode": {"estimated_time": 30., "slicer": "OrcaSlicer"},
+        "e.gcode": {"estimated_time": 90., "slicer": "PrusaSlicer"}
+    }
+    gcode_metadata: Any = SimpleNamespace(metadata=metadata, revision=0)
+    return FileListIndex("gcodes", files, gcode_metadata)
+
+def run_query(
+    fm: FileManager,
+    index: FileListIndex,
+    sort_by: str,
+    descending: bool,
+    limit: int,
+    file_filter: FileQueryFilter = FileQueryFilter()
+) -> List[str]:
+    # Collect every page, passing the cursor through its encoded form
+    result: List[str] = []
+    last_key: Optional[Tuple[Any, ...]] = None
+    while True:
+        paths, next_key = index.query(
+            sort_by, descending, last_key, limit, file_filter
+        )
+        assert len(paths) <= limit
+        result.extend(paths)
+        if next_key is None:
+            return result
+        cursor = fm._encode_query_cursor(next_key, sort_by, descending)
+        last_key = fm._decode_query_cursor(cursor, sort_by, descending)
+        assert last_key == next_key
+
+@pytest.mark.parametrize("limit", [1, 2, 5, 10])
+def test_file_index_cursor(file_index: FileListIndex, limit: int):
+    fm = make_file_manager_stub()
+    assert run_query(fm, file_index, "name", False, limit) == [
+        "A.gcode", "b.gcode", "d.gcode", "e.gcode", "sub/c.gcode"
+    ]
+    assert run_query(fm, file_index, "size", True, limit) == [
+        "d.gcode", "e.gcode", "b.gcode", "sub/c.gcode", "A.gcode"
+    ]
+    slicer_filter = FileQueryFilter(slicer="prusaslicer")
+    assert run_query(
+        fm, file_index, "modified", False, limit, slicer_filter
+    ) == ["b.gcode", "e.gcode"]
+
+def test_file_index_missing_values(file_index: FileListIndex):
+    fm = make_file_manager_stub()
+    # Files without a value are always listed last
+    assert run_query(fm, file_index, "print_time", False, 2) == [
+        "sub/c.gcode", "b.gcode", "e.gcode", "A.gcode", "d.gcode"
+    ]
+    assert run_query(fm, file_index, "print_time", True, 2) == [
+        "e.gcode", "b.gcode", "sub/c.gcode", "d.gcode", "A.gcode"
+    ]
+
+def test_file_index_cursor_mismatch():
+    fm = make_file_manager_stub()
+    cursor = fm._encode_query_cursor((0, 1., "a.gcode", "a.gcode"), "size", False)
+    with pytest.raises(ServerError):
+        fm._decode_query_cursor(cursor, "size", True)
+    with pytest.raises(ServerError):
+        fm._decode_query_cursor(cursor, "modified", False)
+    with pytest.raises(ServerError):
+        fm._decode_query_cursor("invalid", "size", False)
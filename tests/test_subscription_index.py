@@ -0,0 +1,157 @@
+from __future__ import annotations
+import pytest
+import asyncio
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+from moonraker.utils import ServerError
+from moonraker.common import (
+    APITransport,
+    BaseRemoteConnection,
+    WebRequest,
+    RequestType
+)
+from moonraker.components.klippy_connection import (
+    KlippyConnection,
+    SubscriptionIndex
+)
+
+STATUS = {
+    "toolhead": {"position": [0., 0., 0., 0.], "homed_axes": ""},
+    "extruder": {"temperature": 20., "target": 0.},
+    "heater_bed": {"temperature": 20., "target": 0.}
+}
+
+class MockTransport(APITransport):
+    def __init__(self) -> None:
+        self.updates: List[Dict[str, Dict[str, Any]]] = []
+
+    def send_status(
+        self, status: Dict[str, Dict[str, Any]], eventtime: float
+    ) -> None:
+        self.updates.append(status)
+
+class MockConnection(BaseRemoteConnection):
+    def __init__(self) -> None:
+        self.updates: List[Dict[str, Dict[str, Any]]] = []
+        wsm = SimpleNamespace(max_queue_size=100, stall_timeout=0.)
+        server: Any = SimpleNamespace(
+            get_event_loop=lambda: None,
+            lookup_component=lambda name: wsm
+        )
+        self.on_create(server)
+
+    def queue_status(
+        self,
+        status: Dict[str, Any],
+        eventtime: float,
+        encoded: Optional[Dict[str, bytes]] = None
+    ) -> None:
+        self.updates.append(status)
+
+def make_klippy_connection() -> KlippyConnection:
+    kconn = KlippyConnection.__new__(KlippyConnection)
+    kconn.server = SimpleNamespace(error=ServerError)
+    kconn.subscription_lock = asyncio.Lock()
+    kconn.subscriptions = {}
+    kconn.subscription_index = SubscriptionIndex()
+    kconn.subscription_cache = {}
+
+    async def request_standard(web_request: WebRequest, timeout: float) -> Any:
+        # Respond with the latest state known to the connection
+        objects: Dict[str, Any] = web_request.get_args()["objects"]
+        status = {
+            obj: {**STATUS[obj], **kconn.subscription_cache.get(obj, {})}
+            for obj in objects
+        }
+        return {"eventtime": 1., "status": status}
+    kconn._request_standard = request_standard  # type: ignore
+    return kconn
+
+async def subscribe(
+    kconn: KlippyConnection, conn: APITransport, objects: Dict[str, Any]
+) -> Dict[str, Any]:
+    web_request = WebRequest(
+        "objects/subscribe", {"objects": objects}, RequestType.POST, conn
+    )
+    return await kconn._request_subscripton(web_request)
+
+def test_index_groups():
+    index = SubscriptionIndex()
+    conns = [MockTransport() for _ in range(3)]
+    index.rebuild({
+        conns[0]: {"extruder": ["temperature", "target"]},
+        conns[1]: {"extruder": ["target", "temperature"]},
+        conns[2]: {"extruder": None, "toolhead": ["position"]}
+    })
+    # Identical subscriptions share a group regardless of field order
+    assert len(index) == 2
+    status = {
+        "extruder": {"temperature": 21.},
+        "toolhead": {"homed_axes": "xyz"}
+    }
+    result = {
+        tuple(index.get_connections(key)): group_status
+        for key, group_status in index.filter_status(status).items()
+    }
+    assert result == {
+        (conns[0], conns[1]): {"extruder": {"temperature": 21.}},
+        (conns[2],): {"extruder": {"temperature": 21.}}
+    }
+
+@pytest.mark.asyncio
+async def test_index_rebuild_on_subscribe():
+    kconn = make_klippy_connection()
+    first = MockTransport()
+    second = MockTransport()
+    result = await subscribe(kconn, first, {"extruder": ["temperature"]})
+    assert result["status"] == {"extruder": {"temperature": 20.}}
+    await subscribe(kconn, second, {"toolhead": None})
+    assert len(kconn.subscription_index) == 2
+    kconn._process_status_update(2., {
+        "extruder": {"temperature": 21.},
+        "toolhead": {"homed_axes": "xyz"}
+    })
+    assert first.updates == [{"extruder": {"temperature": 21.}}]
+    assert second.updates == [{"toolhead": {"homed_axes": "xyz"}}]
+    # Replacing a subscription updates the index
+    await subscribe(kconn, first, {"heater_bed": ["target"]})
+    kconn._process_status_update(3., {
+        "extruder": {"temperature": 22.},
+        "heater_bed": {"target": 60.}
+    })
+    assert first.updates[-1] == {"heater_bed": {"target": 60.}}
+    assert second.updates[1:] == [{}]
+
+@pytest.mark.asyncio
+async def test_index_rebuild_on_remove():
+    kconn = make_klippy_connection()
+    first = MockTransport()
+    second = MockTransport()
+    await subscribe(kconn, first, {"extruder": None})
+    await subscribe(kconn, second, {"extruder": None})
+    assert len(kconn.subscription_index) == 1
+    kconn.remove_subscription(first)
+    kconn._process_status_update(2., {"extruder": {"target": 200.}})
+    assert first.updates == []
+    assert second.updates == [{"extruder": {"target": 200.}}]
+    # An empty subscription removes the connection from the index
+    await subscribe(kconn, second, {})
+    assert len(kconn.subscription_index) == 0
+    kconn._process_status_update(3., {"extruder": {"target": 0.}})
+    assert len(second.updates) == 1
+
+@pytest.mark.asyncio
+async def test_local_transport_every_update():
+    kconn = make_klippy_connection()
+    local = MockTransport()
+    remote = MockConnection()
+    await subscribe(kconn, local, {"extruder": ["temperature"]})
+    await subscribe(kconn, remote, {"extruder": ["temperature"]})
+    assert len(kconn.subscription_index) == 1
+    kconn._process_status_update(2., {"toolhead": {"homed_axes": "xyz"}})
+    kconn._process_status_update(3., {"extruder": {"temperature": 21.}})
+    kconn._process_status_update(4., {"extruder": {"target": 200.}})
+    # Local transports receive every update, remote connections only
+    # receive updates containing subscribed fields
+    assert local.updates == [{}, {"extruder": {"temperature": 21.}}, {}]
+    assert remote.updates == [{"extruder": {"temperature": 21.}}]
@@ -0,0 +1,60 @@
+from __future__ import annotations
+import pytest
+import asyncio
+from typing import List
+from moonraker.utils import FrameReader
+
+def to_bytes(frames: List[memoryview]) -> List[bytes]:
+    return [frame.tobytes() for frame in frames]
+
+@pytest.mark.asyncio
+async def test_frame_reader_multiple_frames():
+    reader = asyncio.StreamReader()
+    reader.feed_data(b'{"id": 1}\x03{"id": 2}\x03{"id"')
+    frame_reader = FrameReader(reader)
+    frames = await frame_reader.read_frames()
+    assert to_bytes(frames) == [b'{"id": 1}', b'{"id": 2}']
+    reader.feed_data(b': 3}\x03')
+    assert to_bytes(await frame_reader.read_frames()) == [b'{"id": 3}']
+    # Frames returned earlier remain valid after later reads
+    assert to_bytes(frames) == [b'{"id": 1}', b'{"id": 2}']
+
+@pytest.mark.asyncio
+async def test_frame_reader_partial_frame():
+    reader = asyncio.StreamReader()
+    frame_reader = FrameReader(reader, chunk_size=4)
+    reader.feed_data(b"abcdefghij\x03kl")
+    assert to_bytes(await frame_reader.read_frames()) == [b"abcdefghij"]
+    reader.feed_data(b"m\x03\x03")
+    assert to_bytes(await frame_reader.read_frames()) == [b"klm", b""]
+
+@pytest.mark.asyncio
+async def test_frame_reader_split_delimiter():
+    reader = asyncio.StreamReader()
+    frame_reader = FrameReader(reader, delimiter=b"\r\n", chunk_size=4)
+    reader.feed_data(b"abc\r\ndef\r")
+    assert to_bytes(await frame_reader.read_frames()) == [b"abc"]
+    # The delimiter is split across two reads
+    reader.feed_data(b"\nghi\r\n")
+    assert to_bytes(await frame_reader.read_frames()) == [b"def"]
+    assert to_bytes(await frame_reader.read_frames()) == [b"ghi"]
+
+@pytest.mark.asyncio
+async def test_frame_reader_eof():
+    reader = asyncio.StreamReader()
+    frame_reader = FrameReader(reader)
+    reader.feed_data(b"first\x03second")
+    reader.feed_eof()
+    assert to_bytes(await frame_reader.read_frames()) == [b"first"]
+    with pytest.raises(asyncio.IncompleteReadError) as excinfo:
+        await frame_reader.read_frames()
+    assert excinfo.value.partial == b"second"
+    assert frame_reader.at_eof()
+
+@pytest.mark.asyncio
+async def test_frame_reader_limit():
+    reader = asyncio.StreamReader()
+    frame_reader = FrameReader(reader, chunk_size=8, limit=16)
+    reader.feed_data(b"x" * 32)
+    with pytest.raises(asyncio.LimitOverrunError):
+        await frame_reader.read_frames()
@@ -0,0 +1,169 @@
+from __future__ import annotations
+import pytest
+import pytest_asyncio
+import json
+import tornado.web
+import tornado.httpserver
+import tornado.websocket
+import tornado.testing
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+from moonraker.utils import ServerError
+from moonraker.common import BaseRemoteConnection, WebRequest, RequestType
+from moonraker.eventloop import EventLoop
+from moonraker.components import websockets
+from moonraker.components.websockets import WebsocketManager
+
+THRESHOLD = 1024
+
+def make_manager() -> WebsocketManager:
+    wsm = WebsocketManager.__new__(WebsocketManager)
+    wsm.compression_threshold = THRESHOLD
+    wsm.compression_stats = {
+        "compressed_messages": 0,
+        "uncompressed_messages": 0,
+        "message_bytes": 0,
+        "wire_bytes": 0
+    }
+    wsm.max_queue_size = 100
+    wsm.stall_timeout = 0.
+    wsm.clients = {}
+    wsm.notification_families = {}
+    return wsm
+
+class MockConnection(BaseRemoteConnection):
+    def __init__(self, wsm: WebsocketManager) -> None:
+        evtloop = EventLoop()
+        server: Any = SimpleNamespace(
+            get_event_loop=lambda: evtloop,
+            lookup_component=lambda name: wsm,
+            error=ServerError
+        )
+        self.on_create(server)
+        self.queue_busy = True
+        wsm.clients[self.uid] = self
+
+    def get_notifications(self) -> List[str]:
+        return [json.loads(msg)["method"] for msg in self.message_buf]
+
+    async def write_to_socket(self, message: Union[bytes, str]) -> None:
+        pass
+
+class EchoHandler(tornado.websocket.WebSocketHandler):
+    def initialize(self, wsm: WebsocketManager) -> None:
+        self.wsm = wsm
+
+    def get_compression_options(self) -> Optional[Dict[str, Any]]:
+        return {}
+
+    def on_message(self, message: Any) -> None:
+        self.wsm.write_message(self, message, isinstance(message, bytes))
+
+@pytest_asyncio.fixture
+async def echo_socket() -> AsyncIterator[Tuple[WebsocketManager, Any]]:
+    wsm = make_manager()
+    app = tornado.web.Application([("/ws", EchoHandler, {"wsm": wsm})])
+    sock, port = tornado.testing.bind_unused_port()
+    server = tornado.httpserver.HTTPServer(app)
+    server.add_sockets([sock])
+    conn = await tornado.websocket.websocket_connect(
+        f"ws://127.0.0.1:{port}/ws", compression_options={}
+    )
+    yield wsm, conn
+    conn.close()
+    server.stop()
+
+async def echo(conn: Any, message: Any) -> Any:
+    await conn.write_message(message, isinstance(message, bytes))
+    return await conn.read_message()
+
+@pytest.mark.asyncio
+async def test_compression_threshold(echo_socket: Tuple[WebsocketManager, Any]):
+    wsm, conn = echo_socket
+    small = "a" * (THRESHOLD - 1)
+    assert await echo(conn, small) == small
+    stats = wsm.compression_stats
+    assert stats["uncompressed_messages"] == 1
+    assert stats["compressed_messages"] == 0
+    large = b"b" * (THRESHOLD * 8)
+    assert await echo(conn, large) == large
+    assert stats["compressed_messages"] == 1
+    assert stats["message_bytes"] == len(large)
+    assert 0 < stats["wire_bytes"] < len(large)
+
+@pytest.mark.asyncio
+async def test_compression_threshold_encoded_size(
+    echo_socket: Tuple[WebsocketManager, Any]
+):
+    wsm, conn = echo_socket
+    # Fewer characters than the threshold, however more bytes once encoded
+    message = "é" * (THRESHOLD // 2 + 1)
+    assert await echo(conn, message) == message
+    assert wsm.compression_stats["compressed_messages"] == 1
+    assert wsm.compression_stats["uncompressed_messages"] == 0
+
+@pytest.mark.asyncio
+async def test_compression_unknown_tornado(
+    echo_socket: Tuple[WebsocketManager, Any], monkeypatch: pytest.MonkeyPatch
+):
+    wsm, conn = echo_socket
+    monkeypatch.setattr(websockets, "WS_PROTOCOL_INTERNALS", False)
+    for message in ("small", "c" * (THRESHOLD * 2)):
+        assert await echo(conn, message) == message
+    stats = wsm.compression_stats
+    assert stats["compressed_messages"] == stats["uncompressed_messages"] == 0
+
+async def set_filter(
+    wsm: WebsocketManager, conn: BaseRemoteConnection, args: Dict[str, Any]
+) -> Dict[str, Any]:
+    web_request = WebRequest(
+        "/server/connection/notification_filter", args, RequestType.POST, conn
+    )
+    return await wsm._handle_notification_filter(web_request)
+
+@pytest.mark.asyncio
+async def test_notification_filter():
+    wsm = make_manager()
+    wsm.notification_families.update({
+        "filelist_changed": "file_manager",
+        "history_changed": "history",
+        "proc_stat_update": "proc_stats"
+    })
+    unfiltered = MockConnection(wsm)
+    include_family = MockConnection(wsm)
+    include_none = MockConnection(wsm)
+    exclude_name = MockConnection(wsm)
+    result = await set_filter(
+        wsm, include_family,
+        {"include": ["history", "notify_filelist_changed"]}
+    )
+    assert result == {
+        "include": ["filelist_changed", "history"], "exclude": []
+    }
+    result = await set_filter(wsm, include_none, {"include": []})
+    assert result == {"include": [], "exclude": []}
+    result = await set_filter(
+        wsm, exclude_name,
+        {"include": ["file_manager", "proc_stats"],
+         "exclude": ["filelist_changed"]}
+    )
+    assert result == {
+        "include": ["file_manager", "proc_stats"],
+        "exclude": ["filelist_changed"]
+    }
+    for name in ("filelist_changed", "history_changed", "proc_stat_update"):
+        wsm.notify_clients(name, [{}])
+    assert unfiltered.get_notifications() == [
+        "notify_filelist_changed", "notify_history_changed",
+        "notify_proc_stat_update"
+    ]
+    assert include_family.get_notifications() == [
+        "notify_filelist_changed", "notify_history_changed"
+    ]
+    assert include_none.get_notifications() == []
+    assert exclude_name.get_notifications() == ["notify_proc_stat_update"]
+    # Clearing the filter restores delivery of all notifications
+    result = await set_filter(wsm, include_none, {"include": None})
+    assert result == {"include": None, "exclude": []}
+    wsm.notify_clients("history_changed", [{}])
+    assert include_none.get_notifications() == ["notify_history_changed"]